@@ -0,0 +1,57 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""
+Compares the time it takes XCLIClient._build_command to write a command
+with the time it took to build it as an ElementTree and serialize it
+(which is what _build_command used to do).
+
+    python benchmarks/bench_commands.py [number_of_commands]
+"""
+
+import sys
+import timeit
+from mock import Mock
+from pyxcli.client import XCLIClient
+from pyxcli.helpers import xml_util as etree
+
+
+def with_etree(client, cmd, params, options):
+    root = etree.Element("command", id="1", type=cmd, close_on_return="no")
+    for k, v in options.items():
+        root.append(etree.Element("option", name=client._dump_xcli(k),
+                                  value=client._dump_xcli(v)))
+    for k, v in params.items():
+        root.append(etree.Element("argument", name=client._dump_xcli(k),
+                                  value=client._dump_xcli(v)))
+    return etree.tostring(root)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    client = XCLIClient(Mock(), "admin", "password", populate=False)
+    options = client._context()
+    params = {"vol": "vol_0001", "size": 17, "pool": "pool_01"}
+    for name, function in (
+            ("etree", lambda: with_etree(client, "vol_create", params,
+                                         options)),
+            ("template", lambda: client._build_command("vol_create", params,
+                                                       options))):
+        best = min(timeit.repeat(function, number=count, repeat=5))
+        print("%-9s %6.2f us per command" % (name, best * 1e6 / count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""
+Compares the ways of shipping a large vol_list response to another
+process: XML text, a pickled list of Bunches and the compact form.
+
+    python benchmarks/bench_compact.py [number_of_volumes]
+"""
+
+import pickle
+import sys
+import timeit
+from pyxcli.response import XCLIResponse
+from pyxcli.helpers.xml_util import fromstring, tostring
+
+from vol_list import vol_list_xml
+
+
+def report(name, dump, load):
+    data = dump()
+    dump_time = min(timeit.repeat(dump, number=1, repeat=3))
+    load_time = min(timeit.repeat(lambda: load(data), number=1, repeat=3))
+    print("  %-16s %10d bytes  dump %7.3fs  load+rows %7.3fs" % (
+        name, len(data), dump_time, load_time))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    response = XCLIResponse(fromstring(vol_list_xml(count)),
+                            command="vol_list")
+    rows = response.as_list
+    protocol = pickle.HIGHEST_PROTOCOL
+    print("%d volumes" % (count,))
+    report("xml",
+           lambda: tostring(response.response_etree),
+           lambda data: XCLIResponse(fromstring(data)).as_list)
+    report("pickled bunches",
+           lambda: pickle.dumps(rows, protocol),
+           pickle.loads)
+    report("compact",
+           response.to_bytes,
+           lambda data: XCLIResponse.from_bytes(data).as_list)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""
+Measures (with tracemalloc) the memory retained by the Bunches of a large
+vol_list response once its XML tree is gone (as is the case for cached
+inventories), with and without string interning.
+
+    python benchmarks/bench_interning.py [number_of_volumes]
+"""
+
+import gc
+import sys
+import tracemalloc
+from pyxcli import response
+from pyxcli.response import StringInterner
+from pyxcli.helpers.xml_util import fromstring
+
+from vol_list import vol_list_xml
+
+
+def materialize(text, intern):
+    return_element = fromstring(text).find("return")
+    return [response._populate_bunch_with_element(subelement, intern)
+            for subelement in return_element]
+
+
+def measure(text, intern):
+    gc.collect()
+    tracemalloc.start()
+    rows = materialize(text, intern)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = vol_list_xml(count)
+    plain = measure(text, response._noop_intern)
+    interned = measure(text, StringInterner())
+    print("%d volumes" % (count,))
+    print("  not interned: %10d bytes" % (plain,))
+    print("  interned:     %10d bytes (%.1f%%)" % (
+        interned, 100.0 * interned / plain))
+
+
+if __name__ == "__main__":
+    main()
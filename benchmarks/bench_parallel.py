@@ -0,0 +1,65 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""
+Compares building the rows of a large compressed vol_list response in the
+calling process with parsing it in a process pool, in shards. CPU time is
+that of the calling process (the time it holds the GIL, more or less).
+
+    python benchmarks/bench_parallel.py [number_of_volumes] [workers]
+"""
+
+import base64
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pyxcli.helpers.xml_util import fromstring
+from pyxcli.response import XCLIResponse
+
+from vol_list import vol_list_payload
+
+
+def compressed_response(payload):
+    text = base64.b64encode(zlib.compress(payload.encode("utf-8")))
+    return ('<command><code value="SUCCESS"/>'
+            '<compressed_return value="%s"/></command>'
+            % (text.decode("ascii"),))
+
+
+def measure(text, pool):
+    wall = time.time()
+    cpu = time.process_time()
+    response = XCLIResponse.instantiate(fromstring(text), "base64",
+                                        pool=pool)
+    rows = response.as_list
+    return len(rows), time.time() - wall, time.process_time() - cpu
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    text = compressed_response(vol_list_payload(count))
+    print("%d volumes, %d bytes compressed" % (count, len(text)))
+    with ProcessPoolExecutor(workers) as pool:
+        pool.map(abs, range(workers))  # start the workers
+        for name, executor in (("serial", None), ("pool", pool)):
+            rows, wall, cpu = min(measure(text, executor) for i in range(3))
+            print("  %-8s %d rows  wall %7.3fs  cpu %7.3fs" % (
+                name, rows, wall, cpu))
+
+
+if __name__ == "__main__":
+    main()
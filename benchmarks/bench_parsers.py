@@ -0,0 +1,59 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""
+Compares the available XML parser backends on a large vol_list response:
+parsing it at once, feeding it in socket-sized chunks (as the transport
+does), and building its rows.
+
+    python benchmarks/bench_parsers.py [number_of_volumes]
+"""
+
+import sys
+import timeit
+from pyxcli.helpers import xml_util
+from pyxcli.response import XCLIResponse
+from pyxcli.transports import SocketTransport
+
+from vol_list import vol_list_xml
+
+
+def feed(data, backend):
+    parser = xml_util.TerminationDetectingXMLParser(backend)
+    chunk = SocketTransport.MAX_IO_CHUNK
+    for start in range(0, len(data), chunk):
+        parser.feed(data[start:start + chunk])
+    return parser.close()
+
+
+def best(function):
+    return min(timeit.repeat(function, number=1, repeat=3))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    data = vol_list_xml(count).encode("utf-8")
+    print("%d volumes, %d bytes" % (count, len(data)))
+    for name in xml_util.available_backends():
+        parse_time = best(lambda: xml_util.fromstring(data, name))
+        feed_time = best(lambda: feed(data, name))
+        rows_time = best(
+            lambda: XCLIResponse(xml_util.fromstring(data, name)).as_list)
+        print("  %-8s fromstring %7.3fs  feed %7.3fs  parse+rows %7.3fs" % (
+            name, parse_time, feed_time, rows_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""
+Compares the two ways of building the rows of a compressed vol_list
+response: parsing its payload into a tree with cElementTree and walking
+the tree (_populate_bunch_with_element), and building the rows straight
+from expat's events (_build_compressed_rows). Reports the time and the
+memory retained (the rows, and the tree when there is one).
+
+    python benchmarks/bench_records.py [number_of_volumes]
+"""
+
+import base64
+import gc
+import sys
+import timeit
+import tracemalloc
+import zlib
+from pyxcli import response
+from pyxcli.response import StringInterner
+
+from vol_list import vol_list_payload
+
+
+def with_tree(text):
+    interner = StringInterner()
+    return_element = response._inflate_return(text)
+    rows = [response._populate_bunch_with_element(subelement, interner)
+            for subelement in return_element]
+    return return_element, rows
+
+
+def with_expat(text):
+    return response._build_compressed_rows(text, StringInterner())
+
+
+def retained(function, text):
+    gc.collect()
+    tracemalloc.start()
+    result = function(text)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    payload = vol_list_payload(count).encode("utf-8")
+    text = base64.b64encode(zlib.compress(payload)).decode("ascii")
+    print("%d volumes, %d bytes (%d compressed)" % (
+        count, len(payload), len(text)))
+    for name, function in (("etree", with_tree), ("expat", with_expat)):
+        seconds = min(timeit.repeat(lambda: function(text), number=1,
+                                    repeat=3))
+        print("  %-6s %7.3fs  retained %6.1f MB" % (
+            name, seconds, retained(function, text) / 1e6))
+
+
+if __name__ == "__main__":
+    main()
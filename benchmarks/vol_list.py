@@ -0,0 +1,68 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""Synthetic, but realistically shaped, responses for the benchmarks"""
+
+VOLUME = """<volume id="%(id)x">
+<name value="vol_%(i)d"/>
+<size value="%(size)d"/>
+<size_MiB value="%(size_mib)d"/>
+<master_name value=""/>
+<cg_name value="%(cg)s"/>
+<pool_name value="pool_%(pool)d"/>
+<creator value="admin"/>
+<capacity value="%(capacity)d"/>
+<modified value="no"/>
+<sg_name value=""/>
+<delete_priority value="0"/>
+<locked value="no"/>
+<serial value="%(i)d"/>
+<snapshot_time value=""/>
+<snapshot_of value=""/>
+<wwn value="6001738CFC9035E800000000%(i)08X"/>
+<mirrored value="%(mirrored)s"/>
+<mirror_role value="%(role)s"/>
+<sync_type value="sync_best_effort"/>
+<compressed value="yes"/>
+<ssd_caching value="default"/>
+<unmap_enabled value="yes"/>
+</volume>"""
+
+
+def vol_list_rows(count):
+    for i in range(count):
+        yield VOLUME % {
+            "i": i,
+            "id": 0x1000000 + i,
+            "size": 17 * (1 + i % 8),
+            "size_mib": 16411 * (1 + i % 8),
+            "cg": "cg_%d" % (i // 50,) if i % 3 else "",
+            "pool": i % 12,
+            "capacity": 33554432 * (1 + i % 8),
+            "mirrored": "yes" if i % 2 else "no",
+            "role": "Master" if i % 4 == 1 else "Slave",
+        }
+
+
+def vol_list_payload(count):
+    """The content of the <return> element"""
+    return "".join(vol_list_rows(count))
+
+
+def vol_list_xml(count):
+    """A complete administrator/command element"""
+    return ("<command><code value=\"SUCCESS\"/><status value=\"0\"/>"
+            "<status_str value=\"Command completed successfully\"/>"
+            "<return>%s</return></command>" % (vol_list_payload(count),))
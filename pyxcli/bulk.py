@@ -0,0 +1,161 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI bulk execution Module
+
+.. module: bulk
+
+:Description: Executes a command with many sets of arguments, as
+ ``client.map`` does::
+
+    result = client.map("vol_create",
+                        [dict(vol="vol%d" % i, size=17, pool="p1")
+                         for i in range(2000)],
+                        concurrency=4)
+    for item in result.failures:
+        print(item.kwargs["vol"], item.error)
+
+ The sets of arguments are consumed as the commands are sent, so they may
+ be a generator. Up to ``concurrency`` commands are in flight at once: the
+ commands of a connection are sent one at a time, but each response is
+ parsed while the next command is sent. The command's options are
+ serialized once for the whole batch.
+
+"""
+
+import time
+from collections import namedtuple
+from pyxcli.errors import CommandExecutionError
+
+try:
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+except ImportError:
+    # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+
+
+class BulkItem(namedtuple("BulkItem", "index,kwargs,response,error,elapsed")):
+    """
+    The outcome of one set of arguments: its ``response``, or the ``error``
+    it failed with, and the time (in seconds) its command took
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BulkResult(object):
+    """
+    The outcome of a bulk execution. ``items`` are in the order of the
+    arguments; ``stopped`` tells whether the execution was stopped by a
+    failure before all the arguments were sent.
+    """
+
+    def __init__(self, cmd, items, elapsed, stopped):
+        self.cmd = cmd
+        self.items = sorted(items, key=lambda item: item.index)
+        self.elapsed = elapsed
+        self.stopped = stopped
+
+    @property
+    def successes(self):
+        return [item for item in self.items if item.ok]
+
+    @property
+    def failures(self):
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def ok(self):
+        return not self.stopped and all(item.ok for item in self.items)
+
+    def raise_for_failures(self):
+        """Raises the error of the first failure, if any"""
+        for item in self.items:
+            if not item.ok:
+                raise item.error
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __repr__(self):
+        return "<%s %s: %d succeeded, %d failed%s in %.2fs>" % (
+            self.__class__.__name__, self.cmd, len(self.successes),
+            len(self.failures), ", stopped" if self.stopped else "",
+            self.elapsed)
+
+
+def _run(client, options, cmd, index, kwargs):
+    started = time.time()
+    try:
+        with client._thread_options(options):
+            response = client.execute(cmd, **kwargs)
+    except Exception as e:
+        return BulkItem(index, kwargs, None, e, time.time() - started)
+    return BulkItem(index, kwargs, response, None, time.time() - started)
+
+
+def execute_many(client, cmd, arguments, concurrency=4,
+                 stop_on_error=False):
+    """
+    Executes ``cmd`` with every set of ``arguments``, and returns a
+    ``BulkResult``. Failed commands are reported in the result. No more
+    commands are sent after the first failure if ``stop_on_error``, or
+    after an error that is not a ``CommandExecutionError`` (the connection
+    failed).
+    """
+    if ThreadPoolExecutor is None:
+        raise NotImplementedError("bulk execution requires the futures "
+                                  "package on Python 2")
+    started = time.time()
+    # the commands run with the options of the calling thread
+    options = client._context()
+    items = []
+    stopped = False
+
+    def collect(futures):
+        stop = False
+        for future in futures:
+            item = future.result()
+            items.append(item)
+            if item.ok:
+                continue
+            if stop_on_error:
+                stop = True
+            elif not isinstance(item.error, CommandExecutionError):
+                stop = True
+        return stop
+
+    concurrency = max(1, concurrency)
+    with ThreadPoolExecutor(concurrency) as executor:
+        pending = set()
+        for index, kwargs in enumerate(arguments):
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            else:
+                done = set(future for future in pending if future.done())
+                pending -= done
+            if collect(done):
+                stopped = True
+                break
+            pending.add(executor.submit(_run, client, options, cmd, index,
+                                        kwargs))
+        collect(pending)
+    return BulkResult(cmd, items, time.time() - started, stopped)
@@ -0,0 +1,217 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI response cache Module
+
+.. module: cache
+
+:Description: A read-through cache of the responses of read-only commands
+ (``vol_list``, ``pool_list``, etc.), for applications that ask the same
+ arrays the same questions many times a second. It may be set on a client
+ or on a client pool (and is then shared by all the pool's clients)::
+
+    from pyxcli.cache import ResponseCache
+    client.response_cache = ResponseCache(ttls={"vol_list": 2})
+
+ Which commands are read-only, and which kinds of objects commands are
+ about, is told by a ``pyxcli.registry.CommandRegistry``. Responses are
+ kept by client, options (user, password, etc.), remote target, command
+ and arguments for the TTL of the command, and the least recently used
+ responses are dropped when the cache is full. Whenever a command that is
+ not read-only goes through a client using the cache, the responses of the
+ client about the same kinds of objects are dropped (``vol_create`` drops
+ the responses of ``vol_list``, and of ``pool_list`` as pools hold
+ volumes), and so are those being read meanwhile.
+
+ Responses are shared by the callers that get them from the cache, and
+ should be treated as read-only.
+
+"""
+
+import time
+from collections import namedtuple, OrderedDict
+from threading import Lock
+from pyxcli.registry import default_registry
+
+CacheStats = namedtuple("CacheStats",
+                        "hits,misses,invalidations,evictions,size")
+
+
+class ResponseCache(object):
+    """
+    A cache of the responses of read-only commands.
+
+    :param ttls: the time to live (in seconds) of the responses of specific
+                 commands; a TTL of 0 disables caching of the command
+    :param default_ttl: the time to live of the responses of other
+                        read-only commands
+    :param max_entries: the number of responses kept
+    :param registry: the ``pyxcli.registry.CommandRegistry`` telling which
+                     commands are read-only, and what they are about; by
+                     default, that of the client executing the command
+                     (or ``default_registry``)
+    """
+
+    def __init__(self, ttls=None, default_ttl=5.0, max_entries=256,
+                 clock=time.time, registry=None):
+        self.ttls = dict(ttls or {})
+        self.registry = registry
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = Lock()
+        # key -> (expiry, kinds, response)
+        self._entries = OrderedDict()
+        # (scope, target, kind) -> the number of times the responses about
+        # that kind (None for all kinds) of that array (None for all
+        # arrays) were dropped; counted only while reads are in flight,
+        # so that a read does not keep a response that was dropped while
+        # it was being sent
+        self._generations = {}
+        self._reads = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _traits(self, cmd, registry):
+        registry = self.registry or registry or default_registry
+        return registry.traits(cmd)
+
+    def ttl(self, cmd, registry=None):
+        """
+        The time to live of the responses of ``cmd`` (0 for none);
+        ``registry`` is used if the cache has none of its own
+        """
+        ttl = self.ttls.get(cmd)
+        if ttl is not None:
+            return ttl
+        if self._traits(cmd, registry).read_only:
+            return self.default_ttl
+        return 0
+
+    def execute(self, scope, options, target, cmd, kwargs, send,
+                registry=None):
+        """
+        Returns the response of the given command, calling ``send()`` to
+        execute it if needed. ``scope`` identifies the array, ``options``
+        (a tuple of items) are those the command is sent with, and
+        ``registry`` (that of the client) tells what the command does if
+        the cache has no registry of its own.
+        """
+        traits = self._traits(cmd, registry)
+        if not traits.read_only:
+            try:
+                return send()
+            finally:
+                self.invalidate(scope, target, traits.touches)
+        ttl = self.ttl(cmd, registry)
+        if not ttl:
+            return send()
+        try:
+            key = (scope, options, target, cmd, frozenset(kwargs.items()))
+            hash(key)
+        except TypeError:
+            # unhashable arguments
+            return send()
+        response = self._get(key)
+        if response is not None:
+            return response
+        with self._lock:
+            self._reads += 1
+            generation = self._generation(scope, target, traits.kinds)
+        try:
+            response = send()
+        except BaseException:
+            with self._lock:
+                self._end_read()
+            raise
+        self._put(key, ttl, traits.kinds, response, generation)
+        return response
+
+    def _generation(self, scope, target, kinds):
+        generations = self._generations
+        keys = [(None, None, None), (scope, target, None)]
+        for kind in kinds:
+            keys.extend([(None, None, kind), (scope, target, kind)])
+        return sum(generations.get(key, 0) for key in keys)
+
+    def _end_read(self):
+        self._reads -= 1
+        if not self._reads:
+            self._generations.clear()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                del self._entries[key]
+                if entry[0] > self._clock():
+                    # most recently used
+                    self._entries[key] = entry
+                    self.hits += 1
+                    return entry[2]
+            self.misses += 1
+            return None
+
+    def _put(self, key, ttl, kinds, response, generation):
+        with self._lock:
+            dropped = generation != self._generation(key[0], key[2], kinds)
+            self._end_read()
+            if dropped:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (self._clock() + ttl, kinds, response)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, scope=None, target=None, kinds=None):
+        """
+        Drops the responses about the given kinds of objects (or all of
+        them) of the given array and remote target (or of all of them)
+        """
+        def is_stale(key, entry):
+            if scope is not None and (key[0], key[2]) != (scope, target):
+                return False
+            return kinds is None or not entry[1].isdisjoint(kinds)
+
+        with self._lock:
+            if self._reads:
+                array = (None, None) if scope is None else (scope, target)
+                for kind in (None,) if kinds is None else kinds:
+                    generation = array + (kind,)
+                    self._generations[generation] = self._generations.get(
+                        generation, 0) + 1
+            stale = [key for key, entry in self._entries.items()
+                     if is_stale(key, entry)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        self.invalidate()
+
+    @property
+    def stats(self):
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.invalidations,
+                              self.evictions, len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self.stats)
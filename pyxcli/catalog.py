@@ -0,0 +1,162 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI command catalog Module
+
+.. module: catalog
+
+:Description: The command catalog is what a client learns by running
+ ``help``: the names, descriptions and syntax of the commands, with which
+ it documents its ``cmd`` namespace. Running ``help`` on every connection
+ is slow, so catalogs may be cached on disk::
+
+    from pyxcli.catalog import CatalogCache
+    XCLIClient.catalog_cache = CatalogCache()
+
+ A cached catalog is keyed by the fields of ``version_get`` (so a firmware
+ upgrade makes the client run ``help`` again) and by the user (as the
+ commands depend on the user's category).
+
+ The catalog of an array (and of each of its remote targets) is shared by
+ all the clients layered over the connection (user and remote clients),
+ and loaded the first time one of them needs it (for a docstring or for
+ ``dir``).
+
+"""
+
+import errno
+import hashlib
+import json
+import os
+import tempfile
+from logging import getLogger
+from threading import Lock
+from pyxcli import XCLI_DEFAULT_LOGGER
+
+xlog = getLogger(XCLI_DEFAULT_LOGGER)
+
+_replace = getattr(os, "replace", os.rename)
+
+
+class CommandCatalog(object):
+    """The ``(name, description, syntax)`` entries of the commands"""
+
+    def __init__(self, entries):
+        self.entries = [tuple(entry) for entry in entries]
+        self._by_name = dict((entry[0], entry) for entry in self.entries)
+
+    @classmethod
+    def from_help(cls, response):
+        return cls((info.name, info.description, info.syntax)
+                   for info in response)
+
+    def get(self, name):
+        """Returns the entry of the given command, or ``None``"""
+        return self._by_name.get(name)
+
+    def names(self):
+        return [entry[0] for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "<%s of %d commands>" % (self.__class__.__name__,
+                                        len(self.entries))
+
+
+class LazyCatalog(object):
+    """
+    Holds the catalog shared by the clients of an array (or of a remote
+    target); it is loaded the first time one of them needs it
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.catalog = None
+
+    def get(self, load):
+        """Returns the catalog, calling ``load`` first if needed"""
+        if self.catalog is None:
+            with self._lock:
+                if self.catalog is None:
+                    self.catalog = load()
+        return self.catalog
+
+
+def default_cache_directory():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pyxcli", "catalogs")
+
+
+class CatalogCache(object):
+    """
+    Command catalogs stored as JSON files in ``directory`` (by default,
+    under the user's cache directory). Files are replaced atomically, and
+    files that cannot be read, were written by another format version or
+    belong to another key (a hash collision) are ignored.
+    """
+    FORMAT = 1
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_cache_directory()
+
+    def _path(self, key):
+        text = json.dumps(key, sort_keys=True)
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".json")
+
+    def load(self, key):
+        """Returns the catalog stored for ``key``, or ``None``"""
+        try:
+            with open(self._path(key)) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        if data.get("format") != self.FORMAT or data.get("key") != key:
+            return None
+        return CommandCatalog(data["commands"])
+
+    def store(self, key, catalog):
+        """Stores ``catalog`` for ``key``; failures are only logged"""
+        data = {"format": self.FORMAT, "key": key,
+                "commands": catalog.entries}
+        try:
+            try:
+                os.makedirs(self.directory)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            fd, temp_path = tempfile.mkstemp(dir=self.directory,
+                                             suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+                _replace(temp_path, self._path(key))
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except (IOError, OSError) as e:
+            xlog.warning("Could not cache the command catalog in %s: %s",
+                         self.directory, e)
+
+    def invalidate(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -23,9 +23,11 @@
 """
 
 import itertools
+import re
+from collections import OrderedDict
 from contextlib import contextmanager
-from logging import getLogger
-from threading import Lock
+from logging import getLogger, DEBUG
+from threading import Lock, local
 from weakref import proxy as weakproxy
 from pyxcli.helpers.xml_util import ElementNotFoundException
 from pyxcli.helpers import xml_util as etree
@@ -33,13 +35,25 @@ from pyxcli import XCLI_DEFAULT_LOGGER
 from pyxcli.errors import CommandExecutionError
 from pyxcli.errors import CommandFailedAServerError
 from pyxcli.errors import CorruptResponse
+from pyxcli.errors import TransportError
 from pyxcli.transports import SocketTransport
 from pyxcli.transports import ClosedTransport
 from pyxcli.transports import SingleEndpointTransport
 from pyxcli.transports import MultiEndpointTransport
 from pyxcli.response import XCLIResponse
+from pyxcli.bulk import execute_many
+from pyxcli.catalog import CommandCatalog, LazyCatalog
+from pyxcli.registry import default_registry
+from pyxcli.scheduler import PriorityScheduler
+from pyxcli.singleflight import SingleFlight
 from pyxcli.helpers.exceptool import chained
 
+try:
+    from concurrent.futures import Future, ThreadPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport
+    Future = ThreadPoolExecutor = None
+
 try:
     basestring
 except NameError:
@@ -52,7 +66,82 @@ class ClosedXCLIClientError(IOError):
     pass
 
 
+_ATTRIBUTE_SPECIALS = re.compile(u'[&<>"\r\n\t]')
+_ATTRIBUTE_ESCAPES = {
+    u"&": u"&amp;",
+    u"<": u"&lt;",
+    u">": u"&gt;",
+    u'"': u"&quot;",
+    u"\r": u"&#13;",
+    u"\n": u"&#10;",
+    u"\t": u"&#09;",
+}
+_COMMAND = u'<command id="%d" type="%s" close_on_return="no"'
+_REMOTE_TARGET = u' remote_target="%s"'
+_OPTION = u'<option name="%s" value="%s" />'
+_ARGUMENT = u'<argument name="%s" value="%s" />'
+
+
+def _escape_attribute_match(match):
+    return _ATTRIBUTE_ESCAPES[match.group()]
+
+
+def _escape_attribute(value):
+    """Escapes an attribute value the way ElementTree does"""
+    if _ATTRIBUTE_SPECIALS.search(value) is None:
+        return value
+    return _ATTRIBUTE_SPECIALS.sub(_escape_attribute_match, value)
+
+
+class CommandInvoker(object):
+    """
+    Executes a single command. Its documentation (``__doc__`` and
+    ``syntax``) comes from the client's command catalog, which is loaded
+    when first asked for.
+    """
+
+    def __init__(self, client, name):
+        self._client = client
+        self.name = name
+        self.__name__ = "CommandInvoker<%r>" % (name,)
+
+    def __call__(self, **kwargs):
+        return self._client.execute(self.name, **kwargs)
+
+    def _entry(self):
+        return self._client._catalog().get(self.name)
+
+    @property
+    def __doc__(self):
+        entry = self._entry()
+        if entry is None:
+            return None
+        return entry[1] + "\nUsage: " + entry[2]
+
+    @property
+    def syntax(self):
+        entry = self._entry()
+        return None if entry is None else entry[2]
+
+    @property
+    def traits(self):
+        """The command's ``pyxcli.registry.CommandTraits``"""
+        return self._client.command_registry.traits(self.name)
+
+    def __repr__(self):
+        return "<%s>" % (self.__name__,)
+
+
+class AsyncCommandInvoker(CommandInvoker):
+    """Executes a single command asynchronously, returning a future"""
+
+    def __call__(self, **kwargs):
+        return self._client.execute_async(self.name, **kwargs)
+
+
 class CommandNamespace(object):
+    invoker_class = CommandInvoker
+
     def __init__(self, client):
         self._client = client
 
@@ -62,22 +151,47 @@ class CommandNamespace(object):
         if name.startswith("_"):
             raise AttributeError(name)
 
-        def invoker(**kwargs):
-            return self._client.execute(name, **kwargs)
-        invoker.__name__ = "CommandInvoker<%r>" % (name,)
+        invoker = self.invoker_class(self._client, name)
         setattr(self, name, invoker)
         return invoker
 
+    def __dir__(self):
+        names = set(self._client._catalog().names())
+        names.update(name for name in self.__dict__
+                     if not name.startswith("_"))
+        return sorted(names)
+
     # to make RPyC happy
     _rpyc_getattr = getattr
 
 
+class AsyncCommandNamespace(CommandNamespace):
+    invoker_class = AsyncCommandInvoker
+
+
 class BaseXCLIClient(object):
     DEFAULT_OPTIONS = {}
+    # a pyxcli.catalog.CatalogCache in which the command catalogs (the
+    # output of help) are kept between connections; by default, none
+    catalog_cache = None
+    # the pyxcli.registry.CommandRegistry telling what the commands do; the
+    # command catalogs the client loads are added to a copy of it (or to
+    # the registry set on the client itself)
+    command_registry = default_registry
+    # the remote target whose commands the client executes
+    _catalog_target = None
 
     def __init__(self):
-        self._contexts = [self.DEFAULT_OPTIONS.copy()]
+        # the options set outside of options() contexts are shared by all
+        # threads, while the options() contexts are kept by thread. A set
+        # of options is never changed once set, but replaced (see
+        # set_options), so commands carry their options without copying
+        self._options = self.DEFAULT_OPTIONS.copy()
+        self._local = local()
         self.cmd = CommandNamespace(weakproxy(self))
+        self.acmd = AsyncCommandNamespace(weakproxy(self))
+        self._catalogs = {}
+        self._catalogs_lock = Lock()
 
     def __enter__(self):
         return self
@@ -86,11 +200,49 @@ class BaseXCLIClient(object):
         self.close()
 
     def _populate_commands(self):
-        for info in self.execute("help"):
-            invoker = getattr(self.cmd, info.name)
-            invoker.__doc__ = info.description + "\nUsage: " + info.syntax
-            invoker.syntax = info.syntax
-            setattr(self.cmd, info.name, invoker)
+        self._catalog()
+
+    def _catalog_holder(self, target):
+        # the catalogs are kept by the client that owns the connection, and
+        # shared by the clients layered over it
+        with self._catalogs_lock:
+            holder = self._catalogs.get(target)
+            if holder is None:
+                holder = self._catalogs[target] = LazyCatalog()
+            return holder
+
+    def _catalog(self):
+        """Returns the command catalog, loading it on first use"""
+        holder = self._catalog_holder(self._catalog_target)
+        return holder.get(self._load_catalog)
+
+    def _catalog_key(self):
+        version = self.execute("version_get").as_single_element
+        if not isinstance(version, dict):
+            version = {"version": version}
+        return {"user": self.get_option("user"), "version": dict(version)}
+
+    def _load_catalog(self):
+        cache = self.catalog_cache
+        if cache is None:
+            catalog = CommandCatalog.from_help(self.execute("help"))
+        else:
+            key = self._catalog_key()
+            catalog = cache.load(key)
+            if catalog is None:
+                catalog = CommandCatalog.from_help(self.execute("help"))
+                cache.store(key, catalog)
+        self._add_catalog(catalog)
+        return catalog
+
+    def _add_catalog(self, catalog):
+        # clients connected to different arrays (or versions) must not
+        # learn each other's catalogs, so a registry shared by the class is
+        # copied first
+        with self._catalogs_lock:
+            if "command_registry" not in self.__dict__:
+                self.command_registry = self.command_registry.copy()
+        self.command_registry.add_catalog(catalog)
 
     def is_connected(self):
         raise NotImplementedError()
@@ -109,6 +261,58 @@ class BaseXCLIClient(object):
         """
         raise NotImplementedError()
 
+    def _execute_remote(self, remote_target, cmd, kwargs, options):
+        # executes the command with the given options, rather than those
+        # of the calling thread (the clients layered over this one pass
+        # their own)
+        with self._thread_options(options):
+            return self.execute_remote(remote_target, cmd, **kwargs)
+
+    def execute_async(self, cmd, **kwargs):
+        """
+        Executes the command (with the arguments) in the client's executor,
+        and returns a ``concurrent.futures.Future`` of its response (or of
+        its error). The future may be cancelled until a worker of the
+        executor takes the command; with the default executor (a single
+        worker per connection), that is until the command is sent.
+        ``client.acmd`` is the asynchronous counterpart of ``client.cmd``::
+
+            futures = [client.acmd.vol_list() for client in clients]
+            volumes = [future.result() for future in futures]
+        """
+        if Future is None:
+            raise NotImplementedError("execute_async requires the futures "
+                                      "package on Python 2")
+        future = Future()
+        # the command runs with the options of the calling thread
+        options = self._context()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                with self._thread_options(options):
+                    response = self.execute(cmd, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(response)
+        self._get_executor().submit(run)
+        return future
+
+    def _get_executor(self):
+        raise NotImplementedError()
+
+    def map(self, cmd, arguments, concurrency=4, stop_on_error=False):
+        """
+        Executes the command with every set of arguments (dicts of keyword
+        arguments), with up to ``concurrency`` commands in flight, and
+        returns a ``pyxcli.bulk.BulkResult`` of the responses and of the
+        errors. See ``pyxcli.bulk.execute_many``.
+        """
+        return execute_many(self, cmd, arguments, concurrency,
+                            stop_on_error)
+
     @contextmanager
     def options(self, **options):
         """A context-manager for setting connection options; the original
@@ -118,18 +322,38 @@ class BaseXCLIClient(object):
             with c.options(gui_mode = False):
                  c.cmd.vol_list()
         """
-        self._contexts.append(self._contexts[-1].copy())
-        self.set_options(**options)
+        with self._thread_options(self._own_options()):
+            self.set_options(**options)
+            yield
+
+    @contextmanager
+    def _thread_options(self, options):
+        # the calling thread uses the given options until the context exits
+        try:
+            contexts = self._local.contexts
+        except AttributeError:
+            contexts = self._local.contexts = []
+        contexts.append(options)
         try:
             yield
         finally:
-            self._contexts.pop(-1)
+            contexts.pop(-1)
+
+    def _own_options(self):
+        contexts = getattr(self._local, "contexts", None)
+        if contexts:
+            return contexts[-1]
+        return self._options
+
+    def _context(self):
+        """Returns the options of the calling thread"""
+        return self._own_options()
 
     def get_option(self, name):
         """Returns the value of the given option
         (or a ``KeyError`` if it does not exist)
         """
-        return self._contexts[-1].get(name)
+        return self._context().get(name)
 
     def set_options(self, **options):
         """Sets the value of the given options (as keyword arguments).
@@ -137,13 +361,18 @@ class BaseXCLIClient(object):
         hyphens (i.e., ``c.set_options(gui_mode = True)``
         will set the option ``gui-mode``)
         """
-        opt2 = self._contexts[-1]
+        opt2 = self._own_options().copy()
         for k, v in options.items():
             k2 = k.replace("_", "-")
             if v is None:
                 opt2.pop(k2, None)
             else:
                 opt2[k2] = v
+        contexts = getattr(self._local, "contexts", None)
+        if contexts:
+            contexts[-1] = opt2
+        else:
+            self._options = opt2
 
 
 class XCLIClient(BaseXCLIClient):
@@ -164,6 +393,42 @@ class XCLIClient(BaseXCLIClient):
         "print-header": "no",
         "compress-output": "base64",
     }
+    # a pyxcli.response.StringInterner shared by all the responses of the
+    # client; by default, every response interns its strings separately
+    value_interner = None
+    # the name of the XML parser backend (see pyxcli.helpers.xml_util) of
+    # the client's responses; by default, the module's default backend
+    xml_backend = None
+    # the size (in bytes) above which the raw data of a response is kept
+    # in a temporary file rather than in memory; by default, the
+    # transport's SPOOL_THRESHOLD
+    spool_threshold = None
+    # an executor (like concurrent.futures.ProcessPoolExecutor) in which
+    # large compressed responses are parsed, in shards; by default, they
+    # are parsed in the calling thread
+    parse_pool = None
+    # a pyxcli.cache.ResponseCache of the responses of read-only commands
+    # (it may be shared by several clients); by default, none
+    response_cache = None
+    # the pyxcli.retry.RetryPolicy by which idempotent commands are sent
+    # again after transient failures; by default, none (no retries)
+    retry_policy = None
+    # whether identical read-only commands sent at the same time (by
+    # different threads) share one round trip and one response (which the
+    # threads must then treat as read-only); by default, they do not
+    coalesce_reads = False
+    # the concurrent.futures.Executor in which execute_async runs commands
+    # (it may be shared by several clients); by default, every client has
+    # its own, with async_workers threads
+    executor = None
+    async_workers = 1
+    # the pyxcli.ratelimit.RateLimiter of the commands sent to the array
+    rate_limiter = None
+    # the options the client uses itself, and does not send (the tenant
+    # whose commands the scheduler queues fairly, if not the user)
+    LOCAL_OPTIONS = frozenset(["priority", "tenant"])
+    # the number of distinct sets of options whose serialized form is cached
+    OPTION_FRAGMENTS = 16
 
     def __init__(self, transport, user, password, populate=True):
         """
@@ -178,8 +443,18 @@ class XCLIClient(BaseXCLIClient):
         """
         BaseXCLIClient.__init__(self)
         self.transport = transport
-        self._lock = Lock()
+        # hands the connection to the commands waiting for it, by priority
+        # (see pyxcli.scheduler; its stats() tell how long they waited)
+        self.scheduler = PriorityScheduler()
         self._cmdindex = itertools.count(1)
+        self._option_fragments = OrderedDict()
+        self._fragments_lock = Lock()
+        # identifies the client's responses in a shared response cache
+        self._cache_scope = object()
+        self._retry_budget = None
+        self._flight = SingleFlight()
+        self._own_executor = None
+        self._executor_lock = Lock()
         if user is not None:
             self.set_options(user=user, password=password)
             if populate:
@@ -194,6 +469,17 @@ class XCLIClient(BaseXCLIClient):
         """
         self.transport.close()
         self.transport = ClosedTransport
+        if self._own_executor is not None:
+            # the commands left are failed by the closed transport
+            self._own_executor.shutdown(wait=False)
+
+    def _get_executor(self):
+        if self.executor is not None:
+            return self.executor
+        with self._executor_lock:
+            if self._own_executor is None:
+                self._own_executor = ThreadPoolExecutor(self.async_workers)
+            return self._own_executor
 
     def reconnect(self):
         """
@@ -263,72 +549,206 @@ class XCLIClient(BaseXCLIClient):
     def _dump_xcli(self, obj):
         if isinstance(obj, bool):
             return "yes" if obj else "no"
+        if isinstance(obj, basestring):
+            return obj
         return str(obj)
 
-    def _build_command(self, cmd, params, options, remote_target=None):
-        root = etree.Element("command", id=str(next(self._cmdindex)),
-                             type=cmd, close_on_return="no")
-        if remote_target:
-            root.attrib["remote_target"] = remote_target
-
+    def _serialize_options(self, options):
+        """
+        Returns the ``<option>`` elements of the given options, and the
+        same elements with the password masked (for logging)
+        """
+        dump = self._dump_xcli
+        fragments = []
+        masked = []
+        local = self.LOCAL_OPTIONS
         for k, v in options.items():
-            root.append(etree.Element("option", name=self._dump_xcli(k),
-                                      value=self._dump_xcli(v)))
-        for k, v in params.items():
-            root.append(etree.Element("argument", name=self._dump_xcli(k),
-                                      value=self._dump_xcli(v)))
-        data = etree.tostring(root)
-
-        if("password" in options):
-            data = data.decode()
-            data.replace(options["password"], "XXX")
-            data.encode()
-
-        anon = data
+            if k in local:
+                continue
+            name = _escape_attribute(dump(k))
+            fragment = _OPTION % (name, _escape_attribute(dump(v)))
+            fragments.append(fragment)
+            masked.append(_OPTION % (name, "XXX") if k == "password"
+                          else fragment)
+        text = u"".join(fragments)
+        if "password" not in options:
+            return text, text
+        return text, u"".join(masked)
+
+    def _options_fragment(self, options):
+        # the options seldom change (layered clients re-enter the same
+        # context on every command), so their serialized form is cached
+        # by their contents
+        try:
+            key = tuple(options.items())
+            hash(key)
+        except TypeError:
+            # unhashable option values
+            return self._serialize_options(options)
+        fragments = self._option_fragments
+        with self._fragments_lock:
+            fragment = fragments.pop(key, None)
+            if fragment is not None:
+                # most recently used
+                fragments[key] = fragment
+                return fragment
+        fragment = self._serialize_options(options)
+        with self._fragments_lock:
+            fragments.pop(key, None)
+            if len(fragments) >= self.OPTION_FRAGMENTS:
+                # least recently used
+                fragments.popitem(last=False)
+            fragments[key] = fragment
+        return fragment
 
-        xlog.debug("SEND %s" % (anon))
+    def _build_command(self, cmd, params, options, remote_target=None):
+        # the command is written the way ElementTree would write it, without
+        # building the elements
+        head = _COMMAND % (next(self._cmdindex), _escape_attribute(cmd))
+        if remote_target:
+            head += _REMOTE_TARGET % (_escape_attribute(remote_target),)
+        options_text, anon_options = self._options_fragment(options)
+        dump = self._dump_xcli
+        arguments = u"".join([
+            _ARGUMENT % (_escape_attribute(dump(k)),
+                         _escape_attribute(dump(v)))
+            for k, v in params.items()])
+        if options_text or arguments:
+            text = head + u">" + options_text + arguments + u"</command>"
+        else:
+            text = head + u" />"
+        data = text.encode("ascii", "xmlcharrefreplace")
+
+        if xlog.isEnabledFor(DEBUG):
+            if anon_options is not options_text:
+                text = u"".join((head, u">", anon_options, arguments,
+                                 u"</command>"))
+            xlog.debug("SEND %s", text)
         return data
 
-    def _build_response(self, rootelem):
+    def _send_options(self):
+        # only the options that were set are passed, so that transports
+        # not supporting them still work with the defaults
+        options = {}
+        if self.xml_backend is not None:
+            options["xml_backend"] = self.xml_backend
+        if self.spool_threshold is not None:
+            options["spool_threshold"] = self.spool_threshold
+        return options
+
+    def _build_response(self, rootelem, cmd=None, options=None):
 
         # "/command/aserver/@status"
         aserver = etree.xml_find(rootelem, "aserver", "status")
         if aserver != "DELIVERY_SUCCESSFUL":
             raise CommandFailedAServerError.instantiate(aserver, rootelem)
-        try:
-            # "/command/administrator/command"
-            cmdroot = etree.xml_find(rootelem, "administrator/command")
-        except ElementNotFoundException:
+        # "/command/administrator/command"
+        cmdroot = rootelem.find("administrator/command")
+        if cmdroot is None:
             # "/command/command/administrator/command"
             cmdroot = etree.xml_find(rootelem, "command/administrator/command")
 
         # "code/@value"
         code = etree.xml_find(cmdroot, "code", "value")
-        encoding = self.get_option("compress-output")
+        if options is None:
+            options = self._context()
+        encoding = options.get("compress-output")
 
         if code != "SUCCESS":
-            raise CommandExecutionError.instantiate(rootelem,
-                                                    cmdroot, encoding)
+            raise CommandExecutionError.instantiate(rootelem, cmdroot,
+                                                    encoding,
+                                                    self.xml_backend)
 
-        return XCLIResponse.instantiate(cmdroot, encoding)
+        return XCLIResponse.instantiate(cmdroot, encoding,
+                                        self.value_interner, cmd,
+                                        self.xml_backend, self.parse_pool)
 
     def execute_remote(self, remote_target, cmd, **kwargs):
         """
         Executes the given command (with the given arguments)
         on the given remote target of the connected machine
         """
-        data = self._build_command(cmd, kwargs, self._contexts[-1],
-                                   remote_target)
-        with self._lock:
-            rootelem = self.transport.send(data)
+        return self._execute_remote(remote_target, cmd, kwargs,
+                                    self._context())
+
+    def _execute_remote(self, remote_target, cmd, kwargs, options):
+        # the options are passed along explicitly, so that the commands of
+        # different threads (and of the clients layered over this one) do
+        # not share any mutable state
+        priority = kwargs.pop("_priority", None)
+        if priority is not None:
+            options = dict(options, priority=priority)
+        cache = self.response_cache
+        if cache is None:
+            return self._coalesce(remote_target, cmd, kwargs, options)
+        # responses are shared only by commands sent with the same options
+        # (the same user and password, among others)
+        local = self.LOCAL_OPTIONS
+        sent = tuple((k, v) for k, v in options.items() if k not in local)
+        return cache.execute(
+            self._cache_scope, sent, remote_target, cmd, kwargs,
+            lambda: self._coalesce(remote_target, cmd, kwargs, options),
+            self.command_registry)
+
+    def _coalesce(self, remote_target, cmd, kwargs, options):
+        # identical read-only commands in flight share a single round trip
+        read_only = self.command_registry.traits(cmd).read_only
+        if not self.coalesce_reads or not read_only:
+            return self._send_command(remote_target, cmd, kwargs, options)
         try:
-            return self._build_response(rootelem)
+            key = (remote_target, cmd, tuple(options.items()),
+                   frozenset(kwargs.items()))
+            hash(key)
+        except TypeError:
+            # unhashable arguments
+            return self._send_command(remote_target, cmd, kwargs, options)
+        return self._flight.do(
+            key,
+            lambda: self._send_command(remote_target, cmd, kwargs, options))
+
+    def _send_command(self, remote_target, cmd, kwargs, options):
+        data = self._build_command(cmd, kwargs, options, remote_target)
+        policy = self.retry_policy
+        if policy is None or not self.command_registry.traits(cmd).idempotent:
+            return self._send_data(data, cmd, options)
+        if self._retry_budget is None:
+            self._retry_budget = policy.new_budget()
+        # the same bytes are sent again
+        return policy.call(lambda: self._send_data(data, cmd, options),
+                           self._retry_budget, self._recover_transport)
+
+    def _recover_transport(self):
+        # a failure closes a single-endpoint transport, while multi-endpoint
+        # transports move to their next endpoint by themselves
+        if self.transport.is_connected():
+            return
+        try:
+            self.transport.reconnect()
+        except NotImplementedError:
+            pass
+        except (IOError, TransportError) as e:
+            xlog.debug("XCLIClient: could not reconnect: %s", e)
+
+    def _send_data(self, data, cmd, options):
+        limiter = self.rate_limiter
+        if limiter is not None:
+            limiter.acquire(self.command_registry.traits(cmd).read_only)
+        flow = options.get("tenant") or options.get("user")
+        with self.scheduler.slot(options.get("priority"), flow):
+            rootelem = self.transport.send(data, **self._send_options())
+        try:
+            response = self._build_response(rootelem, cmd, options)
         except ElementNotFoundException:
             xlog.exception("XCLIClient.execute")
             raise chained(CorruptResponse(rootelem))
         except Exception as e:
             xlog.exception("XCLIClient.execute")
+            if limiter is not None:
+                limiter.report(e)
             raise e
+        if limiter is not None:
+            limiter.report()
+        return response
 
     def get_user_client(self, user, password, populate=True):
         """
@@ -397,35 +817,69 @@ class LayeredXCLIClient(BaseXCLIClient):
         return self._client.is_connected()
 
     def execute_remote(self, target_name, cmd, **kwargs):
-        with self._client.options(**self._contexts[-1]):
-            return self._client.execute_remote(target_name, cmd, **kwargs)
+        return self._client._execute_remote(target_name, cmd, kwargs,
+                                            self._context())
+
+    def _execute_remote(self, target_name, cmd, kwargs, options):
+        return self._client._execute_remote(target_name, cmd, kwargs,
+                                            options)
+
+    def _context(self):
+        # the options of the underlying client, overridden by this one's;
+        # they are merged again only when either changes
+        parent = self._client._context()
+        own = self._own_options()
+        merged = getattr(self._local, "merged", None)
+        if merged is None or merged[0] is not parent or merged[1] is not own:
+            options = parent.copy()
+            options.update(own)
+            merged = self._local.merged = (parent, own, options)
+        return merged[2]
 
     @property
     def transport(self):
         return self._client.transport
 
+    @property
+    def catalog_cache(self):
+        return self._client.catalog_cache
+
+    @property
+    def command_registry(self):
+        return self._client.command_registry
+
+    def _catalog_holder(self, target):
+        return self._client._catalog_holder(target)
+
+    def _add_catalog(self, catalog):
+        self._client._add_catalog(catalog)
+
+    def _get_executor(self):
+        return self._client._get_executor()
+
 
 class XCLIClientForUser(LayeredXCLIClient):
 
     def __init__(self, client, user, password, populate=True):
+        # the command catalog is shared with the underlying client, and
+        # loaded only when needed (``populate`` is kept for compatibility)
         LayeredXCLIClient.__init__(self, client)
         self.set_options(user=user, password=password)
-        if populate:
-            self._populate_commands()
 
 
 class RemoteXCLIClient(LayeredXCLIClient):
 
     def __init__(self, client, target_name, populate=True):
+        # the command catalog of the target is shared by all the clients of
+        # the target, and loaded only when needed (``populate`` is kept for
+        # compatibility)
         LayeredXCLIClient.__init__(self, client)
         self._target_name = target_name
-        if populate:
-            self._populate_commands()
+        self._catalog_target = target_name
 
     def execute(self, cmd, **kwargs):
-        with self._client.options(**self._contexts[-1]):
-            return self._client.execute_remote(self._target_name,
-                                               cmd, **kwargs)
+        return self._client._execute_remote(self._target_name, cmd, kwargs,
+                                            self._context())
 
     def execute_remote(self, *args, **kwargs):
         # you can't chain clients, a limitation of the XIV machine
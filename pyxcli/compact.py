@@ -0,0 +1,400 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI compact response Module
+
+.. module: compact
+
+:Description: A compact, picklable representation of XCLI responses, for
+ caching them or sending them to other processes. A tree is kept as a table
+ of its distinct strings (tags, attribute names and values) and a flat
+ array of integers describing the elements in document order. Every element
+ starts with ``tag << 2 | kind``, and the rest depends on its kind:
+
+ * ``LEAF`` -- an element whose only content is a ``value`` attribute
+   (most XCLI fields): ``value``
+ * ``ROW`` -- an element (with an optional ``id``) whose subelements are
+   all leaves, like most of the records XCLI lists: ``id + 1`` (``0`` for
+   none), ``number of fields``, ``(tag, value) * fields``
+ * ``NODE`` -- any other element: ``text + 1`` (``0`` for none), ``number
+   of attributes``, ``(name, value) * attributes``, ``number of
+   subelements``, ``subelements...``
+
+ where strings are indexes into the table. Bunches are built directly out
+ of this representation, without going back to an XML tree.
+
+"""
+
+import struct
+import sys
+from array import array
+from munch import Munch
+from pyxcli.helpers import xml_util as etree
+
+try:
+    from pickle import PickleBuffer
+except ImportError:
+    PickleBuffer = None
+
+if hasattr(array, "tobytes"):
+    _array_to_bytes = array.tobytes
+    _array_from_bytes = array.frombytes
+else:
+    # Python 2
+    _array_to_bytes = array.tostring
+    _array_from_bytes = array.fromstring
+
+_MAGIC = b"XCT2"
+_HEADER = struct.Struct("<4scII")
+_SEPARATOR = u"\0"  # cannot appear in XML
+
+_NODE = 0
+_LEAF = 1
+_ROW = 2
+
+
+class CompactFormatError(ValueError):
+    pass
+
+
+def _typecode(largest):
+    for typecode in ("B", "H", "I", "L"):
+        if largest < 1 << (8 * array(typecode).itemsize):
+            return typecode
+    raise OverflowError("tree too large")
+
+
+def _bytes(buffer):
+    # bytes() of a memoryview is its repr on Python 2
+    if isinstance(buffer, memoryview):
+        return buffer.tobytes()
+    return bytes(buffer)
+
+
+def _has_text(element):
+    text = element.text
+    return bool(text and text.strip())
+
+
+def _is_leaf(element):
+    attrib = element.attrib
+    if len(element) or len(attrib) != 1 or "value" not in attrib:
+        return False
+    return not _has_text(element)
+
+
+def _is_row(element):
+    attrib = element.attrib
+    if not len(element) or _has_text(element):
+        return False
+    if attrib and (len(attrib) != 1 or "id" not in attrib):
+        return False
+    return all(_is_leaf(child) for child in element)
+
+
+class CompactTree(object):
+    """
+    A read-only XML tree, encoded as a string table and an array of
+    integers. ``label`` is an optional string stored along with the tree
+    (``XCLIResponse`` stores its command there).
+    """
+    __slots__ = ["strings", "codes", "label", "_code_list"]
+
+    def __init__(self, strings, codes, label=None):
+        self.strings = strings
+        self.codes = codes
+        self.label = label
+        self._code_list = None
+
+    # ====================================================== ENCODING =======
+    @classmethod
+    def from_element(cls, element, label=None):
+        index = {label or u"": 0}
+        intern = index.setdefault
+        codes = []
+        append = codes.append
+        extend = codes.extend
+
+        def encode(element):
+            attrib = element.attrib
+            tag = intern(element.tag, len(index)) << 2
+            if _is_leaf(element):
+                extend((tag | _LEAF, intern(attrib["value"], len(index))))
+                return
+            if _is_row(element):
+                ident = attrib.get("id")
+                extend((tag | _ROW,
+                        0 if ident is None else intern(ident, len(index)) + 1,
+                        len(element)))
+                for child in element:
+                    append(intern(child.tag, len(index)))
+                    append(intern(child.attrib["value"], len(index)))
+                return
+            has_text = _has_text(element)
+            extend((tag | _NODE,
+                    intern(element.text, len(index)) + 1 if has_text else 0,
+                    len(attrib)))
+            for name, value in attrib.items():
+                append(intern(name, len(index)))
+                append(intern(value, len(index)))
+            append(len(element))
+            for child in element:
+                encode(child)
+
+        encode(element)
+        strings = sorted(index, key=index.__getitem__)
+        return cls(strings, array(_typecode(max(codes)), codes), label)
+
+    # ====================================================== DECODING =======
+    def _codes(self):
+        if self._code_list is None:
+            self._code_list = self.codes.tolist()
+        return self._code_list
+
+    def to_element(self, element_factory=None):
+        """
+        Rebuilds the XML tree; its elements are made by ``element_factory``
+        (given a tag), ``Element`` by default
+        """
+        strings = self.strings
+        codes = self._codes()
+        Element = element_factory or etree.Element
+
+        def decode(position):
+            header = codes[position]
+            kind = header & 3
+            element = Element(strings[header >> 2])
+            if kind == _LEAF:
+                element.set("value", strings[codes[position + 1]])
+                return element, position + 2
+            if kind == _ROW:
+                ident, fields = codes[position + 1:position + 3]
+                if ident:
+                    element.set("id", strings[ident - 1])
+                position += 3
+                for i in range(fields):
+                    child = Element(strings[codes[position]])
+                    child.set("value", strings[codes[position + 1]])
+                    element.append(child)
+                    position += 2
+                return element, position
+            text, attributes = codes[position + 1:position + 3]
+            position += 3
+            for i in range(attributes):
+                element.set(strings[codes[position]],
+                            strings[codes[position + 1]])
+                position += 2
+            if text:
+                element.text = strings[text - 1]
+            children = codes[position]
+            position += 1
+            for i in range(children):
+                child, position = decode(position)
+                element.append(child)
+            return element, position
+
+        return decode(0)[0]
+
+    def _skip(self, position):
+        codes = self._codes()
+        kind = codes[position] & 3
+        if kind == _LEAF:
+            return position + 2
+        if kind == _ROW:
+            return position + 3 + 2 * codes[position + 2]
+        position += 3 + 2 * codes[position + 2]
+        children = codes[position]
+        position += 1
+        for i in range(children):
+            position = self._skip(position)
+        return position
+
+    def _find_child(self, position, tag):
+        """
+        Returns the position of the first subelement of the element at
+        ``position`` whose tag is ``tag``, or ``None``. The subelements of
+        leaves and rows have no positions of their own.
+        """
+        codes = self._codes()
+        if codes[position] & 3 != _NODE:
+            return None
+        strings = self.strings
+        position += 3 + 2 * codes[position + 2]
+        children = codes[position]
+        position += 1
+        for i in range(children):
+            if strings[codes[position] >> 2] == tag:
+                return position
+            position = self._skip(position)
+        return None
+
+    def find(self, path):
+        """
+        Returns the position of the element at ``path`` (tags separated
+        by ``/``, relative to the root element), or ``None``
+        """
+        position = 0
+        for tag in path.split("/"):
+            position = self._find_child(position, tag)
+            if position is None:
+                return None
+        return position
+
+    def count_children(self, position):
+        codes = self._codes()
+        kind = codes[position] & 3
+        if kind == _LEAF:
+            return 0
+        if kind == _ROW:
+            return codes[position + 2]
+        return codes[position + 3 + 2 * codes[position + 2]]
+
+    def children(self, position, intern=None):
+        """
+        Returns the tags and the Bunches (built just like
+        ``XCLIResponse.all`` builds them) of the subelements of the element
+        at ``position``
+        """
+        strings = self.strings
+        if intern is not None:
+            strings = [intern(string) for string in strings]
+        lookup = strings.__getitem__
+        codes = self._codes()
+        kind = codes[position] & 3
+        if kind == _LEAF:
+            return [], []
+        if kind == _ROW:
+            fields = codes[position + 3:position + 3 + 2 * codes[position + 2]]
+            return (list(map(lookup, fields[0::2])),
+                    list(map(lookup, fields[1::2])))
+
+        def bunch(position):
+            header = codes[position]
+            kind = header & 3
+            if kind == _LEAF:
+                return strings[codes[position + 1]], position + 2
+            current = Munch()
+            if kind == _ROW:
+                ident, fields = codes[position + 1:position + 3]
+                if ident and strings[ident - 1]:
+                    current["nextra_element_id"] = strings[ident - 1]
+                position += 3
+                end = position + 2 * fields
+                fields = codes[position:end]
+                current.update(zip(map(lookup, fields[0::2]),
+                                   map(lookup, fields[1::2])))
+                return current, end
+            attributes = codes[position + 2]
+            position += 3
+            attrib = {}
+            for i in range(attributes):
+                attrib[strings[codes[position]]] = strings[codes[position + 1]]
+                position += 2
+            if "value" in attrib:
+                return attrib["value"], self._skip_children(position)
+            if attrib.get("id"):
+                current["nextra_element_id"] = attrib["id"]
+            children = codes[position]
+            position += 1
+            for i in range(children):
+                tag = strings[codes[position] >> 2]
+                current[tag], position = bunch(position)
+            return current, position
+
+        tags = []
+        rows = []
+        position += 3 + 2 * codes[position + 2]
+        children = codes[position]
+        position += 1
+        for i in range(children):
+            tags.append(strings[codes[position] >> 2])
+            row, position = bunch(position)
+            rows.append(row)
+        return tags, rows
+
+    def _skip_children(self, position):
+        codes = self._codes()
+        children = codes[position]
+        position += 1
+        for i in range(children):
+            position = self._skip(position)
+        return position
+
+    # ================================================= SERIALIZATION =======
+    def _blob(self):
+        return _SEPARATOR.join(self.strings).encode("utf-8")
+
+    def _little_endian_codes(self):
+        codes = self.codes
+        if sys.byteorder != "little" and codes.itemsize > 1:
+            codes = array(codes.typecode, codes)
+            codes.byteswap()
+        return codes
+
+    def to_bytes(self):
+        blob = self._blob()
+        codes = self._little_endian_codes()
+        header = _HEADER.pack(_MAGIC, codes.typecode.encode("ascii"),
+                              len(codes), len(blob))
+        return header + _array_to_bytes(codes) + blob
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        try:
+            magic, typecode, count, size = _HEADER.unpack_from(data)
+        except struct.error:
+            raise CompactFormatError("truncated compact tree")
+        if magic != _MAGIC:
+            raise CompactFormatError("not a compact tree")
+        typecode = typecode.decode("ascii")
+        if typecode not in "BHIL":
+            raise CompactFormatError("bad typecode %r" % (typecode,))
+        start = _HEADER.size
+        end = start + count * array(typecode).itemsize
+        if len(data) != end + size:
+            raise CompactFormatError("truncated compact tree")
+        return cls._from_parts(typecode, data[start:end], data[end:])
+
+    @classmethod
+    def _from_parts(cls, typecode, raw_codes, blob):
+        codes = array(typecode)
+        _array_from_bytes(codes, _bytes(raw_codes))
+        if sys.byteorder != "little" and codes.itemsize > 1:
+            codes.byteswap()
+        strings = _bytes(blob).decode("utf-8").split(_SEPARATOR)
+        return cls(strings, codes, strings[0] or None)
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5 and PickleBuffer is not None:
+            # the codes and the strings may be sent out-of-band
+            return (_from_parts,
+                    (self.codes.typecode,
+                     PickleBuffer(self._little_endian_codes()),
+                     PickleBuffer(self._blob())))
+        return (_from_bytes, (self.to_bytes(),))
+
+    def __repr__(self):
+        return "<%s of %d strings and %d codes>" % (
+            self.__class__.__name__, len(self.strings), len(self.codes))
+
+
+# the unpicklers of compact trees (Python 2 cannot pickle classmethods)
+def _from_bytes(data):
+    return CompactTree.from_bytes(data)
+
+
+def _from_parts(typecode, raw_codes, blob):
+    return CompactTree._from_parts(typecode, raw_codes, blob)
@@ -52,7 +52,7 @@ class CommandExecutionError(XCLIError):
         return self.status
 
     @classmethod
-    def instantiate(cls, rootelem, cmdroot, encoding):
+    def instantiate(cls, rootelem, cmdroot, encoding, xml_backend=None):
         try:
             # "code/@value"
             code = etree.xml_find(cmdroot, "code", "value")
@@ -65,7 +65,8 @@ class CommandExecutionError(XCLIError):
             level = None
             status = "Unknown reason"
 
-        xcli_response = XCLIResponse.instantiate(cmdroot, encoding)
+        xcli_response = XCLIResponse.instantiate(cmdroot, encoding,
+                                                 xml_backend=xml_backend)
 
         if code in cls.KNOWN_CODES:
             concrete = cls.KNOWN_CODES[code]
@@ -73,7 +74,10 @@ class CommandExecutionError(XCLIError):
             concrete = cls.KNOWN_LEVELS[level]
         else:
             concrete = CommandFailedUnknownReason
-        return concrete(code, status, cmdroot, xcli_response)
+        # the error keeps the whole command element, return element included
+        # (a compressed one is decompressed back into it)
+        return concrete(code, status, xcli_response.response_etree,
+                        xcli_response)
 
     @classmethod
     def register(cls, *codes):
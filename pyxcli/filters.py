@@ -0,0 +1,167 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI response filters Module
+
+.. module: filters
+
+:Description: Simple predicates that are evaluated on the raw XML elements of
+ an XCLI response, before any Bunch is built for them. Pass them to
+ ``XCLIResponse.all`` (or ``as_dict``) using the ``where`` argument::
+
+    from pyxcli.filters import startswith, nonempty
+
+    client.cmd.vol_list().all(where=nonempty("sg_name"))
+    client.cmd.snapshot_list(vol="v1").all(where=startswith("name", "tst_"))
+
+ A sequence of predicates matches only if all of its predicates match.
+
+"""
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+class Predicate(object):
+    """
+    Base class of the response predicates. A predicate tests the value of
+    a single field (the ``value`` attribute of the subelement named
+    ``field``). Calling a predicate with an XML element tests the element;
+    ``test`` may be used to test an already extracted value, and
+    ``matches`` to test an already built Bunch.
+    """
+    __slots__ = ["field"]
+
+    def __init__(self, field):
+        self.field = field
+
+    def test(self, value):
+        raise NotImplementedError()
+
+    def __call__(self, element):
+        subelement = element.find(self.field)
+        if subelement is None:
+            return self.test(None)
+        return self.test(subelement.get('value'))
+
+    def matches(self, record):
+        value = getattr(record, self.field, None)
+        if not isinstance(value, basestring):
+            value = None
+        return self.test(value)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.field)
+
+
+class Equals(Predicate):
+    __slots__ = ["value"]
+
+    def __init__(self, field, value):
+        Predicate.__init__(self, field)
+        self.value = value
+
+    def test(self, value):
+        return value == self.value
+
+    def __repr__(self):
+        return "%s(%r, %r)" % (self.__class__.__name__, self.field,
+                               self.value)
+
+
+class StartsWith(Predicate):
+    __slots__ = ["prefix"]
+
+    def __init__(self, field, prefix):
+        Predicate.__init__(self, field)
+        self.prefix = prefix
+
+    def test(self, value):
+        return value is not None and value.startswith(self.prefix)
+
+    def __repr__(self):
+        return "%s(%r, %r)" % (self.__class__.__name__, self.field,
+                               self.prefix)
+
+
+class NonEmpty(Predicate):
+    __slots__ = []
+
+    def test(self, value):
+        return bool(value)
+
+
+class InSet(Predicate):
+    __slots__ = ["values"]
+
+    def __init__(self, field, values):
+        Predicate.__init__(self, field)
+        self.values = frozenset(values)
+
+    def test(self, value):
+        return value in self.values
+
+    def __repr__(self):
+        return "%s(%r, %r)" % (self.__class__.__name__, self.field,
+                               sorted(self.values))
+
+
+class AllOf(object):
+    """A conjunction of predicates"""
+    __slots__ = ["predicates"]
+
+    def __init__(self, predicates):
+        self.predicates = tuple(predicates)
+
+    def __call__(self, element):
+        for predicate in self.predicates:
+            if not predicate(element):
+                return False
+        return True
+
+    def matches(self, record):
+        for predicate in self.predicates:
+            if not predicate.matches(record):
+                return False
+        return True
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, list(self.predicates))
+
+
+equals = Equals
+startswith = StartsWith
+nonempty = NonEmpty
+in_set = InSet
+
+
+def compile_where(where):
+    """
+    Turns the ``where`` argument of ``XCLIResponse.all`` into a single
+    callable accepting an XML element, or ``None`` if there is nothing
+    to filter by.
+    """
+    if where is None:
+        return None
+    if callable(where):
+        return where
+    predicates = list(where)
+    if not predicates:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+    return AllOf(predicates)
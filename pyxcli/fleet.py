@@ -0,0 +1,190 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI fleet Module
+
+.. module: fleet
+
+:Description: Runs commands on many arrays at once. A ``FleetClient`` gets
+ its connections from a client pool (``xcli_ssl_pool`` by default), and
+ runs a command on all its arrays concurrently; the results are yielded
+ as they come, tagged with the name of their array::
+
+    from pyxcli.fleet import FleetClient
+
+    arrays = {"array1": "192.168.1.102", "array2": ["10.0.0.1", "10.0.0.2"]}
+    with FleetClient(arrays, "admin", "mypass", timeout=60) as fleet:
+        for result in fleet.execute("vol_list"):
+            if result.ok:
+                print(result.array, len(result.response))
+            else:
+                print(result.array, "failed:", result.error)
+
+ An array that cannot be reached, or whose command fails or does not
+ complete in time, only fails its own result.
+
+"""
+
+import time
+from collections import namedtuple
+from threading import BoundedSemaphore
+from pyxcli.errors import XCLIError
+from pyxcli.pool import xcli_ssl_pool
+
+try:
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from concurrent.futures import TimeoutError as FuturesTimeoutError
+except ImportError:
+    # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+class FleetTimeoutError(XCLIError):
+    """The command of an array did not complete in time"""
+    pass
+
+
+class FleetResult(namedtuple("FleetResult", "array,response,error,elapsed")):
+    """
+    The outcome of a command on one array: its ``response``, or the
+    ``error`` it failed with, and the time (in seconds) it took
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class FleetReport(object):
+    """The outcomes of a command on all the arrays of a fleet"""
+
+    def __init__(self, results):
+        self.results = dict((result.array, result) for result in results)
+
+    @property
+    def responses(self):
+        """The responses of the arrays on which the command succeeded"""
+        return dict((array, result.response)
+                    for array, result in self.results.items() if result.ok)
+
+    @property
+    def failures(self):
+        """The errors of the arrays on which the command failed"""
+        return dict((array, result.error)
+                    for array, result in self.results.items()
+                    if not result.ok)
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def __repr__(self):
+        return "<%s: %d succeeded, %d failed>" % (
+            self.__class__.__name__, len(self.responses), len(self.failures))
+
+
+class FleetClient(object):
+    """
+    :param arrays: a mapping of array names to their endpoints (an address,
+                   or a list of addresses), or a list of addresses (which
+                   then name the arrays)
+    :param pool: the ``XCLIClientPool`` of the connections
+    :param max_workers: the number of commands in flight, on all arrays
+    :param per_array: the number of commands in flight on one array
+    :param timeout: the time (in seconds) after which the commands that
+                    have not completed are reported as failed
+    """
+
+    def __init__(self, arrays, user, password, pool=xcli_ssl_pool,
+                 max_workers=32, per_array=1, timeout=None):
+        if ThreadPoolExecutor is None:
+            raise NotImplementedError("FleetClient requires the futures "
+                                      "package on Python 2")
+        if not isinstance(arrays, dict):
+            arrays = dict((array, array) for array in arrays)
+        self.arrays = dict(arrays)
+        self.user = user
+        self.password = password
+        self.pool = pool
+        self.timeout = timeout
+        self._limits = dict((array, BoundedSemaphore(per_array))
+                            for array in self.arrays)
+        self._executor = ThreadPoolExecutor(max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, v, tb):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def client(self, array):
+        """Returns a client of the given array (from the pool)"""
+        endpoints = self.arrays[array]
+        if isinstance(endpoints, basestring):
+            endpoints = [endpoints]
+        return self.pool.get(self.user, self.password, list(endpoints))
+
+    def _run(self, array, cmd, kwargs):
+        started = time.time()
+        try:
+            with self._limits[array]:
+                response = self.client(array).execute(cmd, **kwargs)
+        except Exception as e:
+            return FleetResult(array, None, e, time.time() - started)
+        return FleetResult(array, response, None, time.time() - started)
+
+    def execute(self, cmd, arrays=None, **kwargs):
+        """
+        Runs the command on all the arrays (or on the given ones), and
+        yields their ``FleetResult`` as they complete. When the fleet's
+        timeout expires, the results of the arrays left are
+        ``FleetTimeoutError`` failures.
+        """
+        if arrays is None:
+            arrays = sorted(self.arrays)
+        started = time.time()
+        futures = dict((self._executor.submit(self._run, array, cmd, kwargs),
+                        array) for array in arrays)
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, self.timeout):
+                pending.discard(future)
+                yield future.result()
+        except FuturesTimeoutError:
+            elapsed = time.time() - started
+            for future in pending:
+                array = futures[future]
+                if future.done():
+                    yield future.result()
+                    continue
+                # the commands that were sent are left to complete
+                future.cancel()
+                yield FleetResult(array, None, FleetTimeoutError(
+                    "%s did not complete in %ss" % (cmd, self.timeout)),
+                    elapsed)
+
+    def gather(self, cmd, arrays=None, **kwargs):
+        """Runs the command on all the arrays, and returns a
+        ``FleetReport``"""
+        return FleetReport(self.execute(cmd, arrays, **kwargs))
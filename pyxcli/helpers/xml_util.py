@@ -14,19 +14,51 @@
 # limitations under the License.
 ##############################################################################
 
+""" IBM XCLI XML utility Module
+
+.. module: xml_util
+
+:Description: All the XML parsing of pyxcli goes through this module, which
+ delegates it to a parser backend: ``"etree"`` (the standard library's,
+ always available) or ``"lxml"`` (lxml's C parser, used by default when lxml
+ is installed). Whatever the backend, malformed XML raises
+ ``XMLSyntaxError``. The default backend may be replaced with
+ ``set_default_backend``, and a client may use a backend of its own::
+
+    client.xml_backend = "etree"
+
+"""
+
 import xml.etree.ElementTree as et
 import xml.etree.cElementTree as cet
 from contextlib import contextmanager
+from xml.parsers import expat
 from xml.parsers.expat import ExpatError
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
 try:
     basestring
 except NameError:
     basestring = str
 
+try:
+    unicode
+except NameError:
+    unicode = str
+
 
 Element = cet.Element
-tostring = cet.tostring
+
+
+def tostring(element, *args, **kwargs):
+    if lxml_etree is not None and isinstance(element, lxml_etree._Element):
+        return lxml_etree.tostring(element, *args, **kwargs)
+    return cet.tostring(element, *args, **kwargs)
+
 
 class XMLException(Exception):
     pass
@@ -106,24 +138,44 @@ class XMLSyntaxError(XMLException):
             self.lineno, str_brief(self.original, lim=15), self.msg)
 
 
+def _syntaxError(original, e):
+    return XMLSyntaxError(original, e.args[0], e.lineno)
+
+
 @contextmanager
-def _translateExceptions(original):
+def _translateExceptions(original, backend=None):
+    errors = get_backend(backend).parse_errors
     try:
         yield None
-    except ExpatError as e:
-        raise XMLSyntaxError(original, e.args[0], e.lineno)
-    except (cet.ParseError, et.ParseError) as e:
-        raise XMLSyntaxError(original, e.args[0], e.lineno)
+    except errors as e:
+        raise _syntaxError(original, e)
 
 
-def fromstring(text):
-    with _translateExceptions(None):
-        return cet.fromstring(text)
+# fromstring and the incremental parsers are used for every response; they
+# translate exceptions inline, as it is cheaper than _translateExceptions
+def fromstring(text, backend=None):
+    backend = get_backend(backend)
+    try:
+        return backend.fromstring(text)
+    except backend.parse_errors as e:
+        raise _syntaxError(None, e)
+
 
+def parse(obj, backend=None):
+    backend = get_backend(backend)
+    with _translateExceptions(None, backend):
+        return backend.parse(obj)
 
-def parse(obj):
-    with _translateExceptions(None):
-        return cet.parse(obj)
+
+def iterparse(source, events=("end",), backend=None):
+    """
+    Yields the ``(event, element)`` pairs of the given file (name or
+    object) as it is being parsed
+    """
+    backend = get_backend(backend)
+    with _translateExceptions(None, backend):
+        for item in backend.iterparse(source, events):
+            yield item
 
 
 def xml_find(elem, path, attrib=None):
@@ -138,10 +190,46 @@ def xml_find(elem, path, attrib=None):
         return elem2.attrib[attrib]
 
 # =========================================================================
-# TerminationDetectingXMLParser
+# Parser backends
 # =========================================================================
 
 
+class XMLBackend(object):
+    """
+    A parser implementation. ``parse_errors`` are the exceptions it raises
+    on malformed XML (having ``lineno`` attributes); they are translated
+    to ``XMLSyntaxError``.
+    """
+    name = None
+    parse_errors = ()
+
+    def fromstring(self, text):
+        raise NotImplementedError()
+
+    def parse(self, source):
+        raise NotImplementedError()
+
+    def iterparse(self, source, events):
+        raise NotImplementedError()
+
+    def incremental_parser(self):
+        """
+        Returns a new incremental parser, having ``feed`` and ``close``
+        (returning the root element)
+        """
+        raise NotImplementedError()
+
+    def feed_parser(self):
+        """
+        Returns a new incremental parser that also has
+        ``root_element_closed`` (see ``TerminationDetectingXMLParser``)
+        """
+        raise NotImplementedError()
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self.name)
+
+
 class _TerminationDetectingTreeBuilder(et.TreeBuilder):
 
     def __init__(self):
@@ -162,7 +250,194 @@ class _TerminationDetectingTreeBuilder(et.TreeBuilder):
         return element
 
 
-class TerminationDetectingXMLParser(object):
+class _ElementTreeFeedParser(object):
+
+    def __init__(self):
+        self.tree_builder = _TerminationDetectingTreeBuilder()
+        self.xml_tree_builder = et.XMLParser(target=self.tree_builder)
+
+    def feed(self, chunk):
+        self.xml_tree_builder.feed(chunk)
+
+    def close(self):
+        tree = self.xml_tree_builder.close()
+        if et.Element is cet.Element:
+            return tree
+        # python 2: convert the pure-python elements
+        return cet.fromstring(cet.tostring(tree))
+
+    @property
+    def root_element_closed(self):
+        return self.tree_builder.root_element_closed
+
+
+class _ElementTreePullParser(object):
+    # faster than _ElementTreeFeedParser, as the tree is built in C
+
+    def __init__(self):
+        self.parser = et.XMLPullParser(events=("start", "end"))
+        self.root_element = None
+        self.root_element_closed = False
+
+    def feed(self, chunk):
+        parser = self.parser
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if self.root_element is None:
+                self.root_element = element
+            elif element is self.root_element:
+                self.root_element_closed = True
+
+    def close(self):
+        self.parser.close()
+        return self.root_element
+
+
+class ElementTreeBackend(XMLBackend):
+    name = "etree"
+    parse_errors = (ExpatError, cet.ParseError, et.ParseError)
+
+    def fromstring(self, text):
+        return cet.fromstring(text)
+
+    def parse(self, source):
+        return cet.parse(source)
+
+    def iterparse(self, source, events):
+        return cet.iterparse(source, events)
+
+    def incremental_parser(self):
+        return cet.XMLParser()
+
+    def feed_parser(self):
+        if hasattr(et, "XMLPullParser"):
+            return _ElementTreePullParser()
+        return _ElementTreeFeedParser()
+
+
+class _LxmlFeedParser(object):
+    # lxml holds back an incomplete token (like "<c<") until more data
+    # comes, without an error; when the data comes from a socket, more data
+    # may never come. The chunks are also scanned by expat (without
+    # building anything), which rejects malformed data as soon as it is fed,
+    # just as the etree backend does.
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.checker = expat.ParserCreate()
+        self.root_element_closed = False
+
+    def feed(self, chunk):
+        if not self.root_element_closed:
+            self.checker.Parse(chunk, False)
+        parser = self.parser
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.getparent() is None:
+                self.root_element_closed = True
+
+    def close(self):
+        return self.parser.close()
+
+
+class LxmlBackend(XMLBackend):
+    """
+    lxml's parser. Entities are not resolved (as with the standard
+    library), and large text nodes are allowed.
+    """
+    name = "lxml"
+    parse_errors = (lxml_etree.XMLSyntaxError, ExpatError) \
+        if lxml_etree else ()
+
+    def _parser(self):
+        # lxml parsers may not be shared between threads
+        return lxml_etree.XMLParser(resolve_entities=False, huge_tree=True)
+
+    def fromstring(self, text):
+        if isinstance(text, unicode):
+            # lxml rejects unicode strings having an encoding declaration
+            text = text.encode("utf-8")
+        return lxml_etree.fromstring(text, self._parser())
+
+    def parse(self, source):
+        return lxml_etree.parse(source, self._parser())
+
+    def iterparse(self, source, events):
+        return lxml_etree.iterparse(source, events, resolve_entities=False,
+                                    huge_tree=True)
+
+    def incremental_parser(self):
+        return self._parser()
+
+    def feed_parser(self):
+        return _LxmlFeedParser(lxml_etree.XMLPullParser(
+            events=("end",), resolve_entities=False, huge_tree=True))
+
+
+_backends = {"etree": ElementTreeBackend()}
+if lxml_etree is not None:
+    _backends["lxml"] = LxmlBackend()
+_default_backend = _backends["lxml" if lxml_etree is not None else "etree"]
+
+
+def available_backends():
+    """Returns the names of the backends that may be used here"""
+    return sorted(_backends)
+
+
+def get_backend(backend=None):
+    """
+    Returns the backend of the given name (``None`` stands for the default
+    backend); ``XMLBackend`` objects are returned as they are
+    """
+    if backend is None:
+        return _default_backend
+    if isinstance(backend, XMLBackend):
+        return backend
+    try:
+        return _backends[backend]
+    except KeyError:
+        raise ValueError("XML backend %r is not available (available: %s)"
+                         % (backend, ", ".join(available_backends())))
+
+
+def set_default_backend(backend):
+    """Sets the backend used when none is given; returns the previous one"""
+    global _default_backend
+    previous = _default_backend
+    _default_backend = get_backend(backend)
+    return previous
+
+
+# =========================================================================
+# TerminationDetectingXMLParser
+# =========================================================================
+
+
+class IncrementalXMLParser(object):
+    """An XML parser which you can feed from a stream"""
+
+    def __init__(self, backend=None):
+        self.backend = get_backend(backend)
+        self.parser = self._create_parser()
+
+    def _create_parser(self):
+        return self.backend.incremental_parser()
+
+    def feed(self, chunk):
+        try:
+            self.parser.feed(chunk)
+        except self.backend.parse_errors as e:
+            raise _syntaxError(chunk, e)
+
+    def close(self):
+        try:
+            return self.parser.close()
+        except self.backend.parse_errors as e:
+            raise _syntaxError(None, e)
+
+
+class TerminationDetectingXMLParser(IncrementalXMLParser):
 
     """An XML parser which you can feed from a stream; knows automatically
     when the first tag was closed"
@@ -192,19 +467,50 @@ class TerminationDetectingXMLParser(object):
     >>>
     """
 
-    def __init__(self):
-        self.tree_builder = _TerminationDetectingTreeBuilder()
-        self.xml_tree_builder = et.XMLParser(target=self.tree_builder)
+    def __init__(self, backend=None):
+        IncrementalXMLParser.__init__(self, backend)
+        self._first_chunk = None
+        self._document = None
+
+    def _create_parser(self):
+        # most responses arrive in a single chunk, which is parsed at once
+        # (in C); the incremental parser is created for the others only
+        return None
+
+    def _parse_whole(self, chunk):
+        if chunk.rstrip()[-1:] not in (b">", u">"):
+            return None
+        try:
+            return self.backend.fromstring(chunk)
+        except self.backend.parse_errors:
+            return None
 
     def feed(self, chunk):
-        with _translateExceptions(chunk):
-            self.xml_tree_builder.feed(chunk)
+        if self.parser is None:
+            if self._first_chunk is None:
+                self._first_chunk = chunk
+                self._document = self._parse_whole(chunk)
+                if self._document is not None:
+                    return
+                first_chunk = None
+            else:
+                # data following a whole document (an error, as before)
+                first_chunk = self._first_chunk
+                self._document = None
+            self.parser = self.backend.feed_parser()
+            if first_chunk is not None:
+                IncrementalXMLParser.feed(self, first_chunk)
+        IncrementalXMLParser.feed(self, chunk)
 
     def close(self):
-        with _translateExceptions(None):
-            tree = self.xml_tree_builder.close()
-            return fromstring(tostring(tree))
+        if self._document is not None:
+            return self._document
+        if self.parser is None:
+            self.parser = self.backend.feed_parser()
+        return IncrementalXMLParser.close(self)
 
     @property
     def root_element_closed(self):
-        return self.tree_builder.root_element_closed
+        if self.parser is None:
+            return self._document is not None
+        return self.parser.root_element_closed
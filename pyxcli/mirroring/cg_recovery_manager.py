@@ -16,6 +16,7 @@
 
 from logging import getLogger
 from pyxcli import XCLI_DEFAULT_LOGGER
+from pyxcli.filters import startswith
 from pyxcli.mirroring.recovery_manager import \
     RecoveryManager, NoLastReplicatedSnapshotRecoveryException, CHAR_LIMIT, \
     InsufficientSnapshotSpaceRecoveryException
@@ -94,11 +95,9 @@ class CGRecoveryManager(RecoveryManager):
 
     def get_target_group_test_snap_groups(self, group_id,
                                           test_snapshot_prefix):
-        snap_groups = list()
-        for snap_group in self.xcli_client.cmd.snap_group_list(cg=group_id):
-            if snap_group.name.startswith(test_snapshot_prefix):
-                snap_groups.append(snap_group)
-        return snap_groups
+        snap_groups = self.xcli_client.cmd.snap_group_list(cg=group_id)
+        return list(snap_groups.all(
+            where=startswith('name', test_snapshot_prefix)))
 
     # ============================================ REVERSE REPLICATION =======
     # ================================================= MIRROR ACTIONS =======
@@ -181,9 +180,10 @@ class CGRecoveryManager(RecoveryManager):
         self.xcli_client.cmd.snap_group_delete(snap_group=snap_group_name)
 
     def _get_last_replicated_snapshot_name(self, cg):
-        for snap_group in self.xcli_client.cmd.snap_group_list(cg=cg):
-            if snap_group.name.startswith('last-replicated-'):
-                return snap_group.name
+        snap_groups = self.xcli_client.cmd.snap_group_list(cg=cg)
+        for snap_group in snap_groups.all(
+                where=startswith('name', 'last-replicated-')):
+            return snap_group.name
         raise NoLastReplicatedSnapshotRecoveryException()
 
     def verify_snapshot_space_for_resource(self, group_id):
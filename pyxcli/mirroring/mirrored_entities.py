@@ -17,6 +17,7 @@
 from logging import getLogger
 from munch import Munch
 from pyxcli import XCLI_DEFAULT_LOGGER
+from pyxcli.filters import nonempty
 
 CG = "cg"
 
@@ -105,11 +106,11 @@ class MirroredEntities(object):
 
     def get_snapshots_by_snap_groups(self):
         snap_groups = dict()
-        for volume in self.get_volume_by_name_map().values():
-            if volume.sg_name != '':
-                if volume.sg_name not in snap_groups:
-                    snap_groups[volume.sg_name] = list()
-                snap_groups[volume.sg_name].append(volume.name)
+        volumes = self.xcli_client.cmd.vol_list()
+        for volume in volumes.all(where=nonempty('sg_name')):
+            if volume.sg_name not in snap_groups:
+                snap_groups[volume.sg_name] = list()
+            snap_groups[volume.sg_name].append(volume.name)
         return snap_groups
 
     def get_host_port_names(self, host_name):
@@ -155,13 +156,23 @@ class MirroredCachedEntities(MirroredEntities):
     def get_mirror_resources_by_name_map(self):
         return self._cached_xcli_mirrors
 
+    def _cache_volume_indexes(self):
+        """ builds both volume caches out of a single vol_list """
+        volumes = self.xcli_client.cmd.vol_list()
+        # the by-name map stays a dict, as get_volume_by_name_map returns
+        self._cache['xcli_volumes'] = dict(volumes.index('name'))
+        snap_groups = dict()
+        for sg_name, snapshots in volumes.group_by('sg_name').items():
+            if sg_name != '':
+                snap_groups[sg_name] = [snapshot.name
+                                        for snapshot in snapshots]
+        self._cache['snapshots_by_snap_groups'] = snap_groups
+
     @property
     def _cached_xcli_volumes(self):
         cache_key = 'xcli_volumes'
         if cache_key not in self._cache:
-            vol_by_name = super(MirroredCachedEntities,
-                                self).get_volume_by_name_map()
-            self._cache[cache_key] = vol_by_name
+            self._cache_volume_indexes()
         return self._cache[cache_key]
 
     def get_volume_by_name_map(self):
@@ -198,8 +209,7 @@ class MirroredCachedEntities(MirroredEntities):
     def _cached_snapshots_by_snap_groups(self):
         cache_key = 'snapshots_by_snap_groups'
         if cache_key not in self._cache:
-            self._cache[cache_key] = super(
-                MirroredCachedEntities, self).get_snapshots_by_snap_groups()
+            self._cache_volume_indexes()
         return self._cache[cache_key]
 
     def get_snapshots_by_snap_groups(self):
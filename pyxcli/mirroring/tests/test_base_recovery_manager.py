@@ -16,6 +16,8 @@
 
 import unittest
 from mock import MagicMock
+from pyxcli.filters import compile_where
+from pyxcli.response import ResponseIndex
 from pyxcli.mirroring.mirrored_entities import \
     MirroredCachedEntities
 from pyxcli.mirroring.errors import NoMirrorDefinedError
@@ -35,6 +37,12 @@ class CIMCLIResponse(object):
     def __len__(self):
         return len(self.generic_cim_objects)
 
+    def all(self, element_type=None, response_path=None, where=None):
+        predicate = compile_where(where)
+        for cim_obj in self.generic_cim_objects:
+            if predicate is None or predicate.matches(cim_obj):
+                yield cim_obj
+
     @property
     def as_single_element(self):
         return (self.generic_cim_objects)[0]
@@ -43,6 +51,17 @@ class CIMCLIResponse(object):
     def as_list(self):
         return self.generic_cim_objects
 
+    def index(self, key_name):
+        return ResponseIndex(key_name, self.as_dict(key_name))
+
+    def group_by(self, key_name):
+        groups = {}
+        for cim_obj in self.generic_cim_objects:
+            groups.setdefault(getattr(cim_obj, key_name), []).append(cim_obj)
+        return ResponseIndex(key_name, dict((value, tuple(cim_objs))
+                                            for value, cim_objs
+                                            in groups.items()))
+
     def as_dict(self, key_name):
         key_name = str(key_name)
         ret_dict = {}
@@ -149,6 +168,15 @@ class TestBaseRecoveryManager(unittest.TestCase):
         return_value = CIMCLIResponse([])
         self.xcli_client_mock.cmd.cluster_list.return_value = return_value
 
+    def test_by_name_maps_are_dicts(self):
+        entities = self.mirrored_entities
+        for by_name in (entities.get_volume_by_name_map(),
+                        entities.get_pool_by_name_map(),
+                        entities.get_hosts_by_name_map()):
+            self.assertIsInstance(by_name, dict)
+        self.assertEqual(sorted(entities.get_volume_by_name_map()),
+                         ["vol1", "vol2"])
+
     def test_verify_readiness_for_failover(self):
         self.assertRaises(
             NoMirrorDefinedError,
@@ -16,6 +16,7 @@
 
 from logging import getLogger
 from pyxcli import XCLI_DEFAULT_LOGGER
+from pyxcli.filters import startswith
 from pyxcli.mirroring.recovery_manager import \
     RecoveryManager, CHAR_LIMIT, \
     InsufficientSnapshotSpaceRecoveryException, \
@@ -46,11 +47,9 @@ class VolumeRecoveryManager(RecoveryManager):
         return False
 
     def get_volume_snapshots_by_prefix(self, volume, test_snapshot_prefix):
-        snapshots = list()
-        for snapshot in self.xcli_client.cmd.snapshot_list(vol=volume):
-            if snapshot.name.startswith(test_snapshot_prefix):
-                snapshots.append(snapshot)
-        return snapshots
+        snapshots = self.xcli_client.cmd.snapshot_list(vol=volume)
+        return list(snapshots.all(
+            where=startswith('name', test_snapshot_prefix)))
 
     def _unmap_and_delete_test_snapshots(self, device_id,
                                          test_snapshot_prefix):
@@ -163,9 +162,10 @@ class VolumeRecoveryManager(RecoveryManager):
             name=snapshot_name)
 
     def _get_last_replicated_snapshot_name(self, volume):
-        for snapshot in self.xcli_client.cmd.snapshot_list(vol=volume):
-            if snapshot.name.startswith('last-replicated-'):
-                return snapshot.name
+        snapshots = self.xcli_client.cmd.snapshot_list(vol=volume)
+        for snapshot in snapshots.all(
+                where=startswith('name', 'last-replicated-')):
+            return snapshot.name
         raise NoLastReplicatedSnapshotRecoveryException()
 
     def verify_snapshot_space_for_resource(self, device_id):
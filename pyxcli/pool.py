@@ -25,7 +25,9 @@
 import time
 from collections import namedtuple
 from logging import getLogger
+from threading import Lock
 from pyxcli.client import XCLIClient
+from pyxcli.ratelimit import RateLimiter
 from pyxcli import XCLI_DEFAULT_LOGGER
 
 
@@ -45,7 +47,12 @@ class XCLIClientPool(object):
     transport at any point of time).
 
     The pool can be configured with a time-to-live for connections, so
-    that connections older than this TTL will be flushed and reopened.
+    that connections older than this TTL will be flushed and reopened,
+    and with a ``pyxcli.cache.ResponseCache`` and a
+    ``concurrent.futures.Executor`` (for ``execute_async``) shared by its
+    clients. The commands sent to every system can be rate limited: the
+    ``pyxcli.ratelimit.RateLimiter`` arguments of a system are those of
+    ``rate_limits`` (by the system's endpoints), or ``rate_limit``.
 
     To use the pull, import one of the built-in pool objects,
     ``xcli_ssl_pool`` and use the ``get`` method. For example::
@@ -57,34 +64,54 @@ class XCLIClientPool(object):
 
     """
 
-    def __init__(self, connector, time_to_live=10 * 60):
+    def __init__(self, connector, time_to_live=10 * 60, response_cache=None,
+                 executor=None, rate_limit=None, rate_limits=None):
         self.connector = connector
         self.time_to_live = time_to_live
+        self.response_cache = response_cache
+        self.executor = executor
+        self.rate_limit = rate_limit
+        self.rate_limits = dict(rate_limits or {})
         self.pool = {}
+        self._lock = Lock()
+        # endpoint -> the lock held while connecting to it, so that threads
+        # asking for the same system at the same time open one connection
+        self._connecting = {}
 
-    def clear(self):
-        for entry in self.pool.values():
+    def _rate_limiter(self, endpoints):
+        arguments = self.rate_limit
+        for ep in endpoints:
+            if ep in self.rate_limits:
+                arguments = self.rate_limits[ep]
+                break
+        if arguments is None:
+            return None
+        return RateLimiter(**arguments)
+
+    def _close(self, entries):
+        for entry in entries:
             entry.client.close()
-        self.pool.clear()
+
+    def clear(self):
+        with self._lock:
+            entries = list(self.pool.values())
+            self.pool.clear()
+        self._close(entries)
 
     def flush(self):
         """remove all stale clients from pool"""
         now = time.time()
-        to_remove = []
-        for k, entry in self.pool.items():
-            if entry.timestamp < now:
-                entry.client.close()
-                to_remove.append(k)
-        for k in to_remove:
-            del self.pool[k]
-
-    def get(self, user, password, endpoints):
-        """Gets an existing connection or opens a new one
-        """
+        with self._lock:
+            stale = [k for k, entry in self.pool.items()
+                     if entry.timestamp < now]
+            entries = [self.pool.pop(k) for k in stale]
+        self._close(entries)
+
+    def _find(self, user, password, endpoints, stale):
+        # returns the client of the user over an existing connection (or
+        # None), moving the stale entries to ``stale``; called with the
+        # lock held
         now = time.time()
-        # endpoints can either be str or list
-        if isinstance(endpoints, str):
-            endpoints = [endpoints]
         for ep in endpoints:
             if ep not in self.pool:
                 continue
@@ -94,19 +121,64 @@ class XCLIClientPool(object):
                     xlog.debug("XCLIClientPool: clearing stale client %s",
                                ep)
                     del self.pool[ep]
-                    entry.client.close()
+                    stale.append(entry)
                     continue
             user_client = entry.user_clients.get(user, None)
             if not user_client or not user_client.is_connected():
                 user_client = entry.client.get_user_client(user, password)
                 entry.user_clients[user] = user_client
             return user_client
+        return None
 
+    def _connect_lock(self, endpoints):
+        # called with the lock held
+        for ep in endpoints:
+            if ep in self._connecting:
+                return self._connecting[ep]
+        lock = Lock()
+        for ep in endpoints:
+            self._connecting[ep] = lock
+        return lock
+
+    def get(self, user, password, endpoints):
+        """Gets an existing connection or opens a new one
+        """
+        # endpoints can either be str or list
+        if isinstance(endpoints, str):
+            endpoints = [endpoints]
+        stale = []
+        try:
+            with self._lock:
+                user_client = self._find(user, password, endpoints, stale)
+                if user_client is not None:
+                    return user_client
+                connect_lock = self._connect_lock(endpoints)
+            with connect_lock:
+                # another thread may have connected meanwhile
+                with self._lock:
+                    user_client = self._find(user, password, endpoints,
+                                             stale)
+                if user_client is not None:
+                    return user_client
+                return self._connect(user, password, endpoints)
+        finally:
+            self._close(stale)
+
+    def _connect(self, user, password, endpoints):
         xlog.debug("XCLIClientPool: connecting to %s", endpoints)
         client = self.connector(None, None, endpoints)
+        if self.response_cache is not None:
+            client.response_cache = self.response_cache
+        if self.executor is not None:
+            client.executor = self.executor
+        rate_limiter = self._rate_limiter(endpoints)
+        if rate_limiter is not None:
+            client.rate_limiter = rate_limiter
         user_client = {user: client.get_user_client(user, password)}
-        for ep in endpoints:
-            self.pool[ep] = PoolEntry(client, now, user_client)
+        entry = PoolEntry(client, time.time(), user_client)
+        with self._lock:
+            for ep in endpoints:
+                self.pool[ep] = entry
         return user_client[user]
 
 
@@ -0,0 +1,158 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI rate limiting Module
+
+.. module: ratelimit
+
+:Description: Limits the rate at which an ``XCLIClient`` sends commands to
+ its array, so that bulk tools do not overload its management server. A
+ ``RateLimiter`` has a token bucket for the read-only commands (see
+ ``pyxcli.registry``) and one for the others; a command waits for a token
+ of its bucket before it is sent. Commands answered from the response
+ cache, or coalesced with another, take no token::
+
+    from pyxcli.pool import XCLIClientPool
+    from pyxcli.client import XCLIClient
+
+    pool = XCLIClientPool(XCLIClient.connect_ssl,
+                          rate_limit=dict(reads=50, writes=10),
+                          rate_limits={"192.168.1.102": dict(writes=2)})
+
+ When the array answers that it is busy, an adaptive limiter halves its
+ rates; every command it completes then regains a part of them, until the
+ configured rates are reached again.
+
+"""
+
+import time
+from collections import namedtuple
+from threading import Lock
+from pyxcli.errors import MCLTimeoutError
+
+# the errors of an array that is too busy to run its commands
+BUSY_ERRORS = (MCLTimeoutError,)
+
+RateStats = namedtuple("RateStats", "throttled,waited,busy,factor")
+
+
+class TokenBucket(object):
+    """
+    Holds up to ``burst`` tokens (one second's worth by default), and
+    gains ``rate`` tokens a second
+    """
+
+    def __init__(self, rate, burst=None, clock=time.time):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self.tokens = self.burst
+        self._clock = clock
+        self._updated = clock()
+        self._lock = Lock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """
+        Takes a token, and returns the time (in seconds) to wait before
+        using it. The waiting callers are served in the order they came.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+
+
+class RateLimiter(object):
+    """
+    :param reads: the read-only commands a second (``None`` for no limit)
+    :param writes: the other commands a second (``None`` for no limit)
+    :param burst: the commands of each kind that may be sent at once
+                  after a pause (one second's worth by default)
+    :param adaptive: whether to slow down when the array is busy
+    :param backoff: the factor of the rates after a busy error
+    :param recovery: the part of the configured rates regained after every
+                     command that completes
+    :param floor: the lowest part of the configured rates
+    """
+
+    def __init__(self, reads=None, writes=None, burst=None, adaptive=True,
+                 backoff=0.5, recovery=0.05, floor=0.05,
+                 busy_errors=BUSY_ERRORS, clock=time.time, sleep=time.sleep):
+        self.rates = (reads, writes)
+        self.adaptive = adaptive
+        self.backoff = backoff
+        self.recovery = recovery
+        self.floor = floor
+        self.busy_errors = busy_errors
+        self.factor = 1.0
+        self.throttled = 0
+        self.waited = 0.0
+        self.busy = 0
+        self._sleep = sleep
+        self._lock = Lock()
+        self._buckets = tuple(None if rate is None else
+                              TokenBucket(rate, burst, clock)
+                              for rate in self.rates)
+
+    def acquire(self, read_only):
+        """Waits until a command of the given kind may be sent"""
+        bucket = self._buckets[0 if read_only else 1]
+        if bucket is None:
+            return
+        delay = bucket.reserve()
+        if delay > 0:
+            with self._lock:
+                self.throttled += 1
+                self.waited += delay
+            self._sleep(delay)
+
+    def report(self, error=None):
+        """Adapts the rates to the outcome of a command (``error`` is
+        ``None`` if it succeeded)"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            if isinstance(error, self.busy_errors):
+                self.busy += 1
+                factor = max(self.floor, self.factor * self.backoff)
+            else:
+                factor = min(1.0, self.factor + self.recovery)
+            if factor == self.factor:
+                return
+            self.factor = factor
+            for rate, bucket in zip(self.rates, self._buckets):
+                if bucket is not None:
+                    bucket.set_rate(rate * factor)
+
+    @property
+    def stats(self):
+        """The number of commands that waited for a token and their total
+        wait, the number of busy errors, and the current part of the
+        configured rates"""
+        with self._lock:
+            return RateStats(self.throttled, self.waited, self.busy,
+                             self.factor)
@@ -0,0 +1,211 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI command registry Module
+
+.. module: registry
+
+:Description: What the library knows about the XCLI commands: whether they
+ are read-only (and may be cached or run in parallel), whether they are
+ idempotent (and may be sent again after a failure), the kinds of objects
+ they are about and how large their responses are expected to be.
+
+ The traits of a command come from, in order of precedence:
+
+ * what was registered for it (``default_registry`` ships with the
+   commands whose names are misleading), or loaded with ``update``
+ * the description of the command in the ``help`` catalog (a command
+   described as "Lists ..." is read-only)
+ * its name: ``vol_list`` and ``version_get`` are read-only,
+   ``vol_mapping_list`` is about volumes and mappings, and ``vol_create``
+   changes volumes, and the pools and mappings related to them
+
+ For example, to let a command be sent again after a failure::
+
+    from pyxcli.registry import default_registry
+    default_registry.register("vol_lock", idempotent=True)
+
+"""
+
+from collections import namedtuple
+from threading import Lock
+
+SMALL = "small"
+LARGE = "large"
+
+# verbs of read-only commands (vol_list, version_get, ...)
+READ_VERBS = frozenset(["list", "get", "help"])
+# verbs that are not object kinds (vol_create acts on volumes)
+VERBS = READ_VERBS | frozenset([
+    "activate", "add", "assign", "attach", "change", "clear", "copy",
+    "create", "deactivate", "define", "delete", "detach", "disable",
+    "duplicate", "enable", "format", "free", "lock", "move", "remove",
+    "rename", "reset", "resize", "restore", "set", "switch", "unassign",
+    "unlock", "update"])
+# the kinds of objects a command changes besides those in its name
+RELATED_KINDS = {
+    "map": ("mapping", "vol", "host", "cluster"),
+    "unmap": ("mapping", "vol", "host", "cluster"),
+    "vol": ("pool", "cg", "snapshot", "mapping"),
+    "snapshot": ("vol", "pool", "snap"),
+    "snap": ("vol", "pool", "snapshot"),
+    "host": ("cluster", "mapping"),
+    "cluster": ("host", "mapping"),
+    "mirror": ("vol", "cg"),
+    "cg": ("vol", "snap", "snapshot", "mirror"),
+}
+# how the help catalog describes read-only commands
+READ_DESCRIPTIONS = ("Lists ", "Displays ", "Shows ", "Prints ",
+                     "Returns ", "Retrieves ")
+
+
+class CommandTraits(namedtuple("CommandTraits",
+                               "read_only,idempotent,kinds,touches,"
+                               "response_size")):
+    """
+    The traits of a command: ``kinds`` are the kinds of objects it is
+    about, and ``touches`` the kinds of objects it changes (none for
+    read-only commands)
+    """
+    __slots__ = ()
+
+
+def command_kinds(cmd):
+    """
+    Returns the kinds of objects a command is about, from its name
+    (``vol_mapping_list`` is about ``vol`` and ``mapping``)
+    """
+    return frozenset(part for part in cmd.split("_") if part not in VERBS)
+
+
+def touched_kinds(cmd):
+    """Returns the kinds of objects a command changes, from its name"""
+    kinds = set(command_kinds(cmd))
+    for kind in list(kinds):
+        kinds.update(RELATED_KINDS.get(kind, ()))
+    return frozenset(kinds)
+
+
+def traits_from_name(cmd, read_only=None):
+    """Returns the traits of a command, guessed from its name"""
+    if read_only is None:
+        read_only = cmd.split("_")[-1] in READ_VERBS
+    kinds = command_kinds(cmd)
+    if read_only:
+        size = LARGE if cmd.endswith("_list") else SMALL
+        return CommandTraits(True, True, kinds, frozenset(), size)
+    return CommandTraits(False, False, kinds, touched_kinds(cmd), SMALL)
+
+
+class CommandRegistry(object):
+    """
+    Maps command names to their ``CommandTraits``; thread-safe
+    """
+
+    def __init__(self, entries=None):
+        self._lock = Lock()
+        # registered traits, and those learned from help catalogs
+        self._registered = {}
+        self._described = {}
+        self._cache = {}
+        if entries:
+            self.update(entries)
+
+    def traits(self, cmd):
+        """Returns the traits of the given command"""
+        traits = self._cache.get(cmd)
+        if traits is None:
+            with self._lock:
+                traits = self._registered.get(cmd)
+                if traits is None:
+                    traits = self._described.get(cmd)
+                if traits is None:
+                    traits = traits_from_name(cmd)
+                self._cache[cmd] = traits
+        return traits
+
+    def register(self, cmd, **traits):
+        """
+        Sets traits of the given command (the others keep their current
+        values); a read-only command touches nothing, and is idempotent
+        """
+        current = self.traits(cmd)
+        if traits.get("read_only"):
+            traits.setdefault("touches", frozenset())
+            traits.setdefault("idempotent", True)
+        elif traits.get("read_only") is False and current.read_only:
+            traits.setdefault("touches", touched_kinds(cmd))
+            traits.setdefault("idempotent", False)
+        for name in ("kinds", "touches"):
+            if name in traits:
+                traits[name] = frozenset(traits[name])
+        with self._lock:
+            self._registered[cmd] = current._replace(**traits)
+            self._cache.clear()
+
+    def update(self, entries):
+        """
+        Registers the traits of several commands, given as a mapping of
+        command names to mappings of traits (as loaded from JSON)
+        """
+        for cmd, traits in entries.items():
+            self.register(cmd, **dict(traits))
+
+    def add_catalog(self, catalog):
+        """
+        Learns the commands of a ``pyxcli.catalog.CommandCatalog``, whose
+        descriptions tell which of them are read-only
+        """
+        described = {}
+        for name, description, syntax in catalog.entries:
+            read_only = None
+            if description.startswith(READ_DESCRIPTIONS):
+                read_only = True
+            described[name] = traits_from_name(name, read_only)
+        with self._lock:
+            self._described.update(described)
+            self._cache.clear()
+
+    def copy(self):
+        """Returns a registry with the same traits, changed independently"""
+        registry = self.__class__()
+        with self._lock:
+            registry._registered = dict(self._registered)
+            registry._described = dict(self._described)
+        return registry
+
+    def names(self):
+        """The names of the commands registered or learned from catalogs"""
+        with self._lock:
+            return sorted(set(self._registered) | set(self._described))
+
+    def __contains__(self, cmd):
+        return cmd in self._registered or cmd in self._described
+
+    def __repr__(self):
+        return "<%s of %d commands>" % (self.__class__.__name__,
+                                        len(self.names()))
+
+
+# commands whose names are misleading
+DEFAULT_ENTRIES = {
+    "state_list": {"response_size": SMALL},
+    "time_list": {"response_size": SMALL},
+    "config_get": {"response_size": SMALL},
+    "map_vol": {"kinds": ["vol", "host", "cluster", "mapping"]},
+    "unmap_vol": {"kinds": ["vol", "host", "cluster", "mapping"]},
+}
+
+default_registry = CommandRegistry(DEFAULT_ENTRIES)
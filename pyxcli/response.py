@@ -23,10 +23,21 @@
 
 """
 
+from collections import OrderedDict
 from munch import Munch
 from pyxcli.helpers import xml_util as etree
+from pyxcli.filters import compile_where
+from pyxcli import schemas
+from pyxcli.compact import CompactTree
 import base64
-import codecs
+import re
+from xml.parsers import expat
+import zlib
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 try:
     basestring
@@ -42,20 +53,146 @@ except NameError:
 class XCLIResponse(object):
     RETURN_PATH = "return"
 
-    def __init__(self, cmdroot):
-        self.response_etree = cmdroot
+    def __init__(self, cmdroot, interner=None, command=None):
+        self._response_etree = cmdroot
+        self._compact = None
+        self._return_shards = None
+        self._compressed_return = None
+        self.interner = interner
+        self.command = command
+        self._private_interner = None
+        self._rows = None
+        self._row_tags = None
 
     @classmethod
-    def instantiate(cls, cmdroot, encoding):
+    def instantiate(cls, cmdroot, encoding, interner=None, command=None,
+                    xml_backend=None, pool=None):
+        """
+        Builds the response of the given administrator/command element,
+        decompressing its return element. Given a ``pool`` (an executor,
+        like ``concurrent.futures.ProcessPoolExecutor``), a large return
+        element is parsed in parallel, in shards (see ``PARALLEL_SHARD``).
+        """
         compressed = cmdroot.find("compressed_return")
+        shards = None
         if compressed is not None:
             text = compressed.attrib["value"]
-            raw = base64.b64decode(text)
-            raw = (codecs.decode(raw, "zlib")).decode('ascii')
-            cmdroot.append(etree.fromstring("<return>%s</return>" % (raw,)))
             cmdroot.remove(compressed)
+            # (XCLI responses compress well; small ones are not even
+            # decompressed before being parsed at once)
+            if pool is not None and len(text) > PARALLEL_SHARD // 64:
+                shards = _parse_return_in_pool(text, pool, xml_backend)
+
+        response = cls(cmdroot, interner, command)
+        if shards is not None:
+            response._return_shards = shards
+        elif compressed is not None:
+            # the rows are built right away (so a malformed payload still
+            # raises here), straight from the payload; the return element
+            # is built only if it is needed
+            response._compressed_return = (text, xml_backend)
+            response._materialize()
+        return response
+
+    @property
+    def response_etree(self):
+        # a response loaded from its compact form (or parsed in shards, or
+        # compressed) gets its XML tree back only when the tree itself is
+        # needed
+        if self._response_etree is None and self._compact is not None:
+            self._response_etree = self._compact.to_element()
+        if self._return_shards is not None:
+            shards, self._return_shards = self._return_shards, None
+            self._response_etree.append(_join_shards(shards,
+                                                     self._response_etree))
+        if self._compressed_return is not None:
+            text, xml_backend = self._compressed_return
+            self._compressed_return = None
+            self._response_etree.append(_inflate_return(text, xml_backend))
+        return self._response_etree
+
+    @response_etree.setter
+    def response_etree(self, cmdroot):
+        self._response_etree = cmdroot
+        self._compact = None
+        self._return_shards = None
+        self._compressed_return = None
+        self.release()
+
+    def _is_compact(self):
+        # whether the rows are built from something other than the tree
+        if self._return_shards is not None:
+            return True
+        if self._compressed_return is not None:
+            return True
+        return self._response_etree is None and self._compact is not None
+
+    def _compact_children(self):
+        interner = self._get_interner()
+        if self._compressed_return is not None:
+            return _build_compressed_rows(self._compressed_return[0],
+                                          interner)
+        if self._return_shards is not None:
+            tags, rows = [], []
+            for shard in self._return_shards:
+                shard_tags, shard_rows = shard.children(0, interner)
+                tags.extend(shard_tags)
+                rows.extend(shard_rows)
+            return tags, rows
+        compact = self._compact
+        position = compact.find(self.RETURN_PATH)
+        if position is None:
+            return [], []
+        return compact.children(position, interner)
+
+    def _compact_count(self):
+        if self._compressed_return is not None:
+            return len(self._materialize())
+        if self._return_shards is not None:
+            return sum(shard.count_children(0)
+                       for shard in self._return_shards)
+        position = self._compact.find(self.RETURN_PATH)
+        if position is None:
+            return 0
+        return self._compact.count_children(position)
+
+    def to_compact(self):
+        """
+        Returns the :class:`pyxcli.compact.CompactTree` of the response
+        """
+        if self._compact is not None:
+            return self._compact
+        return CompactTree.from_element(self.response_etree, self.command)
+
+    @classmethod
+    def from_compact(cls, compact, interner=None):
+        response = cls(None, interner, compact.label)
+        response._compact = compact
+        return response
+
+    def to_bytes(self):
+        """
+        Serializes the response into a compact binary form (see
+        :mod:`pyxcli.compact`), to be loaded back with ``from_bytes``.
+        Responses may be pickled as well; pickle protocol 5 sends their
+        buffers out-of-band.
+        """
+        return self.to_compact().to_bytes()
 
-        return cls(cmdroot)
+    @classmethod
+    def from_bytes(cls, data, interner=None):
+        return cls.from_compact(CompactTree.from_bytes(data), interner)
+
+    def __reduce_ex__(self, protocol):
+        return (_response_from_compact, (self.__class__, self.to_compact()))
+
+    def _get_interner(self):
+        # without a (client-wide) interner, every response gets its own one
+        if self.interner is not None:
+            return self.interner
+        if self._private_interner is None:
+            self._private_interner = StringInterner()
+        return self._private_interner
 
     @property
     def as_return_etree(self):
@@ -63,26 +200,91 @@ class XCLIResponse(object):
 
     @property
     def contained_element_types(self):
-        return set(subelement.tag for subelement in
-                   self.as_return_etree.getchildren())
+        if self._row_tags is None and self._is_compact():
+            self._materialize()
+        if self._row_tags is not None:
+            return set(self._row_tags)
+        return set(subelement.tag for subelement in self.as_return_etree)
+
+    def _materialize(self):
+        """
+        Returns the (memoized) list of Bunches for all the subelements of
+        the response, building it on first use
+        """
+        rows = self._rows
+        if rows is None and self._is_compact():
+            tags, rows = self._compact_children()
+            self._row_tags = tags
+            self._rows = rows
+        elif rows is None:
+            return_element = self.as_return_etree
+            if return_element is None:
+                rows, tags = [], []
+            else:
+                interner = self._get_interner()
+                subelements = list(return_element)
+                rows = [_populate_bunch_with_element(subelement, interner)
+                        for subelement in subelements]
+                tags = [subelement.tag for subelement in subelements]
+            self._row_tags = tags
+            self._rows = rows
+        return rows
+
+    def _can_use_rows(self, predicate):
+        """
+        Whether ``all`` may go over the memoized rows instead of the XML
+        tree. Responses loaded from their compact form (or parsed in
+        shards) always filter rows.
+        """
+        if self._is_compact():
+            if predicate is None or hasattr(predicate, "matches"):
+                self._materialize()
+                return True
+            return False
+        return predicate is None and self._rows is not None
+
+    def release(self):
+        """
+        Drops the memoized Bunches of this response; they will be rebuilt
+        from the XML tree if needed again
+        """
+        self._rows = None
+        self._row_tags = None
+        self._private_interner = None
 
     # @ReservedAssignment
-    def all(self, element_type=None, response_path=None):
+    def all(self, element_type=None, response_path=None, where=None):
         """
         Generates Bunches, each representing a single subelement of the
         response. If an element_type is requested, only elements whose
         tag matches the element_type are returned. If the response has no
         subelements (for example, in a <return>-less command), yields None.
+        ``where`` is a predicate (or a sequence of predicates) from
+        :mod:`pyxcli.filters`; it is evaluated on the raw subelement, and
+        only matching subelements are turned into Bunches.
         """
+        predicate = compile_where(where)
+        if response_path is None and self._can_use_rows(predicate):
+            for row, tag in zip(self._rows, self._row_tags):
+                if element_type is not None and tag != element_type:
+                    continue
+                if predicate is not None and not predicate.matches(row):
+                    continue
+                yield row
+            return
         path = self.RETURN_PATH
         if response_path is not None:
             path += "/" + response_path
         response_element = self.response_etree.find(path)
         if response_element is None:
             return
-        for subelement in self.response_etree.find(path).getchildren():
-            if element_type is None or subelement.tag == element_type:
-                yield _populate_bunch_with_element(subelement)
+        interner = self._get_interner()
+        for subelement in response_element:
+            if element_type is not None and subelement.tag != element_type:
+                continue
+            if predicate is not None and not predicate(subelement):
+                continue
+            yield _populate_bunch_with_element(subelement, interner)
 
     @property
     def as_single_element(self):
@@ -92,60 +294,441 @@ class XCLIResponse(object):
         If there is more then one element in the response or no
         elements this raises a ResponseError
         """
-        if self.as_return_etree is None:
+        return_element = self.as_return_etree
+        if return_element is None:
             return None
-        if len(self.as_return_etree.getchildren()) == 1:
-            return _populate_bunch_with_element(self.as_return_etree.
-                                                getchildren()[0])
-        return _populate_bunch_with_element(self.as_return_etree)
+        if len(return_element) == 1:
+            if self._rows is not None:
+                return self._rows[0]
+            return _populate_bunch_with_element(return_element[0],
+                                                self._get_interner())
+        return _populate_bunch_with_element(return_element,
+                                            self._get_interner())
 
     @property
     def as_list(self, element_type=None, response_path=None):
+        if element_type is None and response_path is None:
+            return list(self._materialize())
         return list(self.all(element_type, response_path))
 
-    def as_dict(self, key, element_type=None, response_path=None):
+    def as_dict(self, key, element_type=None, response_path=None,
+                where=None):
+        if response_path is None and where is None:
+            self._materialize()
         result = {}
-        for element in self.all(element_type, response_path):
+        for element in self.all(element_type, response_path, where):
             result[getattr(element, key)] = element
         return result
 
+    def typed(self, element_type=None, registry=None):
+        """
+        Returns a list of Bunches like ``as_list``, whose values are
+        converted according to the schema of the response's command
+        (see :mod:`pyxcli.schemas`). The memoized rows are left untouched.
+        """
+        if registry is None:
+            registry = schemas.default_registry
+        self._materialize()
+        rows, tags = self._rows, self._row_tags
+        if element_type is not None:
+            selected = [(row, tag) for row, tag in zip(rows, tags)
+                        if tag == element_type]
+            rows = [row for row, _ in selected]
+            tags = [tag for _, tag in selected]
+        return registry.convert_rows(self.command, tags, rows)
+
+    def as_columns(self, element_type=None, typed=False, registry=None):
+        """
+        Returns the response as a ``field -> list of values`` dict, one
+        value per row (``None`` where a row lacks the field). The fields
+        are in the order of the rows' fields (which is the order of the
+        response only where Bunches keep their order, on Python 3.7+).
+        If ``typed`` is set, the columns are converted according to the
+        schema of the response's command.
+        """
+        rows = list(self.all(element_type))
+        if typed and element_type is None and \
+                len(self.contained_element_types) > 1:
+            # the schema depends on the element type of every row
+            rows = self.typed(registry=registry)
+            typed = False
+        columns = OrderedDict()
+        for position, row in enumerate(rows):
+            if not isinstance(row, Munch):
+                continue
+            for field, value in row.items():
+                column = columns.get(field)
+                if column is None:
+                    column = columns[field] = [None] * len(rows)
+                column[position] = value
+        if typed:
+            if registry is None:
+                registry = schemas.default_registry
+            if element_type is None and self._row_tags:
+                element_type = self._row_tags[0]
+            columns = registry.convert_columns(self.command, element_type,
+                                               columns)
+        return columns
+
+    def index(self, *keys, **kwargs):
+        """
+        Builds unique indexes of the response rows, one per key, in a
+        single pass over the rows. Returns a :class:`ResponseIndex` mapping
+        the key's value to the row (if a value repeats, the last row wins,
+        just like ``as_dict``). If more than one key is given, a tuple of
+        indexes is returned, in the same order::
+
+            by_name, by_pool = response.index("name", "pool_name")
+
+        An ``element_type`` keyword argument restricts the indexed rows.
+        """
+        return self._build_indexes(keys, False, **kwargs)
+
+    def group_by(self, *keys, **kwargs):
+        """
+        Like ``index``, but every value of the index is a tuple of all the
+        rows sharing the key's value
+        """
+        return self._build_indexes(keys, True, **kwargs)
+
+    def _build_indexes(self, keys, grouped, element_type=None):
+        if not keys:
+            raise TypeError("at least one key is required")
+        tables = [(key, {}) for key in keys]
+        self._materialize()
+        for row in self.all(element_type):
+            for key, table in tables:
+                value = getattr(row, key, _MISSING)
+                if value is _MISSING:
+                    continue
+                if grouped:
+                    table.setdefault(value, []).append(row)
+                else:
+                    table[value] = row
+        if grouped:
+            indexes = tuple(
+                ResponseIndex(key, dict((value, tuple(rows))
+                                        for value, rows in table.items()))
+                for key, table in tables)
+        else:
+            indexes = tuple(ResponseIndex(key, table)
+                            for key, table in tables)
+        if len(indexes) == 1:
+            return indexes[0]
+        return indexes
+
     def __iter__(self):
         return self.all()
 
     def __len__(self):
-        return len(self.as_list)
+        if self._rows is not None:
+            return len(self._rows)
+        if self._is_compact():
+            return self._compact_count()
+        return_element = self.as_return_etree
+        if return_element is None:
+            return 0
+        return len(return_element)
 
     def __getitem__(self, item):
         if isinstance(item, basestring):
             return self.all(item)
         elif isinstance(item, (int, long)):
-
-            return list(self.all())[item]
+            return self._materialize()[item]
         else:
             raise TypeError("'item' can be a string or an int", item)
 
     def __nonzero__(self):
-        return any(self.all())
+        return any(self._materialize())
     __bool__ = __nonzero__
 
     def __str__(self):
         return etree.tostring(self.response_etree)
 
 
-def _populate_bunch_with_element(element):
+_MISSING = object()
+
+
+def _response_from_compact(cls, compact):
+    return cls.from_compact(compact)
+
+
+class StringInterner(object):
+    """
+    A bounded table of strings, used to share a single string object
+    between all the occurrences of the same tag or value when Bunches are
+    built (``yes``/``no``, pool names, field names and so on).
+    Only strings of up to ``max_length`` characters are interned, and no
+    more than ``max_size`` distinct strings are kept; once the table is
+    full, new strings are returned as they are.
+
+    By default every response interns into a table of its own; set the
+    ``value_interner`` attribute of a client to share a single table
+    between all of its responses.
+    """
+    DEFAULT_MAX_SIZE = 4096
+    DEFAULT_MAX_LENGTH = 64
+
+    __slots__ = ["max_size", "max_length", "_table"]
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE,
+                 max_length=DEFAULT_MAX_LENGTH):
+        self.max_size = max_size
+        self.max_length = max_length
+        self._table = {}
+
+    def __len__(self):
+        return len(self._table)
+
+    def clear(self):
+        self._table.clear()
+
+    def __call__(self, string):
+        table = self._table
+        interned = table.get(string)
+        if interned is not None:
+            return interned
+        if len(string) <= self.max_length and len(table) < self.max_size:
+            table[string] = string
+        return string
+
+
+class ResponseIndex(Mapping):
+    """
+    An immutable mapping from the values of a response field (``key``)
+    to the matching rows, as built by ``XCLIResponse.index`` and
+    ``XCLIResponse.group_by``
+    """
+    __slots__ = ["key", "_entries"]
+
+    def __init__(self, key, entries):
+        # the Mapping bases of Python 2 have no __slots__, which then do not
+        # prevent setting other attributes
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "_entries", entries)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % (self.__class__.__name__,))
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is immutable" % (self.__class__.__name__,))
+
+    def __getitem__(self, value):
+        return self._entries[value]
+
+    def __contains__(self, value):
+        return value in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "<%s by %r of %d entries>" % (self.__class__.__name__,
+                                             self.key, len(self._entries))
+
+
+# base64 characters decoded (and inflated) at a time; a multiple of 4
+INFLATE_CHUNK = 1 << 16
+
+_WHITESPACE = re.compile(r"\s")
+
+
+def _inflate(text):
+    """
+    Generates the content of a return element out of the value of a
+    compressed_return element, a chunk at a time, so that the decompressed
+    response is never held in memory as a whole
+    """
+    if _WHITESPACE.search(text):
+        text = _WHITESPACE.sub("", text)
+    decompressor = zlib.decompressobj()
+    for start in range(0, len(text), INFLATE_CHUNK):
+        data = base64.b64decode(text[start:start + INFLATE_CHUNK])
+        yield decompressor.decompress(data)
+    yield decompressor.flush()
+
+
+def _inflate_return(text, xml_backend=None):
+    """
+    Decodes the value of a compressed_return element into a return element
+    """
+    parser = etree.IncrementalXMLParser(xml_backend)
+    parser.feed(b"<return>")
+    for chunk in _inflate(text):
+        parser.feed(chunk)
+    parser.feed(b"</return>")
+    return parser.close()
+
+
+def _build_compressed_rows(text, intern):
+    """
+    Builds the Bunches of the subelements of a compressed return element
+    (just like ``_populate_bunch_with_element`` builds them), and their
+    tags, straight from expat's events, without building an XML tree
+    """
+    tags = []
+    rows = []
+    # the Bunches being populated, or None for the return element and for
+    # value elements (whose subelements are ignored)
+    stack = []
+    push = stack.append
+
+    def start(tag, attrib):
+        parent = stack[-1] if stack else None
+        value = attrib.get('value')
+        if parent is not None and value is not None:
+            # the common case, a field of a Bunch
+            parent[intern(tag)] = intern(value)
+            push(None)
+            return
+        depth = len(stack)
+        if depth == 0 or (depth > 1 and parent is None):
+            # the return element, or inside a value element
+            push(None)
+            return
+        if value is not None:
+            value = intern(value)
+            push(None)
+        else:
+            value = Munch()
+            if attrib.get('id'):
+                value['nextra_element_id'] = attrib['id']
+            push(value)
+        if depth == 1:
+            tags.append(tag)
+            rows.append(value)
+        else:
+            parent[intern(tag)] = value
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = lambda tag: stack.pop()
+    try:
+        parser.Parse(b"<return>")
+        for chunk in _inflate(text):
+            parser.Parse(chunk)
+        parser.Parse(b"</return>", True)
+    except expat.ExpatError as e:
+        raise etree.XMLSyntaxError(None, e.args[0], e.lineno)
+    return tags, rows
+
+
+# the (approximate) size of the decompressed return element shards that
+# are parsed in parallel; smaller return elements are parsed at once
+PARALLEL_SHARD = 4 << 20
+
+_FIRST_TAG = re.compile(br"\s*<([^\s/>]+)")
+
+# the shards sent to the pool at a time; the decompressed data held at once
+# is about PARALLEL_BATCH * PARALLEL_SHARD bytes
+PARALLEL_BATCH = 8
+
+
+def _split_return(text, size):
+    """
+    Generates the content of the compressed return element ``text`` in
+    pieces of about ``size`` bytes, cut right after the closing tags of its
+    first subelement's type (subelements are not nested in one another, so
+    these are boundaries between subelements). The content is inflated a
+    chunk at a time, so that only the piece being cut is held in memory.
+    Generates nothing if there is no subelement.
+    """
+    closing = None
+    buffer = bytearray()
+    search = size
+    for chunk in _inflate(text):
+        buffer.extend(chunk)
+        if closing is None:
+            if b">" not in buffer:
+                continue
+            match = _FIRST_TAG.match(buffer)
+            if match is None:
+                return
+            closing = b"</" + bytes(match.group(1)) + b">"
+        while len(buffer) > search:
+            end = buffer.find(closing, search)
+            if end < 0:
+                # the next search starts where this one left off
+                search = max(size, len(buffer) - len(closing))
+                break
+            end += len(closing)
+            yield bytes(buffer[:end])
+            del buffer[:end]
+            search = size
+    if closing is not None and buffer:
+        yield bytes(buffer)
+
+
+def _parse_shard(piece, xml_backend=None):
+    # runs in the pool; a piece split in the wrong place fails to parse
+    try:
+        element = etree.fromstring(b"<return>" + piece + b"</return>",
+                                   xml_backend)
+    except etree.XMLException:
+        return None
+    return CompactTree.from_element(element)
+
+
+def _parse_return_in_pool(text, pool, xml_backend=None):
+    """
+    Parses the compressed return element ``text`` into CompactTrees of its
+    shards, in the given pool, a batch of shards at a time; ``None`` if it
+    is too small to split or cannot be split
+    """
+    shards = []
+    batch = []
+    for piece in _split_return(text, PARALLEL_SHARD):
+        batch.append(piece)
+        if len(batch) == PARALLEL_BATCH:
+            shards.extend(pool.map(_parse_shard, batch,
+                                   [xml_backend] * len(batch)))
+            batch = []
+    if not shards:
+        # too small to be worth splitting
+        if len(batch) < 2:
+            return None
+        if sum(len(piece) for piece in batch) < 2 * PARALLEL_SHARD:
+            return None
+    shards.extend(pool.map(_parse_shard, batch, [xml_backend] * len(batch)))
+    if any(shard is None for shard in shards):
+        return None
+    return shards
+
+
+def _join_shards(shards, parent):
+    # the return element is made like its parent, which may have been
+    # parsed by any backend
+    def make(tag):
+        return parent.makeelement(tag, {})
+
+    return_element = make("return")
+    for shard in shards:
+        return_element.extend(list(shard.to_element(make)))
+    return return_element
+
+
+def _noop_intern(string):
+    return string
+
+
+def _populate_bunch_with_element(element, intern=_noop_intern):
     """
     Helper function to recursively populates a Bunch from an XML tree.
     Returns leaf XML elements as a simple value, branch elements are returned
     as Bunches containing their subelements as value or recursively generated
-    Bunch members.
+    Bunch members. Tags and values are passed through ``intern``.
     """
-    if 'value' in element.attrib:
-        return element.get('value')
+    value = element.get('value')
+    if value is not None:
+        return intern(value)
     current_bunch = Munch()
 
     if element.get('id'):
         current_bunch['nextra_element_id'] = element.get('id')
-    for subelement in element.getchildren():
-        current_bunch[subelement.tag] = _populate_bunch_with_element(
-            subelement)
+    for subelement in element:
+        current_bunch[intern(subelement.tag)] = _populate_bunch_with_element(
+            subelement, intern)
     return current_bunch
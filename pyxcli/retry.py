@@ -0,0 +1,132 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI retry Module
+
+.. module: retry
+
+:Description: When an endpoint fails in the middle of a command (a module
+ fails over, for instance), the command is lost. Idempotent commands (see
+ ``pyxcli.registry``) may be sent again by ``XCLIClient``, according to
+ its ``retry_policy``: a bounded number of attempts, with jittered
+ exponential backoff between them. The retries of a client are limited by
+ a budget, which successful commands refill, so that a failing array is
+ not flooded with retries::
+
+    from pyxcli.retry import RetryPolicy
+    XCLIClient.retry_policy = RetryPolicy(attempts=5)
+
+ Clients do not retry by default (their ``retry_policy`` is ``None``).
+
+"""
+
+import random
+import time
+from logging import getLogger
+from threading import Lock
+from pyxcli import XCLI_DEFAULT_LOGGER
+from pyxcli.errors import CorruptResponse, TransportError
+from pyxcli.transports import ClosedTransportError
+
+xlog = getLogger(XCLI_DEFAULT_LOGGER)
+
+
+def is_transient(error):
+    """
+    Tells whether a command that failed with ``error`` may succeed if sent
+    again: its response was lost or corrupt, but the transport was not
+    closed (or ran out of endpoints)
+    """
+    if isinstance(error, ClosedTransportError):
+        return False
+    return isinstance(error, (CorruptResponse, TransportError, IOError))
+
+
+class RetryBudget(object):
+    """
+    Every retry costs a token. The budget starts with ``initial`` tokens,
+    and every successful command adds ``ratio`` tokens, up to ``maximum``.
+    """
+
+    def __init__(self, initial=10.0, ratio=0.1, maximum=10.0):
+        self.tokens = initial
+        self.ratio = ratio
+        self.maximum = maximum
+        self._lock = Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.maximum, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """Takes a token; returns ``False`` if there are none left"""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+    :param attempts: the number of times a command is sent, at most
+    :param backoff: the longest wait (in seconds) before the first retry;
+                    it doubles before every retry, up to ``max_backoff``
+    :param budget: the arguments of the ``RetryBudget`` of every client
+    """
+
+    def __init__(self, attempts=3, backoff=0.1, max_backoff=2.0,
+                 budget=None, sleep=time.sleep, random=random.random):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = dict(budget or {})
+        self._sleep = sleep
+        self._random = random
+
+    def new_budget(self):
+        return RetryBudget(**self.budget)
+
+    def delay(self, retry):
+        """The wait before the given retry (1 for the first), with full
+        jitter"""
+        ceiling = min(self.max_backoff, self.backoff * (2 ** (retry - 1)))
+        return ceiling * self._random()
+
+    def call(self, send, budget, recover=None):
+        """
+        Calls ``send()`` until it succeeds, fails with an error that is not
+        transient, runs out of attempts or ``budget`` runs out of tokens.
+        ``recover()`` is called before every retry.
+        """
+        retry = 0
+        while True:
+            try:
+                result = send()
+            except Exception as e:
+                retry += 1
+                if retry >= self.attempts or not is_transient(e):
+                    raise
+                if not budget.withdraw():
+                    raise
+                delay = self.delay(retry)
+                xlog.debug("Retrying after %s (retry %d, in %.2fs)",
+                           e, retry, delay)
+                self._sleep(delay)
+                if recover is not None:
+                    recover()
+            else:
+                budget.deposit()
+                return result
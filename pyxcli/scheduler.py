@@ -0,0 +1,289 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI scheduler Module
+
+.. module: scheduler
+
+:Description: An ``XCLIClient`` sends one command at a time over its
+ connection; its scheduler decides which of the commands waiting goes
+ next. Commands have priority classes (``interactive``, ``normal`` -- the
+ default -- and ``background``), set with the ``priority`` option::
+
+    with client.options(priority="background"):
+        sweep_inventory(client)
+
+ or for a single command, with the ``_priority`` argument::
+
+    client.cmd.mirror_change_role(vol="v1", _priority="interactive")
+
+ Commands of higher classes go first. Waiting commands age, so that a
+ flood of interactive commands does not starve the background ones
+ forever: a class whose oldest command has waited ``aging`` seconds goes
+ before the class above it, if that class's commands have just come.
+
+ Within a class, the users (or tenants, set with the ``tenant`` option)
+ sharing a connection get their turns by weighted fair queuing, so that a
+ user sending many commands does not delay the commands of the others
+ behind all of its own. A user of weight 2 gets twice the turns of a user
+ of weight 1::
+
+    client.scheduler.set_weight("inventory", 0.5)
+
+"""
+
+import heapq
+import itertools
+import time
+from collections import deque, namedtuple
+from threading import Event, Lock
+
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BACKGROUND = "background"
+
+DEFAULT_CLASSES = (INTERACTIVE, NORMAL, BACKGROUND)
+
+QueueStats = namedtuple("QueueStats", "depth,served,mean_wait,max_wait")
+
+
+class _Counters(object):
+    __slots__ = ["depth", "served", "total_wait", "max_wait"]
+
+    def __init__(self):
+        self.depth = 0
+        self.served = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def served_after(self, wait):
+        self.served += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def stats(self):
+        mean = self.total_wait / self.served if self.served else 0.0
+        return QueueStats(self.depth, self.served, mean, self.max_wait)
+
+
+class _Request(object):
+    __slots__ = ["priority", "flow", "arrived", "granted", "queued"]
+
+    def __init__(self, priority, flow, arrived):
+        self.priority = priority
+        self.flow = flow
+        self.arrived = arrived
+        self.granted = Event()
+        # whether the request waits in its queue (it is taken out of it
+        # when it is granted the scheduler, or given up)
+        self.queued = False
+
+
+class _FairQueue(object):
+    """
+    The requests of a priority class, by self-clocked fair queuing: a
+    request's virtual finish time is that of the previous request of its
+    flow (or the class's virtual time, if later) plus ``1 / weight``.
+
+    The requests are also kept by arrival, for aging. Requests taken out
+    of the queue are dropped from the heap and from the arrivals lazily,
+    when they reach the front.
+    """
+    __slots__ = ["heap", "arrivals", "size", "virtual_time", "finish_times"]
+
+    def __init__(self):
+        self.heap = []
+        self.arrivals = deque()
+        self.size = 0
+        self.virtual_time = 0.0
+        self.finish_times = {}
+
+    def push(self, request, weight, order):
+        start = max(self.virtual_time,
+                    self.finish_times.get(request.flow, 0.0))
+        finish = start + 1.0 / weight
+        self.finish_times[request.flow] = finish
+        heapq.heappush(self.heap, (finish, order, request))
+        self.arrivals.append(request)
+        self.size += 1
+        request.queued = True
+
+    def oldest(self):
+        arrivals = self.arrivals
+        while not arrivals[0].queued:
+            arrivals.popleft()
+        return arrivals[0].arrived
+
+    def pop(self):
+        while True:
+            finish, _, request = heapq.heappop(self.heap)
+            if request.queued:
+                break
+        self.virtual_time = finish
+        self._taken(request)
+        return request
+
+    def remove(self, request):
+        self._taken(request)
+
+    def _taken(self, request):
+        request.queued = False
+        self.size -= 1
+        if not self.size:
+            # the flows start over on an equal footing
+            del self.heap[:]
+            self.arrivals.clear()
+            self.finish_times.clear()
+
+
+class PriorityScheduler(object):
+    """
+    A lock that is handed to its waiters by priority class (the first
+    classes first), and within a class by weighted fair queuing of their
+    flows (users).
+
+    :param classes: the names of the priority classes, highest first
+    :param default: the class of requests without a priority
+    :param aging: the time (in seconds) after which a waiting request
+                  promotes its class by one; ``None`` disables aging
+    """
+
+    def __init__(self, classes=DEFAULT_CLASSES, default=NORMAL, aging=1.0,
+                 clock=time.time):
+        self.classes = tuple(classes)
+        self.default = default
+        self.aging = aging
+        self.weights = {}
+        self._clock = clock
+        self._ranks = dict((name, rank)
+                           for rank, name in enumerate(self.classes))
+        self._lock = Lock()
+        self._busy = False
+        self._queues = [_FairQueue() for name in self.classes]
+        self._order = itertools.count()
+        self._counters = dict((name, _Counters()) for name in self.classes)
+        self._flow_counters = {}
+
+    def set_weight(self, flow, weight):
+        """Sets the weight of a flow (1 by default)"""
+        if weight <= 0:
+            raise ValueError("weights must be positive")
+        self.weights[flow] = weight
+
+    def _priority(self, priority):
+        if priority is None:
+            return self.default
+        if priority not in self._ranks:
+            raise ValueError("unknown priority class %r" % (priority,))
+        return priority
+
+    def acquire(self, priority=None, flow=None):
+        priority = self._priority(priority)
+        with self._lock:
+            # (requests arrive in the order they are queued)
+            request = _Request(priority, flow, self._clock())
+            counters = (self._counters[request.priority],
+                        self._flow_counters.setdefault(flow, _Counters()))
+            if not self._busy:
+                self._busy = True
+                for counter in counters:
+                    counter.served_after(0.0)
+                return
+            self._queues[self._ranks[request.priority]].push(
+                request, self.weights.get(flow, 1), next(self._order))
+            for counter in counters:
+                counter.depth += 1
+        try:
+            request.granted.wait()
+        except BaseException:
+            # the waiting thread was interrupted: the request leaves its
+            # queue, or passes the scheduler on if it was granted it
+            with self._lock:
+                queued = request.queued
+                if queued:
+                    self._queues[self._ranks[request.priority]].remove(
+                        request)
+                    for counter in counters:
+                        counter.depth -= 1
+            if not queued:
+                self.release()
+            raise
+        with self._lock:
+            wait = self._clock() - request.arrived
+            for counter in counters:
+                counter.served_after(wait)
+
+    def _next_queue(self):
+        now = self._clock()
+        best = None
+        for rank, queue in enumerate(self._queues):
+            if not queue.size:
+                continue
+            key = rank
+            if self.aging:
+                key -= (now - queue.oldest()) / self.aging
+            if best is None or key < best[0]:
+                best = (key, queue)
+        return None if best is None else best[1]
+
+    def release(self):
+        with self._lock:
+            queue = self._next_queue()
+            if queue is None:
+                self._busy = False
+                return
+            request = queue.pop()
+            self._counters[request.priority].depth -= 1
+            self._flow_counters[request.flow].depth -= 1
+        # the scheduler stays busy: it is handed over
+        request.granted.set()
+
+    def slot(self, priority=None, flow=None):
+        """A context manager holding the scheduler"""
+        return _Slot(self, priority, flow)
+
+    def __enter__(self):
+        self.acquire()
+
+    def __exit__(self, t, v, tb):
+        self.release()
+
+    def stats(self):
+        """Returns the ``QueueStats`` of every priority class: the number
+        of requests waiting, the number served, and their waits"""
+        with self._lock:
+            return dict((name, counters.stats())
+                        for name, counters in self._counters.items())
+
+    def flow_stats(self):
+        """Returns the ``QueueStats`` of every flow (user)"""
+        with self._lock:
+            return dict((flow, counters.stats())
+                        for flow, counters in self._flow_counters.items())
+
+
+class _Slot(object):
+    __slots__ = ["scheduler", "priority", "flow"]
+
+    def __init__(self, scheduler, priority, flow):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.flow = flow
+
+    def __enter__(self):
+        self.scheduler.acquire(self.priority, self.flow)
+
+    def __exit__(self, t, v, tb):
+        self.scheduler.release()
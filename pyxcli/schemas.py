@@ -0,0 +1,186 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI response schemas Module
+
+.. module: schemas
+
+:Description: All the values of an XCLI response are strings. A schema
+ registry maps a command and an element type to converters for some of the
+ element's fields, so that sizes, counters, flags and timestamps are
+ converted once, when asked for::
+
+    pool = client.cmd.pool_list(pool="p1").typed()[0]
+    pool.snapshot_size - pool.used_by_snapshots
+
+ Converters are plain callables accepting a string. Empty strings (which
+ XCLI uses for "not applicable") are converted to ``None``, and a value
+ that a converter rejects (``ValueError``) is left as the original string.
+ Users may register more fields (or other converters) on the
+ ``default_registry``, or use a registry of their own::
+
+    from pyxcli.schemas import default_registry, to_int
+    default_registry.register("vol_list", "volume", used_capacity=to_int)
+
+"""
+
+from datetime import datetime
+from munch import Munch
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_TRUE_VALUES = frozenset(["yes", "true", "on"])
+_FALSE_VALUES = frozenset(["no", "false", "off"])
+
+
+def to_int(value):
+    if value == "":
+        return None
+    return int(value)
+
+
+def to_float(value):
+    if value == "":
+        return None
+    return float(value)
+
+
+def to_bool(value):
+    lowered = value.lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    if value == "":
+        return None
+    raise ValueError("not a boolean: %r" % (value,))
+
+
+def to_datetime(value):
+    if value == "":
+        return None
+    return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def _convert_column(converter, values):
+    converted = []
+    for value in values:
+        if value is not None and not isinstance(value, Munch):
+            try:
+                value = converter(value)
+            except ValueError:
+                pass
+        converted.append(value)
+    return converted
+
+
+class SchemaRegistry(object):
+    """
+    Maps ``(command, element_type)`` to a dict of ``field -> converter``.
+    An ``element_type`` of ``None`` applies to all the elements of the
+    command's response.
+    """
+
+    def __init__(self):
+        self._schemas = {}
+
+    def register(self, command, element_type=None, **converters):
+        """Adds (or replaces) the converters of the given fields"""
+        fields = self._schemas.setdefault((command, element_type), {})
+        fields.update(converters)
+
+    def unregister(self, command, element_type=None):
+        self._schemas.pop((command, element_type), None)
+
+    def converters(self, command, element_type):
+        """
+        Returns the converters of the element type in the command's
+        response (an empty dict if there are none)
+        """
+        specific = self._schemas.get((command, element_type))
+        generic = self._schemas.get((command, None))
+        if generic is None:
+            return specific or {}
+        if specific is None:
+            return generic
+        merged = dict(generic)
+        merged.update(specific)
+        return merged
+
+    def convert_rows(self, command, tags, rows):
+        """
+        Returns converted copies of the given Bunches (``tags`` holding
+        their element types). Rows are converted a field at a time, for
+        all the rows of the same element type together.
+        """
+        converted = [Munch(row) if isinstance(row, Munch) else row
+                     for row in rows]
+        by_type = {}
+        for position, tag in enumerate(tags):
+            by_type.setdefault(tag, []).append(position)
+        for tag, positions in by_type.items():
+            for field, converter in self.converters(command, tag).items():
+                targets = [row for row in (converted[position]
+                                           for position in positions)
+                           if isinstance(row, Munch) and field in row]
+                values = _convert_column(converter,
+                                         [row[field] for row in targets])
+                for row, value in zip(targets, values):
+                    row[field] = value
+        return converted
+
+    def convert_columns(self, command, element_type, columns):
+        """
+        Returns a copy of the given ``field -> list of values`` dict,
+        whose fields are converted according to the element type
+        """
+        converted = columns.__class__(columns)
+        converters = self.converters(command, element_type)
+        for field, converter in converters.items():
+            if field in converted:
+                converted[field] = _convert_column(converter,
+                                                   converted[field])
+        return converted
+
+
+default_registry = SchemaRegistry()
+
+_SIZE_FIELDS = ("soft_size", "soft_size_MiB", "hard_size", "hard_size_MiB",
+                "snapshot_size", "snapshot_size_MiB", "used_by_volumes",
+                "used_by_volumes_MiB", "used_by_snapshots",
+                "used_by_snapshots_MiB", "total_volume_size",
+                "total_volume_size_MiB", "empty_space_soft",
+                "empty_space_soft_MiB", "empty_space_hard",
+                "empty_space_hard_MiB")
+
+default_registry.register(
+    "pool_list", "pool",
+    locked=to_bool, create_last_consistent_snapshot=to_bool,
+    **dict((field, to_int) for field in _SIZE_FIELDS))
+default_registry.register(
+    "vol_list", "volume",
+    size=to_int, size_MiB=to_int, capacity=to_int, used_capacity=to_int,
+    delete_priority=to_int, locked=to_bool, modified=to_bool,
+    mirrored=to_bool, compressed=to_bool, snapshot_time=to_datetime)
+default_registry.register(
+    "snapshot_list", "volume",
+    size=to_int, size_MiB=to_int, capacity=to_int, used_capacity=to_int,
+    delete_priority=to_int, locked=to_bool, modified=to_bool,
+    snapshot_time=to_datetime)
+default_registry.register(
+    "mirror_list", None,
+    active=to_bool, connected=to_bool)
+default_registry.register(
+    "vol_mapping_list", None, lun=to_int)
@@ -0,0 +1,79 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+""" IBM XCLI singleflight Module
+
+.. module: singleflight
+
+:Description: Coalesces identical calls made at the same time: the first
+ caller makes the call, and the callers that come while it is in flight
+ wait for it and share its result (or its exception). ``XCLIClient`` uses
+ it for read-only commands if its ``coalesce_reads`` is set, so that
+ threads asking an array the same question at the same moment share one
+ round trip and one response, which they should treat as read-only.
+
+"""
+
+from threading import Event, Lock
+
+
+class _Call(object):
+    __slots__ = ["done", "result", "error", "followers"]
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight(object):
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """
+        Returns ``function()``, or the result of the call of the same
+        ``key`` in flight
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.followers += 1
+                leader = False
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def __len__(self):
+        """The number of calls in flight"""
+        return len(self._calls)
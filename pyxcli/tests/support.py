@@ -0,0 +1,48 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+"""Helpers shared by the tests"""
+
+import codecs
+import os
+import time
+
+
+def read_response(fname):
+    """Returns the text of a response of the response directory"""
+    fullname = os.path.join(os.path.dirname(__file__), "response", fname)
+    with codecs.open(fullname, encoding="utf-8") as text:
+        return text.read()
+
+
+def wait_for(condition, timeout=5):
+    """Waits (up to ``timeout`` seconds) until ``condition()`` is true"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.001)
+
+
+class Clock(object):
+    """A clock whose time moves only when ``now`` is set, or it sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
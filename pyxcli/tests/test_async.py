@@ -0,0 +1,103 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pyxcli.client import XCLIClient
+from pyxcli.errors import VolumeBadNameError
+from pyxcli.helpers.xml_util import fromstring
+from pyxcli.response import XCLIResponse
+from pyxcli.tests.support import read_response
+
+
+VOLUME_BAD_NAME = """<command id="0">
+<administrator><command>
+    <code value="VOLUME_BAD_NAME"/>
+    <status value="3"/>
+    <status_str value="Volume name does not exist"/>
+    <return/>
+</command></administrator>
+<aserver status="DELIVERY_SUCCESSFUL"/>
+</command>"""
+
+
+class FakeTransport(object):
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.sent = []
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+    def send(self, data, **kwargs):
+        self.release.wait(5)
+        self.sent.append(data)
+        if b"vol_delete" in data:
+            return fromstring(VOLUME_BAD_NAME)
+        return fromstring(read_response("success.txt"))
+
+
+class ExecuteAsyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.client = XCLIClient(self.transport, "admin", "pass",
+                                 populate=False)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_acmd(self):
+        future = self.client.acmd.pool_list()
+        self.assertIsInstance(future.result(5), XCLIResponse)
+        user_client = self.client.get_user_client("other", "pass")
+        future = user_client.acmd.pool_list()
+        self.assertGreater(len(future.result(5)), 0)
+        self.assertEqual(len(self.transport.sent), 2)
+
+    def test_errors_are_propagated(self):
+        future = self.client.execute_async("vol_delete", vol="v1")
+        self.assertRaises(VolumeBadNameError, future.result, 5)
+        self.assertIsInstance(future.exception(), VolumeBadNameError)
+
+    def test_cancel_before_send(self):
+        self.transport.release.clear()
+        first = self.client.acmd.pool_list()
+        second = self.client.acmd.vol_list()
+        self.assertTrue(second.cancel())
+        self.transport.release.set()
+        first.result(5)
+        self.assertTrue(second.cancelled())
+        self.assertEqual(len(self.transport.sent), 1)
+
+    def test_shared_executor(self):
+        executor = ThreadPoolExecutor(2)
+        try:
+            self.client.executor = executor
+            self.client.acmd.pool_list().result(5)
+            self.assertIsNone(self.client._own_executor)
+        finally:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import unittest
+from pyxcli.client import BaseXCLIClient
+from pyxcli.errors import VolumeExistsError, CorruptResponse
+
+
+class FakeClient(BaseXCLIClient):
+
+    def __init__(self, failures=()):
+        BaseXCLIClient.__init__(self)
+        self.failures = dict(failures)
+        self.executed = []
+
+    def execute(self, cmd, **kwargs):
+        self.executed.append(kwargs["vol"])
+        error = self.failures.get(kwargs["vol"])
+        if error is not None:
+            raise error
+        return "created %s" % (kwargs["vol"],)
+
+
+def _volumes(count):
+    return ({"vol": "v%d" % (i,), "size": 17} for i in range(count))
+
+
+class MapTest(unittest.TestCase):
+
+    def test_results(self):
+        error = VolumeExistsError("VOLUME_EXISTS", "exists", None, [])
+        client = FakeClient({"v3": error})
+        result = client.map("vol_create", _volumes(10), concurrency=3)
+        self.assertEqual(len(result), 10)
+        self.assertEqual([item.index for item in result], list(range(10)))
+        self.assertEqual(len(result.successes), 9)
+        self.assertEqual(result.items[2].response, "created v2")
+        failure, = result.failures
+        self.assertIs(failure.error, error)
+        self.assertEqual(failure.kwargs["vol"], "v3")
+        self.assertFalse(result.ok)
+        self.assertFalse(result.stopped)
+        self.assertGreaterEqual(result.elapsed, 0)
+        self.assertRaises(VolumeExistsError, result.raise_for_failures)
+
+    def test_stop_on_error(self):
+        error = VolumeExistsError("VOLUME_EXISTS", "exists", None, [])
+        client = FakeClient({"v3": error})
+        result = client.map("vol_create", _volumes(100), concurrency=1,
+                            stop_on_error=True)
+        self.assertTrue(result.stopped)
+        self.assertEqual(len(result), 4)
+        self.assertEqual(len(client.executed), 4)
+
+    def test_connection_errors_stop(self):
+        client = FakeClient({"v5": CorruptResponse("cut")})
+        result = client.map("vol_create", _volumes(100), concurrency=2)
+        self.assertTrue(result.stopped)
+        self.assertLess(len(result), 100)
+        self.assertIsInstance(result.failures[-1].error, CorruptResponse)
+
+    def test_empty(self):
+        result = FakeClient().map("vol_create", [])
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import threading
+import unittest
+from mock import Mock, patch
+from pyxcli.cache import ResponseCache
+from pyxcli.catalog import CommandCatalog
+from pyxcli.client import XCLIClient
+from pyxcli.registry import CommandRegistry
+from pyxcli.tests.support import Clock
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = ResponseCache(ttls={"pool_list": 10, "event_list": 0},
+                                   max_entries=3, clock=self.clock)
+        self.scope = object()
+        self.sent = []
+
+    def execute(self, cmd, scope=None, user="admin", target=None, **kwargs):
+        def send():
+            self.sent.append(cmd)
+            return Mock(name=cmd)
+        return self.cache.execute(scope or self.scope, (("user", user),),
+                                  target, cmd, kwargs, send)
+
+    def test_ttl(self):
+        first = self.execute("vol_list", vol="v1")
+        self.assertIs(self.execute("vol_list", vol="v1"), first)
+        self.execute("vol_list", vol="v2")
+        self.execute("vol_list", vol="v1", user="other")
+        self.clock.now += 6
+        self.execute("vol_list", vol="v1")
+        self.execute("pool_list")
+        self.execute("pool_list")
+        self.execute("event_list")
+        self.execute("event_list")
+        self.assertEqual(self.sent, ["vol_list", "vol_list", "vol_list",
+                                     "vol_list", "pool_list", "event_list",
+                                     "event_list"])
+        stats = self.cache.stats
+        self.assertEqual((stats.hits, stats.misses), (2, 5))
+
+    def test_lru(self):
+        for pool in ("p1", "p2", "p3"):
+            self.execute("pool_list", pool=pool)
+        self.execute("pool_list", pool="p1")
+        self.execute("pool_list", pool="p4")
+        self.assertEqual(self.cache.stats.evictions, 1)
+        self.execute("pool_list", pool="p1")
+        self.execute("pool_list", pool="p2")
+        self.assertEqual(self.sent, ["pool_list"] * 5)
+
+    def test_invalidation(self):
+        self.cache.max_entries = 10
+        self.execute("vol_list")
+        self.execute("host_list")
+        self.execute("vol_list", target="remote")
+        other = object()
+        self.execute("vol_list", scope=other)
+        self.execute("vol_create", vol="v1", size=17)
+        self.assertEqual(len(self.cache), 3)
+        del self.sent[:]
+        for kwargs in ({}, {"target": "remote"}, {"scope": other}):
+            self.execute("vol_list", **kwargs)
+        self.execute("host_list")
+        self.assertEqual(self.sent, ["vol_list"])
+        self.assertEqual(self.cache.stats.invalidations, 1)
+
+    def test_failed_commands_invalidate(self):
+        self.execute("host_list")
+        with self.assertRaises(ValueError):
+            self.cache.execute(self.scope, (), None, "map_vol", {},
+                               Mock(side_effect=ValueError))
+        self.assertEqual(len(self.cache), 0)
+
+    def _slow_read(self, cmd, write):
+        # sends cmd, and executes write while cmd is in flight
+        sending = threading.Event()
+        proceed = threading.Event()
+
+        def send():
+            sending.set()
+            proceed.wait()
+            return Mock(name=cmd)
+        reader = threading.Thread(target=self.cache.execute,
+                                  args=(self.scope, (), None, cmd, {},
+                                        send))
+        reader.start()
+        sending.wait()
+        self.execute(write)
+        proceed.set()
+        reader.join()
+
+    def test_writes_drop_reads_in_flight(self):
+        self._slow_read("vol_list", "vol_create")
+        self.assertEqual(len(self.cache), 0)
+        self._slow_read("vol_list", "host_create")
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache._generations, {})
+        self.cache.clear()
+        self._slow_read("vol_list", "vol_create")
+        self.execute("vol_list")
+        self.assertEqual(self.sent, ["vol_create", "host_create",
+                                     "vol_create", "vol_list"])
+
+
+class ClientResponseCacheTest(unittest.TestCase):
+
+    def test_client(self):
+        client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        client.response_cache = ResponseCache()
+        with patch.object(client, "_send_command") as send:
+            self.assertIs(client.cmd.vol_list(), client.cmd.vol_list())
+            self.assertEqual(send.call_count, 1)
+            user_client = client.get_user_client("other", "pass")
+            user_client.cmd.vol_list()
+            self.assertEqual(send.call_count, 2)
+            user_client.cmd.vol_delete(vol="v1")
+            client.cmd.vol_list()
+            self.assertEqual(send.call_count, 4)
+        self.assertEqual(client.response_cache.stats.hits, 1)
+
+    def test_options(self):
+        client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        client.response_cache = ResponseCache()
+        good = client.get_user_client("alice", "right")
+        bad = client.get_user_client("alice", "WRONG")
+        with patch.object(client, "_send_command") as send:
+            good.cmd.vol_list()
+            bad.cmd.vol_list()
+            self.assertEqual(send.call_count, 2)
+            with good.options(priority="background"):
+                good.cmd.vol_list()
+            self.assertEqual(send.call_count, 2)
+
+    def test_client_registry(self):
+        client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        client._add_catalog(CommandCatalog([
+            ("dm_stats", "Displays data migration statistics.", "")]))
+        client.response_cache = ResponseCache()
+        with patch.object(client, "_send_command") as send:
+            client.cmd.dm_stats()
+            client.cmd.dm_stats()
+            self.assertEqual(send.call_count, 1)
+            client.response_cache.registry = CommandRegistry()
+            client.cmd.dm_stats()
+            self.assertEqual(send.call_count, 2)
+            self.assertEqual(len(client.response_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
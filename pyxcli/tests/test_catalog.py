@@ -0,0 +1,160 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import Mock
+from munch import Munch
+from pyxcli.catalog import CatalogCache, CommandCatalog
+from pyxcli.client import BaseXCLIClient, XCLIClientForUser
+from pyxcli.client import RemoteXCLIClient
+
+HELP = [Munch(name="vol_list", description="Lists volumes.",
+              syntax="vol_list [ vol=VolName ]"),
+        Munch(name="vol_create", description="Creates a volume.",
+              syntax="vol_create vol=VolName size=GB pool=PoolName")]
+
+
+class FakeClient(BaseXCLIClient):
+
+    def __init__(self, version="12.3.2"):
+        BaseXCLIClient.__init__(self)
+        self.set_options(user="admin")
+        self.version = version
+        self.executed = []
+
+    def execute(self, cmd, **kwargs):
+        self.executed.append(cmd)
+        if cmd == "help":
+            return HELP
+        return Mock(as_single_element=Munch(system_version=self.version))
+
+
+class FakeRoot(BaseXCLIClient):
+
+    def __init__(self):
+        BaseXCLIClient.__init__(self)
+        self.executed = []
+
+    def execute_remote(self, target, cmd, **kwargs):
+        self.executed.append((target, self.get_option("user"), cmd))
+        return HELP
+
+
+class CatalogCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = CatalogCache(os.path.join(self.directory, "catalogs"))
+        self.key = {"user": "admin", "version": {"system_version": "1"}}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_store_and_load(self):
+        self.assertIsNone(self.cache.load(self.key))
+        self.cache.store(self.key, CommandCatalog.from_help(HELP))
+        catalog = self.cache.load(self.key)
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(catalog.entries[0][0], "vol_list")
+        self.assertIsNone(self.cache.load(dict(self.key, user="other")))
+        self.cache.invalidate(self.key)
+        self.assertIsNone(self.cache.load(self.key))
+
+    def test_bad_files_are_ignored(self):
+        self.cache.store(self.key, CommandCatalog.from_help(HELP))
+        path = self.cache._path(self.key)
+        for content in ("{", "[]", '{"format": 0}'):
+            with open(path, "w") as f:
+                f.write(content)
+            self.assertIsNone(self.cache.load(self.key))
+
+    def test_store_failures_are_ignored(self):
+        cache = CatalogCache(os.path.join(self.directory, "file"))
+        open(cache.directory, "w").close()
+        cache.store(self.key, CommandCatalog.from_help(HELP))
+        self.assertIsNone(cache.load(self.key))
+
+
+class PopulateCommandsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_without_cache(self):
+        client = FakeClient()
+        client._populate_commands()
+        self.assertEqual(client.executed, ["help"])
+        self.assertEqual(client.cmd.vol_list.syntax, HELP[0].syntax)
+
+    def test_with_cache(self):
+        cache = CatalogCache(self.directory)
+        first = FakeClient()
+        first.catalog_cache = cache
+        first._populate_commands()
+        self.assertEqual(first.executed, ["version_get", "help"])
+
+        second = FakeClient()
+        second.catalog_cache = cache
+        second._populate_commands()
+        self.assertEqual(second.executed, ["version_get"])
+        self.assertEqual(second.cmd.vol_create.__doc__,
+                         "Creates a volume.\nUsage: " + HELP[1].syntax)
+
+        upgraded = FakeClient(version="12.3.3")
+        upgraded.catalog_cache = cache
+        upgraded._populate_commands()
+        self.assertEqual(upgraded.executed, ["version_get", "help"])
+
+
+class SharedCatalogTest(unittest.TestCase):
+
+    def test_layered_clients_share_the_catalog(self):
+        root = FakeRoot()
+        alice = XCLIClientForUser(root, "alice", "pass")
+        bob = XCLIClientForUser(root, "bob", "pass")
+        self.assertEqual(root.executed, [])
+        self.assertEqual(alice.cmd.vol_list.syntax, HELP[0].syntax)
+        self.assertEqual(bob.cmd.vol_create.__doc__,
+                         "Creates a volume.\nUsage: " + HELP[1].syntax)
+        self.assertIn("vol_create", dir(bob.cmd))
+        self.assertEqual(root.executed, [(None, "alice", "help")])
+
+    def test_remote_targets_have_their_own_catalog(self):
+        root = FakeRoot()
+        remote = RemoteXCLIClient(root, "target1")
+        other = RemoteXCLIClient(root, "target1")
+        self.assertEqual(root.executed, [])
+        self.assertIn("vol_list", dir(remote.cmd))
+        self.assertEqual(other.cmd.vol_list.syntax, HELP[0].syntax)
+        self.assertEqual(root.executed, [("target1", None, "help")])
+        alice = XCLIClientForUser(root, "alice", "pass")
+        self.assertIsNotNone(alice.cmd.vol_list.__doc__)
+        self.assertEqual(root.executed[1:], [(None, "alice", "help")])
+
+    def test_unknown_commands(self):
+        client = XCLIClientForUser(FakeRoot(), "alice", "pass")
+        self.assertIsNone(client.cmd.no_such_command.syntax)
+        self.assertIsNone(client.cmd.no_such_command.__doc__)
+
+
+if __name__ == "__main__":
+    unittest.main()
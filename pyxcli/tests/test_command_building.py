@@ -0,0 +1,116 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import unittest
+from mock import Mock, patch
+from pyxcli import client as client_module
+from pyxcli.client import XCLIClient
+from pyxcli.helpers import xml_util as etree
+
+
+def _with_etree(client, index, cmd, params, options, remote_target=None):
+    # how _build_command used to write commands
+    root = etree.Element("command", id=str(index), type=cmd,
+                         close_on_return="no")
+    if remote_target:
+        root.attrib["remote_target"] = remote_target
+    for k, v in options.items():
+        root.append(etree.Element("option", name=client._dump_xcli(k),
+                                  value=client._dump_xcli(v)))
+    for k, v in params.items():
+        root.append(etree.Element("argument", name=client._dump_xcli(k),
+                                  value=client._dump_xcli(v)))
+    return etree.tostring(root)
+
+
+def _tree(data):
+    # ElementTree on Python 2 writes the attributes sorted, and tabs and
+    # carriage returns as they are
+    def walk(element):
+        return (element.tag, sorted(element.attrib.items()),
+                [walk(child) for child in element])
+    return walk(etree.fromstring(data))
+
+
+class BuildCommandTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = XCLIClient(Mock(), "user", "pass&word", populate=False)
+
+    def test_same_as_element_tree(self):
+        options = self.client._context()
+        cases = [
+            ("vol_list", {}, options, None),
+            ("vol_create", {"vol": "v1", "size": 17, "force": True},
+             options, "target"),
+            ("vol_rename", {"vol": u"\u00e9t\u00e9 <&> \"'\n"},
+             options, None),
+            ("help", {}, {}, None),
+        ]
+        for index, (cmd, params, opts, remote_target) in enumerate(cases, 1):
+            self.assertEqual(
+                _tree(self.client._build_command(cmd, params, opts,
+                                                 remote_target)),
+                _tree(_with_etree(self.client, index, cmd, params, opts,
+                                  remote_target)))
+
+    def test_values_are_escaped(self):
+        value = u"\u00e9t\u00e9 <&> \"'\r\n\t"
+        data = self.client._build_command("vol_rename", {"vol": value}, {})
+        self.assertEqual(etree.fromstring(data).find("argument").get("value"),
+                         value)
+
+    def test_options_are_cached(self):
+        options = self.client._context()
+        with patch.object(self.client, "_serialize_options",
+                          wraps=self.client._serialize_options) as serialize:
+            self.client._build_command("vol_list", {}, options)
+            self.client._build_command("pool_list", {}, options)
+            self.assertEqual(serialize.call_count, 1)
+            with self.client.options(gui_mode=False):
+                data = self.client._build_command("vol_list", {},
+                                                  self.client._context())
+            self.assertIn(b'name="gui-mode" value="no"', data)
+            self.assertEqual(serialize.call_count, 2)
+
+    def test_least_recently_used_options_are_dropped(self):
+        self.client.OPTION_FRAGMENTS = 2
+        first = {"user": "alice"}
+        with patch.object(self.client, "_serialize_options",
+                          wraps=self.client._serialize_options) as serialize:
+            self.client._build_command("vol_list", {}, first)
+            self.client._build_command("vol_list", {}, {"user": "bob"})
+            self.client._build_command("vol_list", {}, first)
+            self.client._build_command("vol_list", {}, {"user": "carol"})
+            self.assertEqual(serialize.call_count, 3)
+            self.client._build_command("vol_list", {}, first)
+            self.assertEqual(serialize.call_count, 3)
+            self.client._build_command("vol_list", {}, {"user": "bob"})
+            self.assertEqual(serialize.call_count, 4)
+        self.assertEqual(len(self.client._option_fragments), 2)
+
+    def test_password_is_masked_in_the_log(self):
+        options = self.client._context()
+        with patch.object(client_module, "xlog") as xlog:
+            data = self.client._build_command("vol_list", {}, options)
+        self.assertIn(b'value="pass&amp;word"', data)
+        logged = xlog.debug.call_args[0][1]
+        self.assertIn('name="password" value="XXX"', logged)
+        self.assertNotIn("pass&amp;word", logged)
+
+
+if __name__ == "__main__":
+    unittest.main()
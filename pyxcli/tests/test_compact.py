@@ -0,0 +1,97 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import pickle
+import unittest
+from pyxcli.compact import CompactTree, CompactFormatError
+from pyxcli.filters import equals
+from pyxcli.response import XCLIResponse
+from pyxcli.helpers.xml_util import fromstring, tostring
+from pyxcli.tests.support import read_response
+
+
+def _read_response(fname):
+    return fromstring(read_response(fname)).find("administrator/command")
+
+
+class CompactTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cmdroot = _read_response('error_w_return1.txt')
+        self.response = XCLIResponse(self.cmdroot, command="map_vol")
+
+    def test_tree_round_trip(self):
+        compact = CompactTree.from_element(self.cmdroot)
+        element = compact.to_element()
+        self.assertEqual(tostring(element).count(b"<"),
+                         tostring(self.cmdroot).count(b"<"))
+        self.assertEqual(CompactTree.from_element(element).codes,
+                         compact.codes)
+        loaded = CompactTree.from_bytes(compact.to_bytes())
+        self.assertEqual(loaded.strings, compact.strings)
+        self.assertEqual(loaded.codes, compact.codes)
+
+    def test_response_round_trip(self):
+        loaded = XCLIResponse.from_bytes(self.response.to_bytes())
+        self.assertEqual(loaded.command, "map_vol")
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(loaded.as_list, self.response.as_list)
+        self.assertEqual(loaded.as_single_element,
+                         self.response.as_single_element)
+        self.assertEqual(tostring(loaded.response_etree),
+                         tostring(CompactTree.from_element(
+                             self.cmdroot).to_element()))
+
+    def test_rows_do_not_need_the_tree(self):
+        loaded = XCLIResponse.from_bytes(self.response.to_bytes())
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(loaded[1].vol_name, "vol1")
+        results = loaded.all("results", where=equals("vol_name", ""))
+        self.assertEqual([r.nextra_element_id for r in results], ["1", "2"])
+        self.assertIsNone(loaded._response_etree)
+
+    def test_pickle(self):
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(self.response, protocol))
+            self.assertIsInstance(loaded, XCLIResponse)
+            self.assertEqual(loaded.as_list, self.response.as_list)
+
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, "requires pickle 5")
+    def test_pickle_out_of_band(self):
+        buffers = []
+        data = pickle.dumps(self.response, 5, buffer_callback=buffers.append)
+        self.assertEqual(len(buffers), 2)
+        loaded = pickle.loads(data, buffers=buffers)
+        self.assertEqual(loaded.as_list, self.response.as_list)
+
+    def test_bad_data(self):
+        data = self.response.to_bytes()
+        self.assertRaises(CompactFormatError, CompactTree.from_bytes,
+                          data[:-1])
+        self.assertRaises(CompactFormatError, CompactTree.from_bytes,
+                          b"XXXX" + data[4:])
+        self.assertRaises(CompactFormatError, CompactTree.from_bytes, b"")
+
+    def test_flat_return(self):
+        cmdroot = fromstring('<command><return><a value="1"/><b value=""/>'
+                             '</return></command>')
+        response = XCLIResponse(cmdroot)
+        loaded = XCLIResponse.from_bytes(response.to_bytes())
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(loaded.as_list, ["1", ""])
+        self.assertEqual(loaded.as_single_element, {"a": "1", "b": ""})
+        element = loaded.response_etree.find("return/b")
+        self.assertEqual(element.get("value"), "")
@@ -0,0 +1,76 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import unittest
+from mock import patch
+from pyxcli import response
+from pyxcli.response import XCLIResponse
+from pyxcli.helpers.xml_util import fromstring
+from pyxcli.filters import equals, startswith, nonempty, in_set
+
+VOL_LIST = """<command><return>
+    <volume id="1"><name value="vol1"/><sg_name value=""/>
+        <pool_name value="p1"/></volume>
+    <volume id="2"><name value="tst_snap1"/><sg_name value="sg1"/>
+        <pool_name value="p2"/></volume>
+    <volume id="3"><name value="tst_snap2"/><sg_name value="sg1"/>
+        <pool_name value="p1"/></volume>
+    <snapshot id="4"><name value="tst_snap3"/></snapshot>
+</return></command>"""
+
+
+class XCLIResponseFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.response = XCLIResponse(fromstring(VOL_LIST))
+
+    def _names(self, **kwargs):
+        return [v.name for v in self.response.all(**kwargs)]
+
+    def test_single_predicates(self):
+        self.assertEqual(self._names(where=equals("pool_name", "p1")),
+                         ["vol1", "tst_snap2"])
+        self.assertEqual(self._names(where=startswith("name", "tst_")),
+                         ["tst_snap1", "tst_snap2", "tst_snap3"])
+        self.assertEqual(self._names(where=nonempty("sg_name")),
+                         ["tst_snap1", "tst_snap2"])
+        self.assertEqual(self._names(where=in_set("pool_name", ["p2"])),
+                         ["tst_snap1"])
+
+    def test_predicates_are_combined(self):
+        where = [startswith("name", "tst_"), equals("pool_name", "p1")]
+        self.assertEqual(self._names(where=where), ["tst_snap2"])
+        self.assertEqual(self._names(element_type="snapshot",
+                                     where=startswith("name", "tst_")),
+                         ["tst_snap3"])
+
+    def test_missing_field_does_not_match(self):
+        self.assertEqual(self._names(where=equals("sg_name", "sg1")),
+                         ["tst_snap1", "tst_snap2"])
+        self.assertEqual(self._names(where=nonempty("pool_name")),
+                         ["vol1", "tst_snap1", "tst_snap2"])
+
+    def test_bunches_are_built_only_for_matches(self):
+        with patch.object(response, "_populate_bunch_with_element",
+                          wraps=response._populate_bunch_with_element) as pop:
+            self._names(where=equals("name", "vol1"))
+            built = [c[0][0].get("id") for c in pop.call_args_list
+                     if c[0][0].tag == "volume"]
+            self.assertEqual(built, ["1"])
+
+    def test_as_dict_where(self):
+        result = self.response.as_dict("name", where=nonempty("sg_name"))
+        self.assertEqual(sorted(result), ["tst_snap1", "tst_snap2"])
@@ -0,0 +1,110 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import threading
+import time
+import unittest
+from pyxcli.errors import CommandFailedConnectionError
+from pyxcli.fleet import FleetClient, FleetTimeoutError
+from pyxcli.transports import ClosedTransportError
+
+
+class FakeArray(object):
+
+    def __init__(self, name, delay=0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.active = 0
+        self.most_active = 0
+        self._lock = threading.Lock()
+
+    def execute(self, cmd, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return "%s of %s" % (cmd, self.name)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakePool(object):
+
+    def __init__(self, arrays):
+        self.arrays = dict((array.name, array) for array in arrays)
+        self.requests = []
+
+    def get(self, user, password, endpoints):
+        self.requests.append((user, password, endpoints))
+        array = self.arrays.get(endpoints[0])
+        if array is None:
+            raise ClosedTransportError("cannot connect")
+        return array
+
+
+class FleetClientTest(unittest.TestCase):
+
+    def test_partial_failures(self):
+        error = CommandFailedConnectionError("X", "failed", None, [])
+        pool = FakePool([FakeArray("a1"), FakeArray("a2", error=error)])
+        with FleetClient(["a1", "a2", "a3"], "admin", "pass",
+                         pool=pool) as fleet:
+            report = fleet.gather("vol_list")
+        self.assertEqual(report.responses, {"a1": "vol_list of a1"})
+        self.assertIs(report.failures["a2"], error)
+        self.assertIsInstance(report.failures["a3"], ClosedTransportError)
+        self.assertFalse(report.ok)
+        self.assertIn(("admin", "pass", ["a1"]), pool.requests)
+
+    def test_results_stream_as_they_complete(self):
+        pool = FakePool([FakeArray("slow", delay=0.2), FakeArray("fast")])
+        with FleetClient({"slow": "slow", "fast": ["fast", "other"]},
+                         "admin", "pass", pool=pool) as fleet:
+            results = list(fleet.execute("pool_list"))
+        self.assertEqual([result.array for result in results],
+                         ["fast", "slow"])
+        self.assertTrue(all(result.ok for result in results))
+        self.assertGreaterEqual(results[1].elapsed, 0.2)
+
+    def test_timeout(self):
+        pool = FakePool([FakeArray("slow", delay=0.5), FakeArray("fast")])
+        with FleetClient(["slow", "fast"], "admin", "pass", pool=pool,
+                         timeout=0.1) as fleet:
+            report = fleet.gather("vol_list")
+        self.assertEqual(list(report.responses), ["fast"])
+        self.assertIsInstance(report.failures["slow"], FleetTimeoutError)
+
+    def test_per_array_limit(self):
+        array = FakeArray("a1", delay=0.05)
+        with FleetClient(["a1"], "admin", "pass", pool=FakePool([array]),
+                         per_array=2) as fleet:
+            threads = [threading.Thread(target=fleet.gather,
+                                        args=("vol_list",))
+                       for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(array.most_active, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
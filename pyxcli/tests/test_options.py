@@ -0,0 +1,135 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import threading
+import unittest
+from mock import Mock
+from pyxcli.client import XCLIClient
+
+
+class Transport(object):
+
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, data, **kwargs):
+        with self._lock:
+            self.sent.append((threading.current_thread().name, data))
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def _client():
+    client = XCLIClient(Transport(), "admin", "pass", populate=False)
+    client._build_response = Mock()
+    return client
+
+
+class OptionContextTest(unittest.TestCase):
+
+    def test_contexts_are_per_thread(self):
+        client = _client()
+        entered = threading.Event()
+        leave = threading.Event()
+        seen = []
+
+        def background():
+            with client.options(priority="background"):
+                entered.set()
+                leave.wait(5)
+                seen.append(client.get_option("priority"))
+        thread = threading.Thread(target=background)
+        thread.start()
+        entered.wait(5)
+        self.assertIsNone(client.get_option("priority"))
+        leave.set()
+        thread.join()
+        self.assertEqual(seen, ["background"])
+
+    def test_set_options_are_shared(self):
+        client = _client()
+        client.set_options(gui_mode="no")
+        seen = []
+        thread = threading.Thread(
+            target=lambda: seen.append(client.get_option("gui-mode")))
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, ["no"])
+
+    def test_contexts_are_not_changed(self):
+        client = _client()
+        before = client._context()
+        with client.options(gui_mode="no"):
+            self.assertEqual(client.get_option("gui-mode"), "no")
+            client.set_options(print_header="yes")
+            self.assertEqual(client.get_option("print-header"), "yes")
+        self.assertIs(client._context(), before)
+        self.assertEqual(before["gui-mode"], "yes")
+        self.assertEqual(before["print-header"], "no")
+
+    def test_layered_options(self):
+        client = _client()
+        user = client.get_user_client("user1", "pass1")
+        options = user._context()
+        self.assertEqual(options["user"], "user1")
+        self.assertEqual(options["compress-output"], "base64")
+        self.assertIs(user._context(), options)
+        with client.options(gui_mode="no"):
+            self.assertEqual(user.get_option("gui-mode"), "no")
+            self.assertEqual(user.get_option("user"), "user1")
+        self.assertEqual(client.get_option("user"), "admin")
+
+    def test_user_clients_run_concurrently(self):
+        client = _client()
+        users = [client.get_user_client("user%d" % (i,), "pass")
+                 for i in range(4)]
+
+        def run(user):
+            for i in range(50):
+                with user.options(gui_mode="no"):
+                    user.cmd.vol_delete(vol="v%d" % (i,))
+        threads = [threading.Thread(target=run, args=(user,),
+                                    name=user.get_option("user"))
+                   for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(client.transport.sent), 200)
+        for name, data in client.transport.sent:
+            self.assertIn(('name="user" value="%s"' % (name,)).encode(),
+                          data)
+            self.assertIn(b'name="gui-mode" value="no"', data)
+
+    def test_async_and_map_use_the_caller_options(self):
+        client = _client()
+        client.scheduler = Mock(wraps=client.scheduler)
+        with client.options(priority="background"):
+            client.acmd.vol_list().result()
+            client.map("vol_delete", [{"vol": "v1"}, {"vol": "v2"}])
+        self.assertEqual([call[0][0] for call in
+                          client.scheduler.slot.call_args_list],
+                         ["background"] * 3)
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
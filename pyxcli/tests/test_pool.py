@@ -0,0 +1,101 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import threading
+import time
+import unittest
+from mock import Mock
+from pyxcli.pool import XCLIClientPool
+
+
+class SlowConnector(object):
+    """Connects slowly, counting its connections"""
+
+    def __init__(self):
+        self.connected = []
+        self.lock = threading.Lock()
+
+    def __call__(self, user, password, endpoints):
+        time.sleep(0.01)
+        client = Mock()
+        client.is_connected.return_value = True
+        client.get_user_client.side_effect = lambda user, password: Mock()
+        with self.lock:
+            self.connected.append((tuple(endpoints), client))
+        return client
+
+
+class XCLIClientPoolTest(unittest.TestCase):
+
+    THREADS = 32
+
+    def setUp(self):
+        self.connector = SlowConnector()
+        self.pool = XCLIClientPool(self.connector)
+
+    def _run(self, *functions):
+        errors = []
+
+        def run(function):
+            try:
+                function()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=run, args=(function,))
+                   for function in functions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_one_connection_by_system(self):
+        clients = []
+
+        def get(user, endpoints):
+            clients.append(self.pool.get(user, "pass", endpoints))
+        self._run(*[
+            lambda i=i: get("user%d" % (i % 4),
+                            ["array%d" % (i % 2), "backup%d" % (i % 2)])
+            for i in range(self.THREADS)])
+        self.assertEqual(sorted(endpoints for endpoints, client
+                                in self.connector.connected),
+                         [("array0", "backup0"), ("array1", "backup1")])
+        self.assertEqual(len(clients), self.THREADS)
+        self.assertEqual(len(set(map(id, clients))), 4)
+        self.assertIs(self.pool.pool["array0"], self.pool.pool["backup0"])
+
+    def test_flush_while_getting(self):
+        self._run(*[
+            (lambda i=i: self.pool.get("admin", "pass", "array%d" % i))
+            if i % 2 else self.pool.flush
+            for i in range(self.THREADS)])
+        self.pool.flush()
+        self.assertEqual(self.pool.pool, {})
+        for endpoints, client in self.connector.connected:
+            client.close.assert_called_with()
+
+    def test_stale_clients_are_replaced(self):
+        first = self.pool.get("admin", "pass", "array1")
+        self.connector.connected[0][1].is_connected.return_value = False
+        second = self.pool.get("admin", "pass", "array1")
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.connector.connected), 2)
+        self.connector.connected[0][1].close.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import unittest
+from mock import Mock
+from pyxcli.client import XCLIClient
+from pyxcli.errors import MCLTimeoutError, VolumeExistsError
+from pyxcli.pool import XCLIClientPool
+from pyxcli.ratelimit import RateLimiter, TokenBucket
+from pyxcli.tests.support import Clock
+
+
+def _error(cls, code):
+    return cls(code, "failed", None, return_value=[])
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_reserve(self):
+        clock = Clock()
+        bucket = TokenBucket(2, burst=2, clock=clock)
+        self.assertEqual([bucket.reserve() for i in range(4)],
+                         [0, 0, 0.5, 1.0])
+        clock.now += 1.5
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0.5)
+
+    def test_burst(self):
+        clock = Clock()
+        bucket = TokenBucket(10, clock=clock)
+        clock.now += 60
+        self.assertEqual([bucket.reserve() for i in range(11)],
+                         [0] * 10 + [0.1])
+
+    def test_set_rate(self):
+        clock = Clock()
+        bucket = TokenBucket(1, clock=clock)
+        bucket.reserve()
+        bucket.set_rate(4)
+        self.assertEqual(bucket.reserve(), 0.25)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.limiter = RateLimiter(reads=10, writes=1, clock=self.clock,
+                                   sleep=self.clock.sleep)
+
+    def test_separate_budgets(self):
+        for i in range(10):
+            self.limiter.acquire(True)
+        self.limiter.acquire(False)
+        self.assertEqual(self.clock.sleeps, [])
+        self.limiter.acquire(False)
+        self.limiter.acquire(True)
+        self.assertEqual(self.clock.sleeps, [1.0, 0.1])
+        stats = self.limiter.stats
+        self.assertEqual(stats.throttled, 2)
+        self.assertAlmostEqual(stats.waited, 1.1)
+
+    def test_unlimited(self):
+        limiter = RateLimiter(writes=1, sleep=self.clock.sleep)
+        for i in range(100):
+            limiter.acquire(True)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_adaptive_backoff(self):
+        self.limiter.report(_error(MCLTimeoutError, "MCL_TIMEOUT"))
+        self.limiter.report(_error(MCLTimeoutError, "MCL_TIMEOUT"))
+        self.assertEqual(self.limiter.stats.busy, 2)
+        self.assertEqual(self.limiter.factor, 0.25)
+        self.assertEqual(self.limiter._buckets[0].rate, 2.5)
+        self.assertEqual(self.limiter._buckets[1].rate, 0.25)
+        self.limiter.report(_error(VolumeExistsError, "VOLUME_EXISTS"))
+        self.assertEqual(self.limiter.factor, 0.3)
+        for i in range(100):
+            self.limiter.report()
+        self.assertEqual(self.limiter.factor, 1.0)
+        self.assertEqual(self.limiter._buckets[1].rate, 1)
+
+    def test_floor(self):
+        for i in range(20):
+            self.limiter.report(_error(MCLTimeoutError, "MCL_TIMEOUT"))
+        self.assertEqual(self.limiter.factor, 0.05)
+
+    def test_not_adaptive(self):
+        limiter = RateLimiter(writes=1, adaptive=False)
+        limiter.report(_error(MCLTimeoutError, "MCL_TIMEOUT"))
+        self.assertEqual(limiter.factor, 1.0)
+
+
+class ClientRateLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        self.client._build_response = Mock()
+        self.client.rate_limiter = Mock()
+
+    def test_kinds(self):
+        self.client.cmd.vol_list()
+        self.client.cmd.vol_create(vol="v1", size=17, pool="p1")
+        self.assertEqual([call[0][0] for call in
+                          self.client.rate_limiter.acquire.call_args_list],
+                         [True, False])
+        self.client.rate_limiter.report.assert_called_with()
+
+    def test_busy(self):
+        error = _error(MCLTimeoutError, "MCL_TIMEOUT")
+        self.client._build_response.side_effect = error
+        self.assertRaises(MCLTimeoutError, self.client.cmd.vol_delete,
+                          vol="v1")
+        self.client.rate_limiter.report.assert_called_once_with(error)
+
+
+class PoolRateLimitTest(unittest.TestCase):
+
+    def test_per_array(self):
+        pool = XCLIClientPool(Mock(side_effect=lambda *args: Mock()),
+                              rate_limit=dict(reads=50, writes=10),
+                              rate_limits={"array2": dict(writes=2)})
+        first = pool._rate_limiter(["array1"])
+        self.assertEqual(first.rates, (50, 10))
+        second = pool._rate_limiter(["array3", "array2"])
+        self.assertEqual(second.rates, (None, 2))
+        pool.get("admin", "pass", "array1")
+        self.assertIsInstance(pool.pool["array1"].client.rate_limiter,
+                              RateLimiter)
+
+    def test_no_limits(self):
+        pool = XCLIClientPool(Mock())
+        self.assertIsNone(pool._rate_limiter(["array1"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
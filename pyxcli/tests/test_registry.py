@@ -0,0 +1,109 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import unittest
+from mock import Mock
+from pyxcli.catalog import CommandCatalog
+from pyxcli.client import XCLIClient
+from pyxcli.registry import CommandRegistry, default_registry, LARGE, SMALL
+
+
+class CommandRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = CommandRegistry()
+
+    def test_naming_conventions(self):
+        traits = self.registry.traits("vol_mapping_list")
+        self.assertTrue(traits.read_only)
+        self.assertTrue(traits.idempotent)
+        self.assertEqual(traits.kinds, set(["vol", "mapping"]))
+        self.assertEqual(traits.touches, set())
+        self.assertEqual(traits.response_size, LARGE)
+        traits = self.registry.traits("vol_create")
+        self.assertFalse(traits.read_only)
+        self.assertFalse(traits.idempotent)
+        self.assertEqual(traits.kinds, set(["vol"]))
+        self.assertTrue(traits.touches.issuperset(["vol", "pool"]))
+        self.assertEqual(self.registry.traits("version_get").response_size,
+                         SMALL)
+
+    def test_catalog(self):
+        catalog = CommandCatalog([
+            ("vol_list", "Lists volumes.", "vol_list"),
+            ("dm_stats", "Displays data migration statistics.", "dm_stats"),
+            ("vol_move", "Moves a volume.", "vol_move vol=VolName")])
+        self.registry.add_catalog(catalog)
+        self.assertTrue(self.registry.traits("dm_stats").read_only)
+        self.assertFalse(self.registry.traits("vol_move").read_only)
+        self.assertEqual(self.registry.names(),
+                         ["dm_stats", "vol_list", "vol_move"])
+        self.assertIn("vol_move", self.registry)
+
+    def test_registered_traits_take_precedence(self):
+        self.registry.register("vol_lock", idempotent=True)
+        self.registry.update({"dm_stats": {"read_only": False},
+                              "vol_stats": {"read_only": True,
+                                            "response_size": SMALL}})
+        self.registry.add_catalog(CommandCatalog([
+            ("dm_stats", "Displays data migration statistics.", "")]))
+        traits = self.registry.traits("vol_lock")
+        self.assertTrue(traits.idempotent)
+        self.assertFalse(traits.read_only)
+        self.assertFalse(self.registry.traits("dm_stats").read_only)
+        traits = self.registry.traits("vol_stats")
+        self.assertTrue(traits.read_only and traits.idempotent)
+        self.assertEqual(traits.touches, set())
+        self.assertEqual(traits.response_size, SMALL)
+
+    def test_copy(self):
+        self.registry.register("vol_lock", idempotent=True)
+        copy = self.registry.copy()
+        copy.add_catalog(CommandCatalog([
+            ("dm_stats", "Displays data migration statistics.", "")]))
+        self.assertTrue(copy.traits("vol_lock").idempotent)
+        self.assertTrue(copy.traits("dm_stats").read_only)
+        self.assertNotIn("dm_stats", self.registry)
+        self.assertFalse(self.registry.traits("dm_stats").read_only)
+
+    def test_catalogs_are_not_added_to_the_shared_registry(self):
+        client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        client._add_catalog(CommandCatalog([
+            ("dm_stats", "Displays data migration statistics.", "")]))
+        self.assertIsNot(client.command_registry, default_registry)
+        self.assertTrue(client.command_registry.traits("dm_stats").read_only)
+        self.assertNotIn("dm_stats", default_registry)
+        user_client = client.get_user_client("other", "pass")
+        self.assertTrue(user_client.cmd.dm_stats.traits.read_only)
+        client.command_registry = self.registry
+        user_client._add_catalog(CommandCatalog([
+            ("vol_move", "Displays nothing.", "")]))
+        self.assertIs(client.command_registry, self.registry)
+        self.assertTrue(self.registry.traits("vol_move").read_only)
+
+    def test_invokers(self):
+        client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        self.assertIs(client.command_registry, default_registry)
+        self.assertTrue(client.cmd.pool_list.traits.read_only)
+        client.command_registry = self.registry
+        self.registry.register("pool_list", read_only=False)
+        user_client = client.get_user_client("other", "pass")
+        self.assertFalse(user_client.cmd.pool_list.traits.read_only)
+        self.assertTrue(default_registry.traits("pool_list").read_only)
+
+
+if __name__ == "__main__":
+    unittest.main()
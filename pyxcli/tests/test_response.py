@@ -0,0 +1,286 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import base64
+import unittest
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from mock import patch
+from pyxcli import response
+from pyxcli.response import XCLIResponse, StringInterner
+from pyxcli.filters import equals
+from pyxcli.helpers.xml_util import fromstring, tostring, XMLSyntaxError
+from pyxcli.helpers.xml_util import available_backends
+
+VOL_LIST = """<command><return>
+    <volume id="1"><name value="vol1"/><sg_name value=""/>
+        <pool_name value="p1"/><cg_name value="cg1"/></volume>
+    <volume id="2"><name value="snap1"/><sg_name value="sg1"/>
+        <pool_name value="p2"/><cg_name value=""/></volume>
+    <volume id="3"><name value="snap2"/><sg_name value="sg1"/>
+        <pool_name value="p1"/><cg_name value=""/></volume>
+</return></command>"""
+
+
+def _response(text=VOL_LIST):
+    return XCLIResponse(fromstring(text))
+
+
+class XCLIResponseMemoizationTest(unittest.TestCase):
+
+    def _patch_populate(self):
+        return patch.object(response, "_populate_bunch_with_element",
+                            wraps=response._populate_bunch_with_element)
+
+    def test_len_does_not_build_bunches(self):
+        resp = _response()
+        with self._patch_populate() as pop:
+            self.assertEqual(len(resp), 3)
+            self.assertFalse(pop.called)
+        self.assertEqual(len(_response("<command/>")), 0)
+
+    def test_rows_are_built_once(self):
+        resp = _response()
+        with self._patch_populate() as pop:
+            first = resp[0]
+            calls = pop.call_count
+            self.assertIs(resp[0], first)
+            self.assertEqual(resp[-1].name, "snap2")
+            self.assertEqual([v.name for v in resp.as_list],
+                             ["vol1", "snap1", "snap2"])
+            self.assertEqual(sorted(resp.as_dict("name")),
+                             ["snap1", "snap2", "vol1"])
+            self.assertTrue(resp)
+            self.assertEqual(pop.call_count, calls)
+
+    def test_as_list_is_a_copy(self):
+        resp = _response()
+        resp.as_list.pop()
+        self.assertEqual(len(resp.as_list), 3)
+
+    def test_release(self):
+        resp = _response()
+        first = resp[0]
+        resp.release()
+        self.assertIsNot(resp[0], first)
+        self.assertEqual(resp[0], first)
+
+    def test_element_type_uses_memoized_rows(self):
+        resp = _response()
+        resp.as_list
+        self.assertEqual(len(list(resp.all("volume"))), 3)
+        self.assertEqual(list(resp.all("snapshot")), [])
+        self.assertEqual(resp.contained_element_types, set(["volume"]))
+
+
+class XCLIResponseIndexTest(unittest.TestCase):
+
+    def test_single_index(self):
+        by_name = _response().index("name")
+        self.assertEqual(sorted(by_name), ["snap1", "snap2", "vol1"])
+        self.assertEqual(by_name["vol1"].pool_name, "p1")
+        self.assertTrue("snap2" in by_name)
+        self.assertEqual(by_name.key, "name")
+
+    def test_several_indexes_share_rows(self):
+        resp = _response()
+        by_name, by_cg = resp.index("name", "cg_name")
+        self.assertIs(by_cg["cg1"], by_name["vol1"])
+        self.assertIs(by_name["snap1"], resp[1])
+        self.assertEqual(by_cg[""].name, "snap2")
+
+    def test_group_by(self):
+        by_pool, by_sg = _response().group_by("pool_name", "sg_name")
+        self.assertEqual([v.name for v in by_pool["p1"]], ["vol1", "snap2"])
+        self.assertEqual([v.name for v in by_sg["sg1"]], ["snap1", "snap2"])
+        self.assertIsInstance(by_sg["sg1"], tuple)
+
+    def test_indexes_are_immutable(self):
+        by_name = _response().index("name")
+        with self.assertRaises(TypeError):
+            by_name["vol4"] = None
+        with self.assertRaises(AttributeError):
+            by_name.other = None
+        with self.assertRaises(AttributeError):
+            by_name.key = "other"
+        with self.assertRaises(AttributeError):
+            del by_name.key
+
+    def test_missing_keys_and_element_type(self):
+        self.assertEqual(len(_response().index("no_such_field")), 0)
+        self.assertEqual(len(_response().index("name", element_type="x")),
+                         0)
+        with self.assertRaises(TypeError):
+            _response().index()
+
+
+class XCLIResponseInterningTest(unittest.TestCase):
+
+    def test_values_and_tags_are_shared(self):
+        rows = _response().as_list
+        self.assertIs(rows[1].sg_name, rows[2].sg_name)
+        self.assertIs(rows[0].pool_name, rows[2].pool_name)
+        tags = [[k for k in row if k == "pool_name"][0] for row in rows]
+        self.assertIs(tags[0], tags[1])
+
+    def test_shared_interner(self):
+        interner = StringInterner()
+        first = XCLIResponse(fromstring(VOL_LIST), interner)[0]
+        second = XCLIResponse(fromstring(VOL_LIST), interner)[0]
+        self.assertIs(first.pool_name, second.pool_name)
+        self.assertGreater(len(interner), 0)
+
+    def test_interner_is_bounded(self):
+        interner = StringInterner(max_size=2, max_length=4)
+        self.assertEqual(interner("a" * 5), "a" * 5)
+        self.assertEqual(len(interner), 0)
+        for value in ("a", "b", "c"):
+            interner(value)
+        self.assertEqual(len(interner), 2)
+        self.assertEqual(interner("c"), "c")
+        self.assertEqual(len(interner), 2)
+
+
+class XCLIResponseCompressedTest(unittest.TestCase):
+
+    def _compressed(self, payload, separator=""):
+        text = base64.b64encode(zlib.compress(payload.encode("utf-8")))
+        text = text.decode("ascii")
+        text = separator.join(text[i:i + 76] for i in range(0, len(text), 76))
+        return fromstring('<command><code value="SUCCESS"/>'
+                          '<compressed_return value="%s"/></command>'
+                          % (text,))
+
+    def test_instantiate(self):
+        payload = VOL_LIST.split("<return>")[1].split("</return>")[0]
+        expected = _response().as_list
+        for separator in ("", "\n"):
+            with patch.object(response, "INFLATE_CHUNK", 8):
+                cmdroot = self._compressed(payload, separator)
+                loaded = XCLIResponse.instantiate(cmdroot, "base64")
+            self.assertIsNone(cmdroot.find("compressed_return"))
+            self.assertEqual(loaded.as_list, expected)
+
+    def test_rows_are_built_without_the_tree(self):
+        payload = ('<volume id="1"><name value="v1"/><size value="1"/>'
+                   '<name value="v1b"/></volume>'
+                   '<volume id=""><name value=""/></volume>'
+                   '<host id="7" value="h7"><port value="p"/></host>'
+                   '<mirror><local><name value="l"/><inner><x value="1"/>'
+                   '</inner></local><remote id="3"/></mirror>'
+                   '<weird value="w">text<a><b value="b"/></a></weird>'
+                   '<empty/>')
+        expected = [response._populate_bunch_with_element(element)
+                    for element in fromstring("<r>%s</r>" % (payload,))]
+        with patch.object(response, "_inflate_return",
+                          wraps=response._inflate_return) as inflate:
+            loaded = XCLIResponse.instantiate(self._compressed(payload),
+                                              "base64")
+            self.assertEqual(len(loaded), 6)
+            self.assertEqual(loaded.as_list, expected)
+            self.assertEqual([list(row) for row in loaded.as_list[:4]],
+                             [list(row) for row in expected[:4]])
+            self.assertEqual(loaded.contained_element_types,
+                             set(["volume", "host", "mirror", "weird",
+                                  "empty"]))
+            self.assertFalse(inflate.called)
+            self.assertEqual(len(loaded.as_return_etree), 6)
+            self.assertTrue(inflate.called)
+        self.assertEqual(loaded.as_list, expected)
+
+    def test_malformed_payload(self):
+        self.assertRaises(XMLSyntaxError, XCLIResponse.instantiate,
+                          self._compressed("<a><b></a>"), "base64")
+
+
+class SerialPool(object):
+
+    def __init__(self):
+        self.batches = []
+
+    def map(self, function, *iterables):
+        self.batches.append(len(iterables[0]))
+        return map(function, *iterables)
+
+
+VOLUMES = "".join('<volume id="%d"><name value="v%d"/>'
+                  '<size value="%d"/></volume>' % (i, i, i * 17)
+                  for i in range(100))
+
+
+class XCLIResponseParallelTest(unittest.TestCase):
+
+    def _instantiate(self, payload, pool, xml_backend=None):
+        text = base64.b64encode(zlib.compress(payload.encode("utf-8")))
+        cmdroot = fromstring('<command><code value="SUCCESS"/>'
+                             '<compressed_return value="%s"/></command>'
+                             % (text.decode("ascii"),), xml_backend)
+        with patch.object(response, "PARALLEL_SHARD", 64):
+            return XCLIResponse.instantiate(cmdroot, "base64",
+                                            xml_backend=xml_backend,
+                                            pool=pool)
+
+    def test_parallel(self):
+        payload = VOLUMES
+        expected = self._instantiate(payload, None)
+        with ProcessPoolExecutor(2) as process_pool:
+            for pool in (SerialPool(), process_pool):
+                loaded = self._instantiate(payload, pool)
+                self.assertGreater(len(loaded._return_shards), 10)
+                self.assertEqual(len(loaded), 100)
+                self.assertEqual(loaded.as_list, expected.as_list)
+                self.assertEqual(
+                    next(loaded.all(where=equals("name", "v7"))),
+                    expected[7])
+                self.assertEqual(tostring(loaded.response_etree),
+                                 tostring(expected.response_etree))
+                self.assertIsNone(loaded._return_shards)
+
+    def test_backends(self):
+        for name in available_backends():
+            expected = self._instantiate(VOLUMES, None, name)
+            loaded = self._instantiate(VOLUMES, SerialPool(), name)
+            self.assertGreater(len(loaded._return_shards), 10)
+            returned = loaded.response_etree.find("return")
+            self.assertIs(type(returned), type(loaded.response_etree))
+            self.assertEqual(tostring(loaded.response_etree),
+                             tostring(expected.response_etree))
+
+    def test_batches(self):
+        pool = SerialPool()
+        with patch.object(response, "PARALLEL_BATCH", 3):
+            loaded = self._instantiate(VOLUMES, pool)
+        self.assertGreater(len(pool.batches), 3)
+        self.assertLessEqual(max(pool.batches), 3)
+        self.assertEqual(len(loaded._return_shards), sum(pool.batches))
+        self.assertEqual(loaded[99].name, "v99")
+
+    def test_small_return_is_not_split(self):
+        pool = SerialPool()
+        loaded = self._instantiate(VOLUMES[:VOLUMES.index('<volume id="1"')],
+                                   pool)
+        self.assertEqual(pool.batches, [])
+        self.assertIsNone(loaded._return_shards)
+        self.assertEqual(loaded[0].name, "v0")
+
+    def test_misplaced_split(self):
+        # nested elements of the same type make the split fail
+        payload = "".join('<a><a><b value="%d"/></a></a>' % (i,)
+                          for i in range(100))
+        loaded = self._instantiate(payload, SerialPool())
+        self.assertIsNone(loaded._return_shards)
+        self.assertEqual(len(loaded), 100)
+        self.assertEqual(loaded[3].a.b, "3")
@@ -15,14 +15,24 @@
 ##############################################################################
 
 import os
+import zlib
+import base64
 import unittest
 import codecs
 from mock import Mock
 from pyxcli.client import XCLIClient
 from pyxcli.errors import CommandExecutionError
 from pyxcli.response import XCLIResponse
+from pyxcli.helpers import xml_util
 from pyxcli.helpers.xml_util import fromstring
 
+COMPRESSED_ERROR = ('<command id="0"><aserver status="DELIVERY_SUCCESSFUL"/>'
+                    '<administrator><command>'
+                    '<code value="VOLUME_BAD_NAME"/><status value="3"/>'
+                    '<status_str value="Volume name does not exist"/>'
+                    '<compressed_return value="%s"/>'
+                    '</command></administrator></command>')
+
 
 class XCLIResponseBuildingTest(unittest.TestCase):
 
@@ -71,3 +81,34 @@ class XCLIResponseBuildingTest(unittest.TestCase):
                 self.assertTrue(e.code is not None)
                 self.assertIsInstance(e.return_value, XCLIResponse)
                 self.assertGreater(len(e.return_value.as_list), 0)
+
+    def test_error_responses_use_the_client_xml_backend(self):
+        payload = b'<volume id="1"><name value="v1"/></volume>'
+        text = base64.b64encode(zlib.compress(payload)).decode("ascii")
+        for name in xml_util.available_backends():
+            self.xcli_client.xml_backend = name
+            rootelem = fromstring(COMPRESSED_ERROR % (text,), name)
+            try:
+                self.xcli_client._build_response(rootelem)
+                self.fail('Should have raised an exception.')
+            except CommandExecutionError as e:
+                self.assertEqual(e.return_value.as_list[0].name, "v1")
+                returned = e.return_value.response_etree.find("return")
+                self.assertIs(type(returned), type(rootelem))
+
+    def test_error_xml_keeps_the_return_element(self):
+        payload = b'<volume id="1"><name value="v1"/></volume>'
+        text = base64.b64encode(zlib.compress(payload)).decode("ascii")
+        for name in xml_util.available_backends():
+            self.xcli_client.xml_backend = name
+            rootelem = fromstring(COMPRESSED_ERROR % (text,), name)
+            try:
+                self.xcli_client._build_response(rootelem)
+                self.fail('Should have raised an exception.')
+            except CommandExecutionError as e:
+                returned = e.xml.find("return")
+                self.assertIsNotNone(returned)
+                self.assertEqual(returned.find("volume/name").get("value"),
+                                 "v1")
+                self.assertEqual(e.return_value.as_list[0].name, "v1")
+                self.assertIs(e.xml.find("return"), returned)
@@ -0,0 +1,94 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import unittest
+from mock import Mock
+from pyxcli.client import XCLIClient
+from pyxcli.errors import CorruptResponse
+from pyxcli.helpers.xml_util import fromstring
+from pyxcli.retry import RetryPolicy, RetryBudget
+from pyxcli.transports import ClosedTransportError
+from pyxcli.tests.support import read_response
+
+
+def _success():
+    return fromstring(read_response("success.txt"))
+
+
+class RetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Mock()
+        self.client = XCLIClient(self.transport, "admin", "pass",
+                                 populate=False)
+        self.sleeps = []
+        self.client.retry_policy = RetryPolicy(
+            attempts=3, sleep=self.sleeps.append, random=lambda: 1.0)
+
+    def test_idempotent_commands_are_sent_again(self):
+        self.transport.send.side_effect = [CorruptResponse("truncated"),
+                                           IOError("reset"), _success()]
+        self.assertGreater(len(self.client.cmd.mirror_list()), 0)
+        self.assertEqual(self.transport.send.call_count, 3)
+        sent = [call[0][0] for call in self.transport.send.call_args_list]
+        self.assertEqual(len(set(sent)), 1)
+        self.assertEqual(self.sleeps, [0.1, 0.2])
+
+    def test_attempts_are_bounded(self):
+        self.transport.send.side_effect = CorruptResponse("truncated")
+        self.assertRaises(CorruptResponse, self.client.cmd.vol_list)
+        self.assertEqual(self.transport.send.call_count, 3)
+
+    def test_other_commands_are_not_sent_again(self):
+        self.transport.send.side_effect = CorruptResponse("truncated")
+        self.assertRaises(CorruptResponse, self.client.cmd.vol_create,
+                          vol="v1", size=17, pool="p1")
+        self.transport.send.side_effect = ClosedTransportError()
+        self.assertRaises(ClosedTransportError, self.client.cmd.vol_list)
+        self.assertEqual(self.transport.send.call_count, 2)
+        self.client.retry_policy = None
+        self.transport.send.side_effect = CorruptResponse("truncated")
+        self.assertRaises(CorruptResponse, self.client.cmd.vol_list)
+        self.assertEqual(self.transport.send.call_count, 3)
+
+    def test_retries_are_opt_in(self):
+        client = XCLIClient(self.transport, "admin", "pass", populate=False)
+        self.assertIsNone(client.retry_policy)
+        self.transport.send.side_effect = CorruptResponse("truncated")
+        self.assertRaises(CorruptResponse, client.cmd.vol_list)
+        self.assertEqual(self.transport.send.call_count, 1)
+
+    def test_reconnect(self):
+        self.transport.is_connected.return_value = False
+        self.transport.send.side_effect = [IOError("reset"), _success()]
+        self.client.cmd.vol_list()
+        self.assertEqual(self.transport.reconnect.call_count, 1)
+
+    def test_budget(self):
+        budget = RetryBudget(initial=1, ratio=0.5, maximum=2)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        for i in range(5):
+            budget.deposit()
+        self.assertEqual(budget.tokens, 2)
+        self.client._retry_budget = RetryBudget(initial=1)
+        self.transport.send.side_effect = CorruptResponse("truncated")
+        self.assertRaises(CorruptResponse, self.client.cmd.vol_list)
+        self.assertEqual(self.transport.send.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
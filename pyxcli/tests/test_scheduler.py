@@ -0,0 +1,201 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import threading
+import unittest
+from mock import Mock, patch
+from pyxcli.client import XCLIClient
+from pyxcli.scheduler import PriorityScheduler, _FairQueue, _Request
+from pyxcli.tests.support import Clock, wait_for
+
+
+class PrioritySchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.scheduler = PriorityScheduler(aging=10, clock=self.clock)
+        self.order = []
+
+    def _queue(self, name, priority, flow=None):
+        def run():
+            with self.scheduler.slot(priority, flow):
+                self.order.append(name)
+        thread = threading.Thread(target=run)
+        thread.start()
+        wait_for(lambda: self._waiting() > len(self.threads))
+        self.threads.append(thread)
+
+    def _waiting(self):
+        return sum(stats.depth for stats in self.scheduler.stats().values())
+
+    def _run(self, requests):
+        self.threads = []
+        self.scheduler.acquire()
+        for request in requests:
+            name, priority, advance = request[:3]
+            self.clock.now += advance
+            self._queue(name, priority, *request[3:])
+        self.scheduler.release()
+        for thread in self.threads:
+            thread.join()
+
+    def test_priority_and_arrival(self):
+        self._run([("b1", "background", 0), ("n1", None, 0),
+                   ("i1", "interactive", 0), ("n2", "normal", 0),
+                   ("i2", "interactive", 0)])
+        self.assertEqual(self.order, ["i1", "i2", "n1", "n2", "b1"])
+
+    def test_aging(self):
+        self._run([("b1", "background", 0), ("i1", "interactive", 15),
+                   ("i2", "interactive", 10)])
+        self.assertEqual(self.order, ["i1", "b1", "i2"])
+
+    def test_stats(self):
+        self.scheduler.acquire()
+        self.threads = []
+        self._queue("b1", "background")
+        stats = self.scheduler.stats()
+        self.assertEqual(stats["background"].depth, 1)
+        self.clock.now += 2
+        self.scheduler.release()
+        self.threads[0].join()
+        stats = self.scheduler.stats()
+        self.assertEqual(stats["background"].depth, 0)
+        self.assertEqual(stats["background"].served, 1)
+        self.assertEqual(stats["background"].max_wait, 2)
+        self.assertEqual(stats["normal"].served, 1)
+        self.assertEqual(stats["normal"].mean_wait, 0)
+
+    def test_unknown_class(self):
+        self.assertRaises(ValueError, self.scheduler.acquire, "urgent")
+
+    def test_fair_flows(self):
+        self._run([("a1", None, 0, "a"), ("a2", None, 0, "a"),
+                   ("a3", None, 0, "a"), ("b1", None, 0, "b")])
+        self.assertEqual(self.order, ["a1", "b1", "a2", "a3"])
+
+    def test_weights(self):
+        self.scheduler.set_weight("a", 2)
+        self._run([("a1", None, 0, "a"), ("a2", None, 0, "a"),
+                   ("a3", None, 0, "a"), ("a4", None, 0, "a"),
+                   ("b1", None, 0, "b"), ("b2", None, 0, "b")])
+        self.assertEqual(self.order, ["a1", "a2", "b1", "a3", "a4", "b2"])
+        self.assertRaises(ValueError, self.scheduler.set_weight, "b", 0)
+
+    def test_priority_before_flows(self):
+        self.scheduler.set_weight("a", 100)
+        self._run([("a1", "background", 0, "a"), ("b1", None, 0, "b")])
+        self.assertEqual(self.order, ["b1", "a1"])
+
+    def test_flow_stats(self):
+        self.scheduler.acquire(flow="a")
+        self.threads = []
+        self._queue("b1", None, "b")
+        self.assertEqual(self.scheduler.flow_stats()["b"].depth, 1)
+        self.clock.now += 3
+        self.scheduler.release()
+        self.threads[0].join()
+        stats = self.scheduler.flow_stats()
+        self.assertEqual(stats["a"].served, 1)
+        self.assertEqual(stats["a"].max_wait, 0)
+        self.assertEqual(stats["b"].depth, 0)
+        self.assertEqual(stats["b"].mean_wait, 3)
+
+    def test_interrupted_waits(self):
+        self.scheduler.acquire()
+        with patch("pyxcli.scheduler.Event") as event:
+            event.return_value.wait.side_effect = KeyboardInterrupt
+            self.assertRaises(KeyboardInterrupt, self.scheduler.acquire,
+                              "background")
+        self.assertEqual(self._waiting(), 0)
+        self.assertEqual(self.scheduler.stats()["background"].served, 0)
+        self.scheduler.release()
+        self.scheduler.acquire()
+
+        # interrupted right after being granted the scheduler
+        def granted():
+            self.scheduler.release()
+            raise KeyboardInterrupt()
+        self.threads = []
+        self._queue("n1", None)
+        with patch("pyxcli.scheduler.Event") as event:
+            event.return_value.wait.side_effect = granted
+            self.assertRaises(KeyboardInterrupt, self.scheduler.acquire,
+                              "interactive")
+        self.threads[0].join()
+        self.assertEqual(self.order, ["n1"])
+        self.assertEqual(self._waiting(), 0)
+        self.scheduler.acquire()
+        self.scheduler.release()
+
+
+class FairQueueTest(unittest.TestCase):
+
+    def test_oldest(self):
+        queue = _FairQueue()
+        requests = [_Request(None, flow, arrived)
+                    for flow, arrived in (("a", 1), ("a", 2), ("b", 3),
+                                          ("c", 4))]
+        for order, request in enumerate(requests):
+            queue.push(request, 1, order)
+        self.assertEqual(queue.oldest(), 1)
+        self.assertIs(queue.pop(), requests[0])
+        self.assertEqual(queue.oldest(), 2)
+        self.assertIs(queue.pop(), requests[2])
+        self.assertEqual(queue.oldest(), 2)
+        queue.remove(requests[1])
+        self.assertEqual(queue.oldest(), 4)
+        self.assertEqual(queue.size, 1)
+        self.assertIs(queue.pop(), requests[3])
+        self.assertEqual((queue.size, queue.heap, len(queue.arrivals)),
+                         (0, [], 0))
+
+
+class ClientPriorityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        self.client._build_response = Mock()
+        self.client.scheduler = Mock(wraps=self.client.scheduler)
+
+    def test_priorities(self):
+        self.client.cmd.vol_list()
+        with self.client.options(priority="background"):
+            self.client.cmd.vol_list()
+            self.client.cmd.vol_list(_priority="interactive")
+        self.assertEqual([call[0][0] for call in
+                          self.client.scheduler.slot.call_args_list],
+                         [None, "background", "interactive"])
+
+    def test_flows(self):
+        self.client.cmd.vol_list()
+        with self.client.options(tenant="inventory"):
+            self.client.cmd.vol_list()
+        self.assertEqual([call[0][1] for call in
+                          self.client.scheduler.slot.call_args_list],
+                         ["admin", "inventory"])
+        data = self.client.transport.send.call_args[0][0]
+        self.assertNotIn(b"inventory", data)
+
+    def test_priority_is_not_sent(self):
+        self.client.cmd.vol_list(_priority="interactive")
+        data = self.client.transport.send.call_args[0][0]
+        self.assertNotIn(b"priority", data)
+        self.assertNotIn(b"interactive", data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import unittest
+from datetime import datetime
+from mock import Mock
+from pyxcli.client import XCLIClient
+from pyxcli.response import XCLIResponse
+from pyxcli.helpers.xml_util import fromstring
+from pyxcli.schemas import SchemaRegistry, to_int, to_bool, to_datetime
+from pyxcli.tests.support import read_response
+
+SNAPSHOT_LIST = """<command><return>
+    <volume id="1"><name value="s1"/><size value="17"/>
+        <locked value="yes"/><snapshot_time value="2016-07-14 10:22:01"/>
+        </volume>
+    <volume id="2"><name value="s2"/><size value=""/>
+        <locked value="no"/><snapshot_time value="bogus"/></volume>
+    <num_results value="2"/>
+</return></command>"""
+
+
+class SchemaRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = SchemaRegistry()
+        self.registry.register("snapshot_list", "volume", size=to_int,
+                               locked=to_bool, snapshot_time=to_datetime)
+        self.response = XCLIResponse(fromstring(SNAPSHOT_LIST),
+                                     command="snapshot_list")
+
+    def test_typed_rows(self):
+        first, second, count = self.response.typed(registry=self.registry)
+        self.assertEqual(first.size, 17)
+        self.assertIs(first.locked, True)
+        self.assertEqual(first.snapshot_time, datetime(2016, 7, 14, 10, 22, 1))
+        self.assertIsNone(second.size)
+        self.assertIs(second.locked, False)
+        self.assertEqual(second.snapshot_time, "bogus")
+        self.assertEqual(count, "2")
+
+    def test_memoized_rows_keep_strings(self):
+        self.response.typed(registry=self.registry)
+        self.assertEqual(self.response[0].size, "17")
+
+    def test_typed_columns(self):
+        columns = self.response.as_columns("volume", typed=True,
+                                           registry=self.registry)
+        self.assertEqual(sorted(columns),
+                         ["locked", "name", "nextra_element_id", "size",
+                          "snapshot_time"])
+        self.assertEqual(columns["size"], [17, None])
+        self.assertEqual(columns["locked"], [True, False])
+        self.assertEqual(
+            self.response.as_columns("volume")["size"], ["17", ""])
+
+    def test_generic_and_unknown_element_types(self):
+        self.registry.unregister("snapshot_list", "volume")
+        self.registry.register("snapshot_list", None, size=to_int)
+        rows = self.response.typed(registry=self.registry)
+        self.assertEqual(rows[0].size, 17)
+        self.assertEqual(rows[0].locked, "yes")
+        self.assertEqual(rows[2], "2")
+        self.assertEqual(self.registry.converters("vol_list", "volume"), {})
+
+
+class DefaultRegistryTest(unittest.TestCase):
+
+    def test_client_responses_know_their_command(self):
+        rootelem = fromstring(read_response('success.txt'))
+        client = XCLIClient(Mock(), 'user', 'password', populate=False)
+        pool = client._build_response(rootelem, "pool_list").typed()[0]
+        self.assertEqual(pool.hard_size, 309)
+        self.assertIs(pool.locked, False)
@@ -0,0 +1,140 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import threading
+import unittest
+from pyxcli.client import XCLIClient
+from pyxcli.errors import CorruptResponse
+from pyxcli.helpers.xml_util import fromstring
+from pyxcli.singleflight import SingleFlight
+from pyxcli.tests.support import read_response, wait_for
+
+
+class BlockingTransport(object):
+    """Answers every command once ``release`` is set"""
+
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.sent = []
+        self.error = error
+
+    def is_connected(self):
+        return True
+
+    def send(self, data, **kwargs):
+        self.sent.append(data)
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return fromstring(read_response("success.txt"))
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    THREADS = 20
+
+    def _run(self, client, function):
+        results = []
+        errors = []
+
+        def run():
+            try:
+                results.append(function())
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=run)
+                   for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        wait_for(lambda: len(client.transport.sent) > 0)
+        calls = client._flight._calls
+
+        def followers():
+            return sum(call.followers for call in list(calls.values()))
+        wait_for(lambda: followers() == self.THREADS - 1)
+        client.transport.release.set()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def _client(self, transport):
+        client = XCLIClient(transport, "admin", "pass", populate=False)
+        client.coalesce_reads = True
+        return client
+
+    def test_identical_reads_share_a_round_trip(self):
+        client = self._client(BlockingTransport())
+        results, errors = self._run(client, client.cmd.pool_list)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(client.transport.sent), 1)
+        self.assertEqual(len(results), self.THREADS)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(len(client._flight), 0)
+        client.cmd.pool_list()
+        self.assertEqual(len(client.transport.sent), 2)
+
+    def test_reads_are_not_coalesced_by_default(self):
+        transport = BlockingTransport()
+        client = XCLIClient(transport, "admin", "pass", populate=False)
+        threads = [threading.Thread(target=client.cmd.pool_list)
+                   for i in range(3)]
+        for thread in threads:
+            thread.start()
+        transport.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(transport.sent), 3)
+        self.assertEqual(len(client._flight), 0)
+
+    def test_errors_are_shared(self):
+        client = self._client(BlockingTransport(CorruptResponse("cut")))
+        results, errors = self._run(client, client.cmd.pool_list)
+        self.assertEqual(len(client.transport.sent), 1)
+        self.assertEqual(len(errors), self.THREADS)
+
+    def test_different_commands_are_not_shared(self):
+        transport = BlockingTransport()
+        transport.release.set()
+        client = self._client(transport)
+        client.cmd.pool_list(pool="p1")
+        client.cmd.pool_list(pool="p2")
+        with client.options(user="other"):
+            client.cmd.pool_list(pool="p1")
+        client.cmd.pool_rename(pool="p1", new_name="p2")
+        self.assertEqual(len(transport.sent), 4)
+
+    def test_writes_are_not_coalesced(self):
+        transport = BlockingTransport()
+        client = self._client(transport)
+        threads = [threading.Thread(target=client.cmd.vol_delete,
+                                    kwargs={"vol": "v1"})
+                   for i in range(3)]
+        for thread in threads:
+            thread.start()
+        transport.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(transport.sent), 3)
+
+    def test_do(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+        self.assertRaises(ValueError, flight.do, "key", lambda: int("x"))
+        self.assertEqual(len(flight), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
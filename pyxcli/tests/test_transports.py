@@ -17,8 +17,11 @@
 import unittest
 from mock import patch, Mock
 
+from pyxcli.client import XCLIClient
 from pyxcli.helpers.xml_util import XMLException
+from pyxcli.retry import RetryPolicy
 from pyxcli.transports import SocketTransport, DisconnectedWhileReceivingData
+from pyxcli.transports import ClosedTransportError
 from pyxcli.errors import CorruptResponse
 
 
@@ -56,6 +59,46 @@ class TestSocketTransport(unittest.TestCase):
             transport.send('fake_stream' * 10)
             self.assertTrue(transport.is_connected())
 
+    @patch('pyxcli.transports.TerminationDetectingXMLParser')
+    def test_send_uses_the_given_xml_backend(self, ParserMock):
+        sock_mock = Mock()
+        sock_mock.send.return_value = 100
+        sock_mock.getpeername.return_value = (Mock(), Mock())
+        sock_mock.recv.return_value = b'<a/>'
+        parser_mock = Mock()
+        parser_mock.root_element_closed = True
+        ParserMock.return_value = parser_mock
+        transport = SocketTransport(sock_mock)
+        self.assertIs(transport.send('<b/>', xml_backend='etree'),
+                      parser_mock.close.return_value)
+        ParserMock.assert_called_once_with('etree')
+
+    @patch.object(SocketTransport, 'is_connected')
+    def test_corrupt_response_holds_the_spooled_data(self, is_connected_mock):
+        is_connected_mock.return_value = True
+        sock_mock = Mock()
+        sock_mock.send.return_value = 100
+        sock_mock.getpeername.return_value = (Mock(), Mock())
+        sock_mock.recv.side_effect = [b'<a>' + b'<b/>' * 10, b'<c<']
+        transport = SocketTransport(sock_mock)
+        with self.assertRaises(CorruptResponse) as context:
+            transport.send('<b/>', spool_threshold=10)
+        self.assertEqual(context.exception.args[1],
+                         '<a>' + '<b/>' * 10 + '<c<')
+
+
+class TestClosedTransport(unittest.TestCase):
+
+    def test_closed_client(self):
+        client = XCLIClient(Mock(), "admin", "pass", populate=False)
+        client.xml_backend = "etree"
+        client.spool_threshold = 1024
+        sleeps = []
+        client.retry_policy = RetryPolicy(sleep=sleeps.append)
+        client.close()
+        self.assertRaises(ClosedTransportError, client.cmd.vol_list)
+        self.assertEqual(sleeps, [])
+
 
 if __name__ == "__main__":
     unittest.main()
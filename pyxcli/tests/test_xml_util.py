@@ -0,0 +1,132 @@
+##############################################################################
+# Copyright 2016 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+##############################################################################
+
+import io
+import unittest
+from pyxcli.helpers import xml_util
+from pyxcli.helpers.xml_util import XMLSyntaxError
+
+RESPONSE = (b'<command id="1"><aserver status="DELIVERY_SUCCESSFUL"/>'
+            b'<administrator><command><code value="SUCCESS"/><return>'
+            b'<volume id="1"><name value="v1"/></volume>'
+            b'<volume id="2"><name value="v2"/></volume>'
+            b'</return></command></administrator></command>')
+
+
+class BackendsTest(unittest.TestCase):
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, xml_util.get_backend, "nosuch")
+        self.assertRaises(ValueError, xml_util.fromstring, "<a/>", "nosuch")
+
+    def test_set_default_backend(self):
+        previous = xml_util.set_default_backend("etree")
+        try:
+            self.assertEqual(xml_util.get_backend().name, "etree")
+        finally:
+            xml_util.set_default_backend(previous)
+        self.assertIs(xml_util.get_backend(), previous)
+
+    def test_backends(self):
+        for name in xml_util.available_backends():
+            backend = xml_util.get_backend(name)
+            self.assertIs(xml_util.get_backend(backend), backend)
+
+            root = xml_util.fromstring(RESPONSE, name)
+            names = [e.get("value") for e in root.iter("name")]
+            self.assertEqual(names, ["v1", "v2"])
+            self.assertEqual(
+                xml_util.fromstring(RESPONSE.decode(), name).tag, "command")
+            self.assertEqual(
+                xml_util.parse(io.BytesIO(RESPONSE), name).getroot().tag,
+                "command")
+            events = xml_util.iterparse(io.BytesIO(RESPONSE), backend=name)
+            self.assertEqual(
+                [e.tag for _, e in events if e.tag == "volume"],
+                ["volume", "volume"])
+            self.assertIn(b"v2", xml_util.tostring(root))
+
+    def test_syntax_errors(self):
+        for name in xml_util.available_backends():
+            for text in ("", "<a<a", "<a></b>"):
+                try:
+                    xml_util.fromstring(text, name)
+                except XMLSyntaxError as e:
+                    self.assertIsNone(e.original)
+                    self.assertTrue(e.msg)
+                    # the standard library parser does not set lineno
+                    self.assertIn(e.lineno, (None, 1))
+                else:
+                    self.fail("%s parsed %r" % (name, text))
+
+
+class TerminationDetectingXMLParserTest(unittest.TestCase):
+
+    def test_termination(self):
+        for name in xml_util.available_backends():
+            parser = xml_util.TerminationDetectingXMLParser(name)
+            for i in range(0, len(RESPONSE) - 10, 10):
+                parser.feed(RESPONSE[i:i + 10])
+                self.assertFalse(parser.root_element_closed)
+            parser.feed(RESPONSE[i + 10:])
+            self.assertTrue(parser.root_element_closed)
+            root = parser.close()
+            self.assertEqual(xml_util.xml_find(root, "aserver", "status"),
+                             "DELIVERY_SUCCESSFUL")
+
+    def test_whole_document(self):
+        for name in xml_util.available_backends():
+            parser = xml_util.TerminationDetectingXMLParser(name)
+            parser.feed(RESPONSE + b"\n")
+            self.assertTrue(parser.root_element_closed)
+            self.assertIsNone(parser.parser)
+            self.assertEqual(len(parser.close().find("administrator/command"
+                                                     "/return")), 2)
+
+    def test_data_after_whole_document(self):
+        for name in xml_util.available_backends():
+            parser = xml_util.TerminationDetectingXMLParser(name)
+            parser.feed(b"<a/>")
+            self.assertTrue(parser.root_element_closed)
+            with self.assertRaises(XMLSyntaxError):
+                parser.feed(b"<b/>")
+                parser.close()
+
+    def test_nothing_fed(self):
+        for name in xml_util.available_backends():
+            parser = xml_util.TerminationDetectingXMLParser(name)
+            self.assertFalse(parser.root_element_closed)
+            self.assertRaises(XMLSyntaxError, parser.close)
+
+    def test_syntax_error(self):
+        for name in xml_util.available_backends():
+            parser = xml_util.TerminationDetectingXMLParser(name)
+            parser.feed(b"<a>")
+            with self.assertRaises(XMLSyntaxError) as context:
+                parser.feed(b"<b<b")
+                parser.close()
+            self.assertIn(context.exception.lineno, (None, 1))
+
+    def test_syntax_error_is_raised_on_feed(self):
+        # a malformed response must not wait for more data to fail
+        for name in xml_util.available_backends():
+            parser = xml_util.TerminationDetectingXMLParser(name)
+            parser.feed(b"<a>" + b"<b/>" * 10)
+            self.assertRaises(XMLSyntaxError, parser.feed, b"<c<")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,7 @@
 
 import socket
 import ssl
+import tempfile
 from logging import getLogger
 from pyxcli import XCLI_DEFAULT_LOGGER, XCLI_DEFAULT_PORT
 from pyxcli.helpers.xml_util import XMLException
@@ -60,7 +61,8 @@ class Transport(object):
     def fileno(self):
         raise NotImplementedError()
 
-    def send(self, data, timeout=None):
+    def send(self, data, timeout=None, xml_backend=None,
+             spool_threshold=None):
         raise NotImplementedError()
 
     def reconnect(self):
@@ -82,7 +84,7 @@ class ClosedTransport(Transport):
     def fileno(self):
         raise ClosedTransportError()
 
-    def send(self, *args):
+    def send(self, *args, **kwargs):
         raise ClosedTransportError()
 
     def reconnect(self):
@@ -129,6 +131,9 @@ ClosedFile = ClosedFile()
 # ============================================================================
 class SocketTransport(object):
     MAX_IO_CHUNK = 16000
+    # the raw response (kept for error reports) is moved to a temporary
+    # file once it gets larger than this
+    SPOOL_THRESHOLD = 1 << 20
 
     def __init__(self, sock):
         self.sock = sock
@@ -224,22 +229,25 @@ class SocketTransport(object):
     def fileno(self):
         return self.sock.fileno()
 
-    def send(self, data, timeout=None):
+    def send(self, data, timeout=None, xml_backend=None,
+             spool_threshold=None):
 
+        if not isinstance(data, bytes):
+            data = data.encode()
         while data:
-            chunk = data[:self.MAX_IO_CHUNK]
-            byte_chunk = chunk.encode()
-            sent = self.sock.send(byte_chunk)
+            sent = self.sock.send(data[:self.MAX_IO_CHUNK])
             data = data[sent:]
 
-        parser = TerminationDetectingXMLParser()
-        raw = ""
+        if spool_threshold is None:
+            spool_threshold = self.SPOOL_THRESHOLD
+        parser = TerminationDetectingXMLParser(xml_backend)
+        raw = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
         try:
             while not parser.root_element_closed:
                 chunk = self.sock.recv(self.MAX_IO_CHUNK)
                 if not chunk:
                     break
-                raw += chunk.decode()
+                raw.write(chunk)
                 parser.feed(chunk)
             return parser.close()
         except XMLException as ex:
@@ -247,9 +255,13 @@ class SocketTransport(object):
             if not self.is_connected():
                 ex = chained(DisconnectedWhileReceivingData())
             else:
-                ex = chained(CorruptResponse(str(ex), raw))
+                raw.seek(0)
+                ex = chained(CorruptResponse(
+                    str(ex), raw.read().decode("utf-8", "replace")))
             self.close()
             raise ex
+        finally:
+            raw.close()
 
     def reconnect(self):
         if self.is_connected():
@@ -350,11 +362,11 @@ class MultiEndpointTransport(Transport):
                 self.transport = ClosedTransport
                 exceptions.append((ep, ex))
 
-    def send(self, *args):
+    def send(self, *args, **kwargs):
         while True:
             self._connect()
             try:
-                return self.transport.send(*args)
+                return self.transport.send(*args, **kwargs)
             except (TransportError, IOError):
                 self.transport.close()
                 self.transport = ClosedTransport